@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark MarkdownToANSIConverter.convert across every theme and mode
+
+Generates a synthetic corpus (see corpus.py), times convert in normal and
+max mode for each theme, and reports lines/sec, MB/sec and peak traced
+memory. Results can be saved as JSON and compared against a saved baseline;
+the run fails when throughput or peak memory regress past the threshold.
+
+Usage:
+    python benchmarks/bench_convert.py --output results.json
+    python benchmarks/bench_convert.py --baseline results.json --threshold 0.1
+    python benchmarks/bench_convert.py --color-depth truecolor --modes max
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.styles import THEMES  # noqa: E402
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+
+def measure(text, style_name, max_mode, repeat, color_depth='16'):
+    """Time convert (best of repeat) and trace its peak memory"""
+    converter = MarkdownToANSIConverter(style_name, max_mode=max_mode, color_depth=color_depth)
+    converter.convert(text[:4096])  # warm caches
+
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        converter.convert(text)
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    converter.convert(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size_mb = len(text.encode('utf-8')) / (1024 * 1024)
+    lines = text.count('\n') + 1
+    return {
+        'style': style_name,
+        'mode': 'max' if max_mode else 'normal',
+        'seconds': best,
+        'lines_per_sec': lines / best,
+        'mb_per_sec': size_mb / best,
+        'peak_mb': peak / (1024 * 1024),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return descriptions of every result that regressed against the baseline"""
+    previous = {(r['style'], r['mode']): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get((result['style'], result['mode']))
+        if old is None:
+            continue
+        name = f"{result['style']}/{result['mode']}"
+        if result['mb_per_sec'] < old['mb_per_sec'] * (1 - threshold):
+            regressions.append(f"{name}: {old['mb_per_sec']:.2f} -> {result['mb_per_sec']:.2f} MB/s")
+        if result['peak_mb'] > old['peak_mb'] * (1 + threshold):
+            regressions.append(f"{name}: peak {old['peak_mb']:.1f} -> {result['peak_mb']:.1f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=2.0,
+                        help='Corpus size in MB (default: 2)')
+    parser.add_argument('--mix', help="Block mix, e.g. 'inline=4,lists=2,code=1,headers=1'")
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--styles', default=','.join(THEMES.keys()),
+                        help='Comma-separated themes (default: all)')
+    parser.add_argument('--modes', default='normal,max',
+                        help='Comma-separated modes (default: normal,max)')
+    parser.add_argument('--color-depth', choices=('16', '256', 'truecolor'), default='16',
+                        help='Output color depth (default: 16)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timed runs per configuration, best is kept (default: 3)')
+    parser.add_argument('--output', help='Write results to this JSON file')
+    parser.add_argument('--baseline', help='Compare against a saved results file')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Allowed fractional regression vs. baseline (default: 0.10)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else None
+    text = generate_corpus(int(args.size_mb * 1024 * 1024), mix, args.seed)
+    print(f"corpus: {len(text.encode('utf-8')) / (1024 * 1024):.2f} MB, "
+          f"{text.count(chr(10)) + 1} lines, mix={args.mix or 'default'}, "
+          f"color depth {args.color_depth}")
+
+    results = []
+    for style_name in args.styles.split(','):
+        for mode in args.modes.split(','):
+            result = measure(text, style_name, mode == 'max', args.repeat, args.color_depth)
+            results.append(result)
+            print(f"  {style_name:10} {result['mode']:6} "
+                  f"{result['lines_per_sec']:12,.0f} lines/s "
+                  f"{result['mb_per_sec']:8.2f} MB/s "
+                  f"{result['peak_mb']:8.1f} MB peak")
+
+    report = {
+        'python': platform.python_version(),
+        'size_mb': args.size_mb,
+        'mix': args.mix,
+        'seed': args.seed,
+        'color_depth': args.color_depth,
+        'results': results,
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + '\n', encoding='utf-8')
+        print(f"results written to {args.output}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"regressions beyond {args.threshold:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} vs. {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark CP437 output: encoding and SAUCE counting throughput, and batch cost
+
+Renders a synthetic corpus (see corpus.py) in normal and max mode and times
+encoding it as UTF-8, as CP437 with encode_cp437 and with the standard
+cp437 codec (errors='replace'), then measuring it for a SAUCE record with
+SauceCounter. Finally converts --files small files with run_batch in one
+process, as UTF-8, as CP437 and as CP437 with SAUCE records, and reports
+files/s.
+
+Usage:
+    python benchmarks/bench_cp437.py --size-mb 4 --files 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.batch import find_jobs, run_batch  # noqa: E402
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.cp437 import SauceCounter, encode_cp437  # noqa: E402
+from md_ansi.output import DEFAULT_CHUNK_SIZE  # noqa: E402
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+
+def best_of(runs, func):
+    """Fastest of runs calls, in seconds"""
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def count(data):
+    """Measure encoded output in DEFAULT_CHUNK_SIZE chunks, as written"""
+    counter = SauceCounter()
+    for start in range(0, len(data), DEFAULT_CHUNK_SIZE):
+        counter.write(data[start:start + DEFAULT_CHUNK_SIZE])
+    return counter.record()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=4.0,
+                        help='Corpus size in MB (default: 4)')
+    parser.add_argument('--mix', default=None, help='Block mix (default: corpus.py default)')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--style', default='beach', help='Theme (default: beach)')
+    parser.add_argument('--files', type=int, default=2000,
+                        help='Files converted by the batch comparison (default: 2000)')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per measurement (default: 3)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else None
+    text = generate_corpus(int(args.size_mb * 1024 * 1024), mix, args.seed)
+    print(f"corpus: {len(text.encode('utf-8')):,} bytes")
+    print(f"{'mode':6} {'output MB':>10} {'utf-8':>8} {'cp437':>8} {'codec':>8} {'sauce':>8}  (MB/s of output)")
+    for max_mode in (False, True):
+        output = MarkdownToANSIConverter(args.style, max_mode=max_mode).convert(text)
+        encoded = encode_cp437(output)
+        mb = len(encoded) / 1024 / 1024
+        utf8 = best_of(args.runs, lambda: output.encode('utf-8'))
+        cp437 = best_of(args.runs, lambda: encode_cp437(output))
+        codec = best_of(args.runs, lambda: output.encode('cp437', 'replace'))
+        sauce = best_of(args.runs, lambda: count(encoded))
+        print(f"{'max' if max_mode else 'normal':6} {mb:10.1f} {mb / utf8:8.0f} {mb / cp437:8.0f} "
+              f"{mb / codec:8.0f} {mb / sauce:8.0f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory, 'src')
+        source.mkdir()
+        pages = generate_corpus(args.files * 4096, mix, args.seed).split('\n# ')
+        per_file = max(1, len(pages) // args.files)
+        for i in range(args.files):
+            body = '\n# '.join(pages[i * per_file:(i + 1) * per_file])
+            (source / f"page{i}.md").write_text(f"# {body}\n", encoding='utf-8')
+        pattern = os.path.join(directory, 'src', '*.md')
+        variants = [('utf-8', (), False), ('cp437', (('encoding', 'cp437'),), False),
+                    ('cp437 + sauce', (('encoding', 'cp437'),), True)]
+        best = {}
+        # Variants take turns, so file system noise spreads evenly over them
+        for _ in range(args.runs):
+            for label, options, sauce in variants:
+                jobs = find_jobs(pattern, os.path.join(directory, label), args.style, True, options)
+                start = time.perf_counter()
+                run_batch(jobs, workers=1, sauce=sauce)
+                seconds = time.perf_counter() - start
+                best[label] = min(best.get(label, seconds), seconds)
+        for label, seconds in best.items():
+            print(f"batch {label:14} {args.files / seconds:9,.0f} files/s "
+                  f"({args.files:,} files, one process)")
+
+
+if __name__ == '__main__':
+    main()
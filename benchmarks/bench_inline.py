@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass inline engine against the legacy six re.sub passes
+
+Scales examples/showcase.md up to the requested size (10 MB by default) and
+times inline formatting of every non-code line, in normal and max mode.
+
+Usage:
+    python benchmarks/bench_inline.py [--size-mb 10]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+
+
+def legacy_format_inline(text, palette):
+    """The original chained re.sub implementation, kept for comparison"""
+    strong, emphasis, code, link, close = palette
+    text = re.sub(r'\*\*([^*]+)\*\*', f'{strong}\\1{close}', text)
+    text = re.sub(r'__([^_]+)__', f'{strong}\\1{close}', text)
+    text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', f'{emphasis}\\1{close}', text)
+    text = re.sub(r'(?<!_)_([^_]+)_(?!_)', f'{emphasis}\\1{close}', text)
+    text = re.sub(r'`([^`]+)`', f'{code}\\1{close}', text)
+    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', f'{link}\\1{close}', text)
+    return text
+
+
+def build_lines(size_mb):
+    """Scale showcase.md up to roughly size_mb and return its non-code lines"""
+    text = (ROOT / 'examples' / 'showcase.md').read_text(encoding='utf-8')
+    copies = max(1, int(size_mb * 1024 * 1024 / len(text.encode('utf-8'))))
+    lines = []
+    in_code = False
+    for line in text.split('\n'):
+        if line.strip().startswith('```'):
+            in_code = not in_code
+            continue
+        if not in_code and line.strip():
+            lines.append(line)
+    return lines * copies
+
+
+def time_it(func, lines, palette):
+    start = time.perf_counter()
+    for line in lines:
+        func(line, palette)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=10.0,
+                        help='Size of the scaled corpus in MB (default: 10)')
+    args = parser.parse_args()
+
+    lines = build_lines(args.size_mb)
+    print(f"{len(lines)} inline lines (~{args.size_mb:g} MB of showcase.md)")
+
+    for max_mode in (False, True):
+        converter = MarkdownToANSIConverter('beach', max_mode=max_mode)
+        palette = converter.inline_palette
+        legacy = time_it(legacy_format_inline, lines, palette)
+        single = time_it(lambda line, _: converter._format_inline_elements(line), lines, palette)
+        mode = 'max' if max_mode else 'normal'
+        print(f"  {mode:6}  legacy {legacy * 1e9 / len(lines):7.0f} ns/line  "
+              f"single-pass {single * 1e9 / len(lines):7.0f} ns/line  "
+              f"speedup {legacy / single:4.2f}x")
+
+
+if __name__ == '__main__':
+    main()
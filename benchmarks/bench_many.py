@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark convert_many against one convert call per snippet
+
+Cuts a synthetic corpus (see corpus.py) into many short snippets of one to
+five lines, like chat or notification messages, and times converting them
+with a fresh converter per snippet, one shared converter, and convert_many
+(optionally on a pool). All outputs are checked to be identical.
+
+Usage:
+    python benchmarks/bench_many.py --snippets 200000
+    python benchmarks/bench_many.py --workers 4 --backend process
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.many import BACKENDS, convert_many  # noqa: E402
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+
+def make_snippets(count, mix, seed):
+    """Cut count snippets of 1-5 consecutive lines out of a generated corpus"""
+    lines = generate_corpus(4 * 1024 * 1024, mix, seed).split('\n')
+    rng = random.Random(seed)
+    snippets = []
+    for _ in range(count):
+        start = rng.randrange(len(lines) - 5)
+        snippets.append('\n'.join(lines[start:start + rng.randint(1, 5)]))
+    return snippets
+
+
+def timed(label, func, snippets):
+    """Run func once, print its rate and return its outputs"""
+    start = time.perf_counter()
+    outputs = func()
+    seconds = time.perf_counter() - start
+    print(f"  {label:24} {seconds:8.2f} s {len(snippets) / seconds:12,.0f} snippets/s")
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--snippets', type=int, default=100000,
+                        help='Number of snippets (default: 100000)')
+    parser.add_argument('--mix', help="Block mix, e.g. 'inline=4,lists=2,code=1,headers=1'")
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--style', default='beach', help='Theme (default: beach)')
+    parser.add_argument('--max', action='store_true', help='Render in max mode')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Also time convert_many on a pool of this many workers')
+    parser.add_argument('--backend', choices=BACKENDS, default='process',
+                        help='Pool backend for --workers (default: process)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else None
+    snippets = make_snippets(args.snippets, mix, args.seed)
+    print(f"{len(snippets):,} snippets, {sum(map(len, snippets)) / (1024 * 1024):.1f} MB, "
+          f"style={args.style}, mode={'max' if args.max else 'normal'}")
+
+    reference = timed('new converter each', lambda: [
+        MarkdownToANSIConverter(args.style, max_mode=args.max).convert(text) for text in snippets
+    ], snippets)
+    shared = MarkdownToANSIConverter(args.style, max_mode=args.max)
+    outputs = [timed('one shared converter', lambda: [shared.convert(text) for text in snippets], snippets)]
+    outputs.append(timed('convert_many', lambda: convert_many(snippets, args.style, args.max), snippets))
+    if args.workers:
+        outputs.append(timed(f"convert_many {args.backend} x{args.workers}", lambda: convert_many(
+            snippets, args.style, args.max, workers=args.workers, backend=args.backend), snippets))
+
+    if any(result != reference for result in outputs):
+        raise SystemExit('outputs differ from per-snippet convert')
+
+
+if __name__ == '__main__':
+    main()
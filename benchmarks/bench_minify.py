@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark the SGR minimizer: bytes saved and throughput per theme and mode
+
+Renders a synthetic corpus (see corpus.py) with every theme in normal and
+max mode, then minifies the output in one pass and in small streaming
+chunks. Reports the size before and after, the share saved and the
+minifier's throughput, and checks both passes give the same bytes.
+
+Usage:
+    python benchmarks/bench_minify.py --size-mb 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.minify import SGRMinifier, minify  # noqa: E402
+from md_ansi.styles import THEMES  # noqa: E402
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+
+def minify_chunked(text, chunk_size):
+    """Minify text fed in chunk_size pieces, as a stream would arrive"""
+    minifier = SGRMinifier()
+    out = [minifier.feed(text[start:start + chunk_size])
+           for start in range(0, len(text), chunk_size)]
+    out.append(minifier.finish())
+    return ''.join(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=2.0,
+                        help='Corpus size in MB (default: 2)')
+    parser.add_argument('--mix', help="Block mix, e.g. 'inline=4,lists=2,code=1,headers=1'")
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--chunk-size', type=int, default=4096,
+                        help='Characters per chunk for the streaming pass (default: 4096)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else None
+    text = generate_corpus(int(args.size_mb * 1024 * 1024), mix, args.seed)
+    print(f"{'style':10} {'mode':6} {'rendered':>12} {'minified':>12} {'saved':>7} "
+          f"{'MB/s':>7} {'stream MB/s':>12}")
+    for style_name in THEMES:
+        for max_mode in (False, True):
+            rendered = MarkdownToANSIConverter(style_name, max_mode=max_mode).convert(text)
+            size = len(rendered.encode('utf-8'))
+
+            start = time.perf_counter()
+            whole = minify(rendered)
+            seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            streamed = minify_chunked(rendered, args.chunk_size)
+            stream_seconds = time.perf_counter() - start
+            if streamed != whole:
+                raise SystemExit(f"{style_name}: streaming output differs from one-pass output")
+
+            minified = len(whole.encode('utf-8'))
+            megabytes = size / (1024 * 1024)
+            print(f"{style_name:10} {'max' if max_mode else 'normal':6} {size:>12,} {minified:>12,} "
+                  f"{(size - minified) * 100 / size:6.1f}% {megabytes / seconds:7.1f} "
+                  f"{megabytes / stream_seconds:12.1f}")
+
+
+if __name__ == '__main__':
+    main()
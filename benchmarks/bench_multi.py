@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark convert_multi: one parse and many paints vs. one convert() per variant
+
+Renders a synthetic corpus (see corpus.py) in every theme, normal and max
+mode, first with a separate convert() per variant and then with
+ir.convert_multi, checks the outputs are identical and reports the times.
+Also times parse alone and the plain-text and stripped backends.
+
+Usage:
+    python benchmarks/bench_multi.py --size-mb 2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.ir import convert_multi, paint_plain, paint_stripped, parse  # noqa: E402
+from md_ansi.styles import THEMES  # noqa: E402
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=2.0,
+                        help='Corpus size in MB (default: 2)')
+    parser.add_argument('--mix', help="Block mix, e.g. 'inline=4,lists=2,code=1,headers=1'")
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--styles', default=','.join(THEMES),
+                        help='Comma-separated themes (default: all)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else None
+    text = generate_corpus(int(args.size_mb * 1024 * 1024), mix, args.seed)
+    styles = args.styles.split(',')
+    modes = (False, True)
+
+    start = time.perf_counter()
+    separate = {(style, max_mode): MarkdownToANSIConverter(style, max_mode=max_mode).convert(text)
+                for style in styles for max_mode in modes}
+    separate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    multi = convert_multi(text, styles, modes)
+    multi_seconds = time.perf_counter() - start
+    if multi != separate:
+        raise SystemExit("convert_multi output differs from convert()")
+
+    start = time.perf_counter()
+    document = parse(text)
+    parse_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    paint_plain(document)
+    plain_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    paint_stripped(document, MarkdownToANSIConverter(styles[0]))
+    stripped_seconds = time.perf_counter() - start
+
+    variants = len(separate)
+    print(f"{variants} variants of {len(text.encode('utf-8')):,} bytes")
+    print(f"convert() per variant: {separate_seconds * 1e3:9.1f} ms")
+    print(f"convert_multi:         {multi_seconds * 1e3:9.1f} ms "
+          f"({separate_seconds / multi_seconds:.2f}x)")
+    print(f"  parse once:          {parse_seconds * 1e3:9.1f} ms")
+    print(f"  paint per variant:   {(multi_seconds - parse_seconds) / variants * 1e3:9.1f} ms")
+    print(f"plain backend:         {plain_seconds * 1e3:9.1f} ms")
+    print(f"stripped backend:      {stripped_seconds * 1e3:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
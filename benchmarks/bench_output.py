@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark output paths on large inputs: whole string vs. buffered sink vs. mmap + sink
+
+Writes a synthetic corpus of the requested size to a temporary file, then
+converts it once per method in a fresh child process and reports wall time,
+MB/sec and the child's peak resident memory (ru_maxrss):
+
+    string  read_text, convert() to one string, write it out (the old CLI path)
+    sink    read_text, convert_to() a binary file through BufferedSink
+    mmap    iter_mmap_lines, convert_to() a binary file through BufferedSink
+
+Usage:
+    python benchmarks/bench_output.py --size-mb 1024
+    python benchmarks/bench_output.py --size-mb 64 --methods sink,mmap --max
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+METHODS = ('string', 'sink', 'mmap')
+
+# The corpus is generated and written in pieces of this size
+PIECE_BYTES = 8 * 1024 * 1024
+
+
+def write_corpus(path, size_bytes, mix, seed):
+    """Write about size_bytes of synthetic markdown to path"""
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < size_bytes:
+            piece = generate_corpus(min(PIECE_BYTES, size_bytes - written), mix, seed)
+            f.write(piece)
+            written += len(piece.encode('utf-8'))
+            seed += 1
+    return written
+
+
+def run_child(method, source, destination, style, max_mode):
+    """Convert source to destination in this process with one method"""
+    from md_ansi.converter import MarkdownToANSIConverter
+    converter = MarkdownToANSIConverter(style, max_mode=max_mode)
+
+    if method == 'string':
+        text = Path(source).read_text(encoding='utf-8')
+        result = converter.convert(text)
+        with open(destination, 'w', encoding='utf-8') as out:
+            out.write(result)
+    elif method == 'sink':
+        text = Path(source).read_text(encoding='utf-8')
+        with open(destination, 'wb') as out:
+            converter.convert_to(text, out)
+    else:
+        from md_ansi.largefile import iter_mmap_lines
+        with open(destination, 'wb') as out:
+            converter.convert_to(iter_mmap_lines(source), out)
+
+
+def measure(method, source, destination, style, max_mode):
+    """Run one method in a child process; return (seconds, peak RSS in MB)"""
+    command = [sys.executable, __file__, '--child', method, '--source', source,
+               '--destination', destination, '--style', style]
+    if max_mode:
+        command.append('--max')
+    start = time.perf_counter()
+    child = subprocess.Popen(command)
+    _, status, usage = os.wait4(child.pid, 0)
+    seconds = time.perf_counter() - start
+    child.returncode = os.waitstatus_to_exitcode(status)
+    if child.returncode:
+        raise SystemExit(f"{method} failed with exit code {child.returncode}")
+    # ru_maxrss is in kilobytes on Linux
+    return seconds, usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=256.0,
+                        help='Corpus size in MB (default: 256; try 1024 for 1 GB)')
+    parser.add_argument('--mix', help="Block mix, e.g. 'inline=4,lists=2,code=1,headers=1'")
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--style', default='beach', help='Theme (default: beach)')
+    parser.add_argument('--max', action='store_true', help='Render in max mode')
+    parser.add_argument('--methods', default=','.join(METHODS),
+                        help=f"Comma-separated methods (default: {','.join(METHODS)})")
+    parser.add_argument('--destination', default=os.devnull,
+                        help='Where output is written (default: the null device)')
+    parser.add_argument('--child', choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument('--source', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.source, args.destination, args.style, args.max)
+        return
+
+    mix = parse_mix(args.mix) if args.mix else None
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, 'corpus.md')
+        size = write_corpus(source, int(args.size_mb * 1024 * 1024), mix, args.seed)
+        size_mb = size / (1024 * 1024)
+        print(f"corpus: {size_mb:.1f} MB, style={args.style}, "
+              f"mode={'max' if args.max else 'normal'}, output={args.destination}")
+        for method in args.methods.split(','):
+            seconds, peak_mb = measure(method, source, args.destination, args.style, args.max)
+            print(f"  {method:8} {seconds:8.2f} s {size_mb / seconds:8.2f} MB/s "
+                  f"{peak_mb:9.1f} MB peak RSS")
+
+
+if __name__ == '__main__':
+    main()
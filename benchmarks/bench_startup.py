@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+CLI startup benchmark based on python -X importtime
+
+Runs the CLI in fresh interpreters and reports the median cumulative import
+time of md_ansi.cli, the slowest imports, and wall-clock time for
+--list-styles against a bare interpreter. Fails when the import time is
+over the target, or when --list-styles loads the converter or fonts.
+
+Target: importing md_ansi.cli takes at most 30 ms cumulative (most of it
+argparse), and --list-styles imports neither md_ansi.converter nor
+md_ansi.fonts.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 15] [--target-ms 30]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Modules that must stay out of the --list-styles path
+LAZY_MODULES = ('md_ansi.converter', 'md_ansi.fonts', 'md_ansi.batch',
+                'md_ansi.cache', 'md_ansi.server', 'pathlib')
+
+
+def importtime(args):
+    """Run python -X importtime with args; return {module: cumulative us}"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + args, env=env, cwd=str(ROOT),
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          universal_newlines=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative_us)
+    return times
+
+
+def wall_time(args, runs):
+    """Median wall-clock seconds for running python with args"""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, env=env, cwd=str(ROOT),
+                       stdout=subprocess.DEVNULL, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--runs', type=int, default=15, help='Interpreter runs (default: 15)')
+    parser.add_argument('--target-ms', type=float, default=30.0,
+                        help='Allowed cumulative import time of md_ansi.cli (default: 30)')
+    args = parser.parse_args()
+
+    # Prime bytecode caches so the first run isn't compiling
+    importtime(['-c', 'import md_ansi.cli'])
+
+    samples = [importtime(['-c', 'import md_ansi.cli']) for _ in range(args.runs)]
+    cli_ms = statistics.median(sample['md_ansi.cli'] for sample in samples) / 1000
+    slowest = sorted(samples[-1].items(), key=lambda item: -item[1])[:8]
+
+    print(f"import md_ansi.cli: {cli_ms:.1f} ms cumulative (median of {args.runs}, target {args.target_ms:g} ms)")
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+    bare = wall_time(['-c', 'pass'], args.runs)
+    list_styles = wall_time(['-m', 'md_ansi.cli', '--list-styles'], args.runs)
+    print(f"wall: python -c pass {bare * 1000:.1f} ms, md-ansi --list-styles {list_styles * 1000:.1f} ms "
+          f"(+{(list_styles - bare) * 1000:.1f} ms)")
+
+    failures = []
+    if cli_ms > args.target_ms:
+        failures.append(f"md_ansi.cli import {cli_ms:.1f} ms exceeds {args.target_ms:g} ms")
+    loaded = importtime(['-m', 'md_ansi.cli', '--list-styles'])
+    for name in LAZY_MODULES:
+        if name in loaded:
+            failures.append(f"--list-styles imports {name}")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
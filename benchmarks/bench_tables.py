@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark table rendering: throughput on table-heavy text and streaming a huge table
+
+Renders a synthetic corpus of tables (see corpus.py) with convert and
+convert_stream in normal and max mode, with and without --width, and
+checks both give the same bytes. Then streams one table of --rows rows
+and reports the time to the first rendered row, the total time and the
+peak memory traced while streaming, which stays bounded by the
+TABLE_SAMPLE_ROWS rows held to size the columns.
+
+Usage:
+    python benchmarks/bench_tables.py --size-mb 4 --rows 1000000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.tables import TABLE_SAMPLE_ROWS  # noqa: E402
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+
+def table_lines(rows):
+    """A four-column table of rows rows, generated lazily"""
+    yield '| Id | Name | Status | Amount |\n'
+    yield '| ---: | :--- | :---: | ---: |\n'
+    for i in range(rows):
+        yield f"| {i} | **user{i % 977}** | `{'ok' if i % 3 else 'late'}` | {i * 37 % 100000} |\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=2.0,
+                        help='Corpus size in MB (default: 2)')
+    parser.add_argument('--mix', default='tables=4,inline=1',
+                        help="Block mix (default: 'tables=4,inline=1')")
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--style', default='beach', help='Theme (default: beach)')
+    parser.add_argument('--rows', type=int, default=200000,
+                        help='Rows of the streamed table (default: 200000)')
+    args = parser.parse_args()
+
+    text = generate_corpus(int(args.size_mb * 1024 * 1024), parse_mix(args.mix), args.seed)
+    size = len(text.encode('utf-8'))
+    lines = text.split('\n')
+    print(f"corpus: {size:,} bytes, {len(lines):,} lines")
+    print(f"{'mode':6} {'width':>6} {'convert MB/s':>13} {'stream MB/s':>12}")
+    for max_mode in (False, True):
+        for width in (None, 80):
+            converter = MarkdownToANSIConverter(args.style, max_mode=max_mode, width=width)
+            start = time.perf_counter()
+            whole = converter.convert(text)
+            convert_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            streamed = '\n'.join(converter.convert_stream(lines)) + converter.reset
+            stream_seconds = time.perf_counter() - start
+            if streamed != whole:
+                raise SystemExit(f"convert_stream differs from convert (max={max_mode}, width={width})")
+            mb = size / 1024 / 1024
+            print(f"{'max' if max_mode else 'normal':6} {width or '-':>6} "
+                  f"{mb / convert_seconds:13.1f} {mb / stream_seconds:12.1f}")
+
+    converter = MarkdownToANSIConverter(args.style)
+    start = time.perf_counter()
+    chunks = converter.convert_stream(table_lines(args.rows))
+    next(chunks)
+    next(chunks)
+    first_row = time.perf_counter() - start
+    count = 2 + sum(1 for _ in chunks)
+    total = time.perf_counter() - start
+    if count != args.rows + 2:
+        raise SystemExit(f"expected {args.rows + 2} chunks, got {count}")
+
+    # Memory is traced in a second pass, since tracing slows rendering down
+    tracemalloc.start()
+    for _ in converter.convert_stream(table_lines(args.rows)):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"streamed table: {args.rows:,} rows, first row after {first_row * 1e3:.1f} ms "
+          f"({TABLE_SAMPLE_ROWS} rows sampled), {args.rows / total:,.0f} rows/s, "
+          f"peak traced memory {peak / 1024 / 1024:.1f} MB")
+
+if __name__ == '__main__':
+    main()
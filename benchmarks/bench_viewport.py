@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Benchmark viewport rendering: index build and reopen time, index size, slice latency
+
+Writes a synthetic corpus (see corpus.py) to a temporary file, builds its
+line index, reopens it from the saved index file, then renders random
+screen-sized slices with render_range. Compares the first screen's latency
+with a full convert() and checks every slice against the full render.
+
+Usage:
+    python benchmarks/bench_viewport.py --size-mb 64
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.viewport import IndexedDocument, index_path  # noqa: E402
+from corpus import generate_corpus, parse_mix  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--size-mb', type=float, default=16.0,
+                        help='Corpus size in MB (default: 16)')
+    parser.add_argument('--mix', help="Block mix, e.g. 'inline=4,lists=2,code=1,headers=1'")
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed (default: 0)')
+    parser.add_argument('--style', default='beach', help='Theme (default: beach)')
+    parser.add_argument('--max', action='store_true', help='Render in max mode')
+    parser.add_argument('--screen', type=int, default=50, help='Lines per slice (default: 50)')
+    parser.add_argument('--slices', type=int, default=1000,
+                        help='Random slices to render (default: 1000)')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else None
+    text = generate_corpus(int(args.size_mb * 1024 * 1024), mix, args.seed)
+    converter = MarkdownToANSIConverter(args.style, max_mode=args.max)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'corpus.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+        start = time.perf_counter()
+        IndexedDocument(path, converter=converter).close()
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        document = IndexedDocument(path, converter=converter)
+        reopen = time.perf_counter() - start
+        index_size = os.path.getsize(index_path(path))
+
+        start = time.perf_counter()
+        document.render_range(0, args.screen)
+        first_screen = time.perf_counter() - start
+        start = time.perf_counter()
+        expected = converter.convert(text)
+        full = time.perf_counter() - start
+
+        rng = random.Random(args.seed)
+        starts = [rng.randrange(document.line_count) for _ in range(args.slices)]
+        start = time.perf_counter()
+        for line in starts:
+            document.render_range(line, line + args.screen)
+        per_slice = (time.perf_counter() - start) / args.slices
+
+        rendered = expected[:-len(converter.reset)].split('\n')
+        lines = list(converter.convert_stream(text.split('\n')))
+        if '\n'.join(lines).split('\n') != rendered:
+            raise SystemExit("convert_stream differs from convert")
+        for line in starts[:100]:
+            if document.render_range(line, line + args.screen) != lines[line:line + args.screen]:
+                raise SystemExit(f"slice at line {line} differs from the full render")
+        document.close()
+
+    size = len(text.encode('utf-8'))
+    print(f"corpus:        {size:,} bytes, {document.line_count:,} lines")
+    print(f"index build:   {build * 1e3:9.1f} ms ({size / build / 1024 / 1024:.0f} MB/s)")
+    print(f"index reopen:  {reopen * 1e3:9.2f} ms")
+    print(f"index size:    {index_size:,} bytes ({index_size * 100 / size:.1f}% of the file)")
+    print(f"first screen:  {first_screen * 1e3:9.2f} ms (full convert: {full * 1e3:.0f} ms)")
+    print(f"random slice:  {per_slice * 1e3:9.2f} ms per {args.screen} lines")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Benchmark watch mode: tree indexing, idle poll cost and change-to-output latency
+
+Writes --files small markdown files into a temporary tree (--per-dir files
+per directory), indexes it, then measures an idle poll (every directory,
+plus the rotating share of files a poll sweeps) against stat-ing every
+file. Finally runs a TreeWatcher with the default poll, sweep and debounce
+settings and reports how long edits take to reach the output directory:
+in-place writes to files not changed lately (found by the sweep) and to a
+file changed moments before (checked every poll), and saves by rename.
+
+Usage:
+    python benchmarks/bench_watch.py --files 50000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.batch import init_worker  # noqa: E402
+from md_ansi.watch import RACY_NS, TreeIndex, TreeWatcher, sweep_size  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--files', type=int, default=50000, help='Files in the tree (default: 50000)')
+    parser.add_argument('--per-dir', type=int, default=100,
+                        help='Files per directory (default: 100)')
+    parser.add_argument('--polls', type=int, default=20, help='Idle polls to time (default: 20)')
+    parser.add_argument('--edits', type=int, default=10,
+                        help='Edits of each kind to time (default: 10)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        root = os.path.join(directory, 'docs')
+        sources = []
+        for i in range(args.files):
+            folder = os.path.join(root, f"section{i // args.per_dir // 50}", f"part{i // args.per_dir}")
+            if i % args.per_dir == 0:
+                os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"page{i}.md")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(f"# Page {i}\n\nSome **text** for page {i}.\n")
+            sources.append(path)
+        # Files written moments ago have their content compared on every
+        # poll until their mtime is RACY_NS old; wait that out so idle polls
+        # are measured as they run on a settled tree
+        time.sleep(RACY_NS / 1e9)
+
+        start = time.perf_counter()
+        index = TreeIndex(root)
+        build = time.perf_counter() - start
+
+        sweep = sweep_size(len(index.files))
+        idle = []
+        for _ in range(args.polls):
+            start = time.perf_counter()
+            index.poll(time.monotonic(), sweep)
+            idle.append(time.perf_counter() - start)
+        full = []
+        for _ in range(args.polls):
+            start = time.perf_counter()
+            for path in index.files:
+                os.stat(path)
+            full.append(time.perf_counter() - start)
+
+        out_dir = os.path.join(directory, 'ansi')
+        watcher = TreeWatcher(root, out_dir, report=lambda message: None)
+        watcher.index = index
+        init_worker()
+        stop = threading.Event()
+        thread = threading.Thread(target=watcher.run, args=(stop,))
+        thread.start()
+
+        latencies = {'cold in place': [], 'hot in place': [], 'rename': []}
+        for n in range(-1, args.edits):
+            for kind in latencies:
+                if kind == 'hot in place':
+                    source = sources[0]
+                else:
+                    source = sources[(n * 7919 + len(latencies[kind]) * 104729) % len(sources)]
+                destination = watcher.job(source)[1]
+                marker = f"edit {kind} {n}"
+                start = time.perf_counter()
+                if kind != 'rename':
+                    with open(source, 'a', encoding='utf-8') as f:
+                        f.write(f"\n{marker}\n")
+                else:
+                    temp = source + '.tmp'
+                    with open(temp, 'w', encoding='utf-8') as f:
+                        f.write(f"# Renamed\n\n{marker}\n")
+                    os.replace(temp, source)
+                while not (os.path.exists(destination)
+                           and marker in Path(destination).read_text(encoding='utf-8')):
+                    time.sleep(0.002)
+                # The first round only makes sources[0] hot
+                if n >= 0:
+                    latencies[kind].append(time.perf_counter() - start)
+                time.sleep(0.2)
+        stop.set()
+        thread.join()
+
+    print(f"tree:          {len(index.files):,} files in {len(index.dirs):,} directories")
+    print(f"index build:   {build * 1e3:9.1f} ms")
+    print(f"idle poll:     {statistics.median(idle) * 1e3:9.2f} ms "
+          f"({len(index.dirs):,} directories + {sweep:,} files swept)")
+    print(f"stat all:      {statistics.median(full) * 1e3:9.2f} ms")
+    for kind, values in latencies.items():
+        print(f"{kind + ':':14} {statistics.median(values) * 1e3:9.0f} ms median, "
+              f"{max(values) * 1e3:.0f} ms max to the rebuilt output")
+
+
+if __name__ == '__main__':
+    main()
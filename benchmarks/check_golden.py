@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Golden-output check: rendered bytes must match the files in benchmarks/golden
+
+Every input (examples/*.md and the golden/*.md edge cases) is rendered with
+every theme in normal and max mode and compared byte for byte with the saved
+output, so speedups cannot silently change rendering. The edge cases are
+also rendered with each option variant below (beach theme only). Every case
+is also streamed from the open file with convert_stream, which must give the
+same bytes. After an intentional rendering change, regenerate the files with
+--update and review the diff.
+
+Usage:
+    python benchmarks/check_golden.py [--update]
+
+tests/test_golden.py runs the same check under pytest.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+GOLDEN = Path(__file__).resolve().parent / 'golden'
+sys.path.insert(0, str(ROOT))
+
+from md_ansi.converter import MarkdownToANSIConverter  # noqa: E402
+from md_ansi.styles import THEMES  # noqa: E402
+
+
+# Extra converter options checked on the edge cases: name -> keyword arguments
+VARIANTS = {
+    'highlight': {'highlight': True},
+    'width40': {'width': 40},
+    'minify': {'minify': True},
+    '256': {'color_depth': '256'},
+    'truecolor': {'color_depth': 'truecolor'},
+}
+
+
+# Edge case inputs in golden/, also rendered with every variant
+EDGE_CASES = ('edge_cases', 'unclosed_fence')
+
+
+def inputs():
+    """All golden inputs as (name, path) pairs"""
+    paths = sorted((ROOT / 'examples').glob('*.md')) + [GOLDEN / f"{name}.md" for name in EDGE_CASES]
+    return [(path.stem, path) for path in paths]
+
+
+def streamed(converter, path) -> str:
+    """Render a file line by line with convert_stream, as --stream does"""
+    with path.open(encoding='utf-8') as f:
+        return '\n'.join(converter.convert_stream(f)) + converter.reset
+
+
+def first_difference(expected: bytes, actual: bytes) -> str:
+    """Describe the first differing line"""
+    expected_lines = expected.split(b'\n')
+    actual_lines = actual.split(b'\n')
+    for number, (old, new) in enumerate(zip(expected_lines, actual_lines), 1):
+        if old != new:
+            return f"line {number}: expected {old!r}, got {new!r}"
+    return f"line count {len(expected_lines)} -> {len(actual_lines)}"
+
+
+def cases():
+    """Every golden case as (name, input path, style name, max mode, converter options)"""
+    found = []
+    for name, path in inputs():
+        for style_name in THEMES:
+            for max_mode in (False, True):
+                found.append((f"{name}-{style_name}-{'max' if max_mode else 'normal'}",
+                              path, style_name, max_mode, {}))
+    for name in EDGE_CASES:
+        for variant, options in VARIANTS.items():
+            for max_mode in (False, True):
+                found.append((f"{name}-beach-{'max' if max_mode else 'normal'}-{variant}",
+                              GOLDEN / f"{name}.md", 'beach', max_mode, options))
+    return found
+
+
+def check(case, update: bool = False) -> List[str]:
+    """Render one case (and stream it) and describe how it differs from its golden file
+
+    With update, the golden file is rewritten from the rendered output instead.
+    """
+    name, path, style_name, max_mode, options = case
+    text = path.read_text(encoding='utf-8')
+    converter = MarkdownToANSIConverter(style_name, max_mode=max_mode, **options)
+    actual = converter.convert(text).encode('utf-8')
+    golden = GOLDEN / f"{name}.ans"
+    failures = []
+    if update:
+        golden.write_bytes(actual)
+    elif not golden.exists():
+        failures.append(f"{golden.name}: missing (run with --update)")
+    elif golden.read_bytes() != actual:
+        failures.append(f"{golden.name}: {first_difference(golden.read_bytes(), actual)}")
+    stream = streamed(converter, path).encode('utf-8')
+    if stream != actual:
+        failures.append(f"{golden.name} (streamed): {first_difference(actual, stream)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--update', action='store_true',
+                        help='Rewrite the golden files from the current output')
+    args = parser.parse_args()
+
+    checked = 0
+    failures = []
+    for case in cases():
+        failures.extend(check(case, args.update))
+        checked += 1
+
+    if args.update:
+        print(f"updated {checked} golden files in {GOLDEN}")
+        return
+    if failures:
+        print(f"{len(failures)} of {checked} outputs differ from golden files:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+    print(f"all {checked} outputs match golden files")
+
+if __name__ == '__main__':
+    main()
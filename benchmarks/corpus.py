@@ -0,0 +1,111 @@
+"""
+Synthetic markdown corpora with a tunable size and mix of block types
+"""
+
+import random
+from typing import Dict, Optional
+
+
+# Relative weights of each block kind in the default mix (tables only when asked for)
+DEFAULT_MIX = {
+    'inline': 4,
+    'lists': 2,
+    'code': 2,
+    'headers': 1,
+    'quotes': 1,
+    'rules': 0.2,
+    'tables': 0,
+}
+
+WORDS = (
+    'ansi', 'bbs', 'modem', 'sysop', 'door', 'baud', 'terminal', 'escape',
+    'color', 'render', 'markdown', 'stream', 'buffer', 'glyph', 'theme',
+    'pipeline', 'cache', 'header', 'vapor', 'cyber', 'dial-up', 'handle',
+)
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def _inline_sentence(rng: random.Random) -> str:
+    """A sentence with a dense mix of inline markup"""
+    parts = []
+    for _ in range(rng.randint(4, 9)):
+        kind = rng.randrange(6)
+        text = _words(rng, rng.randint(1, 3))
+        if kind == 0:
+            parts.append(f"**{text}**")
+        elif kind == 1:
+            parts.append(f"*{text}*")
+        elif kind == 2:
+            parts.append(f"`{text}`")
+        elif kind == 3:
+            parts.append(f"[{text}](https://example.com/{rng.choice(WORDS)})")
+        else:
+            parts.append(text)
+    return ' '.join(parts) + '.'
+
+
+def _block(kind: str, rng: random.Random) -> str:
+    if kind == 'inline':
+        return '\n'.join(_inline_sentence(rng) for _ in range(rng.randint(1, 4)))
+    if kind == 'lists':
+        lines = []
+        depth = 0
+        for i in range(rng.randint(3, 12)):
+            depth = max(0, min(5, depth + rng.choice((-1, 0, 0, 1))))
+            marker = f"{i + 1}." if rng.random() < 0.3 else rng.choice('-*+')
+            lines.append(f"{'  ' * depth}{marker} {_inline_sentence(rng)}")
+        return '\n'.join(lines)
+    if kind == 'code':
+        lang = rng.choice(('python', 'bash', 'json', ''))
+        body = [f"    {_words(rng, rng.randint(2, 10))}" for _ in range(rng.randint(5, 60))]
+        return '\n'.join([f"```{lang}"] + body + ['```'])
+    if kind == 'headers':
+        level = rng.choice((1, 2, 2, 3, 3, 3, 4, 5, 6))
+        return f"{'#' * level} {_words(rng, rng.randint(1, 4)).title()}"
+    if kind == 'quotes':
+        return '\n'.join(f"> {_inline_sentence(rng)}" for _ in range(rng.randint(1, 4)))
+    if kind == 'rules':
+        return rng.choice(('---', '***', '-----'))
+    if kind == 'tables':
+        columns = rng.randint(2, 6)
+        header = ' | '.join(_words(rng, rng.randint(1, 2)).title() for _ in range(columns))
+        delimiter = ' | '.join(rng.choice(('---', ':---', ':---:', '---:')) for _ in range(columns))
+        rows = [' | '.join(rng.choice((_words(rng, rng.randint(1, 4)), f"**{_words(rng, 1)}**",
+                                       f"`{_words(rng, 1)}`", str(rng.randint(0, 99999))))
+                           for _ in range(columns))
+                for _ in range(rng.randint(2, 30))]
+        return '\n'.join([f"| {header} |", f"| {delimiter} |"] + [f"| {row} |" for row in rows])
+    raise ValueError(f"unknown block kind: {kind}")
+
+
+def generate_corpus(size_bytes: int, mix: Optional[Dict[str, float]] = None, seed: int = 0) -> str:
+    """Generate about size_bytes of markdown with blocks drawn from mix
+
+    The same size, mix and seed always produce the same text.
+    """
+    mix = dict(DEFAULT_MIX if mix is None else mix)
+    kinds = [kind for kind, weight in mix.items() if weight > 0]
+    weights = [mix[kind] for kind in kinds]
+    rng = random.Random(seed)
+    blocks = []
+    size = 0
+    while size < size_bytes:
+        block = _block(rng.choices(kinds, weights)[0], rng)
+        blocks.append(block)
+        size += len(block.encode('utf-8')) + 2
+    return '\n\n'.join(blocks) + '\n'
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """Parse a mix like 'inline=4,code=1' into weights"""
+    mix = {}
+    for item in spec.split(','):
+        kind, _, weight = item.partition('=')
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise ValueError(f"unknown block kind: {kind}")
+        mix[kind] = float(weight) if weight else 1.0
+    return mix
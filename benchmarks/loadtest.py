@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load test for md-ansi serve
+
+Opens several concurrent connections, sends render requests as fast as the
+server answers them, and reports throughput and latency percentiles along
+with the server's own metrics.
+
+Usage:
+    md-ansi serve --port 7777 &
+    python benchmarks/loadtest.py --port 7777 --connections 16 --requests 5000
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+async def worker(open_connection, payloads, count, latencies, errors):
+    """Send count requests over one connection, one at a time"""
+    reader, writer = await open_connection()
+    try:
+        for i in range(count):
+            payload = payloads[i % len(payloads)]
+            start = time.perf_counter()
+            writer.write(payload)
+            await writer.drain()
+            line = await reader.readline()
+            latencies.append(time.perf_counter() - start)
+            if not line or b'"error"' in line:
+                errors.append(line)
+    finally:
+        writer.close()
+
+
+async def run(args):
+    if args.unix:
+        def open_connection():
+            return asyncio.open_unix_connection(args.unix, limit=2 ** 26)
+    else:
+        def open_connection():
+            return asyncio.open_connection(args.host, args.port, limit=2 ** 26)
+
+    text = (ROOT / 'examples' / 'showcase.md').read_text(encoding='utf-8') * args.scale
+    styles = args.styles.split(',')
+    payloads = [
+        json.dumps({'text': text, 'style': style, 'max': max_mode}).encode('utf-8') + b'\n'
+        for style in styles for max_mode in (False, True)
+    ]
+
+    latencies, errors = [], []
+    per_connection = args.requests // args.connections
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(open_connection, payloads, per_connection, latencies, errors)
+        for _ in range(args.connections)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s), {len(errors)} errors")
+    print(f"client latency ms: p50 {percentile(0.5):.2f}  p90 {percentile(0.9):.2f}  "
+          f"p99 {percentile(0.99):.2f}  max {latencies[-1] * 1000:.2f}")
+
+    reader, writer = await open_connection()
+    writer.write(b'{"op": "metrics"}\n')
+    await writer.drain()
+    print(f"server metrics: {json.loads(await reader.readline())['metrics']}")
+    writer.close()
+    return 1 if errors else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7777)
+    parser.add_argument('--unix', metavar='PATH', help='Connect to a Unix socket instead of TCP')
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=2000, help='Total requests')
+    parser.add_argument('--scale', type=int, default=1,
+                        help='Copies of showcase.md per request (default: 1)')
+    parser.add_argument('--styles', default='beach,vaporwave,codc')
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == '__main__':
+    main()
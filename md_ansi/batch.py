@@ -0,0 +1,161 @@
+"""
+Parallel batch conversion of many markdown files
+"""
+
+import datetime
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from .cache import ConversionCache, cache_key
+from .converter import MarkdownToANSIConverter, decode_markdown
+from .output import encode_text
+from .styles import StyleTheme, get_theme
+
+
+# Per-process converters, reused for every file a worker handles, with the
+# theme each was built from
+_converters: Dict[Tuple[str, bool, Tuple], Tuple[StyleTheme, MarkdownToANSIConverter]] = {}
+
+# Per-process conversion cache, opened by init_worker (None when disabled)
+_cache = None
+
+# Whether outputs get a SAUCE record (see cp437.py), set by init_worker
+_sauce = False
+
+# A job is (source path, destination path, style name, max mode, options), where
+# options are extra converter keyword arguments as sorted (name, value) pairs
+Job = Tuple[str, str, str, bool, Tuple]
+
+
+def get_converter(style_name: str, max_mode: bool, options: Tuple = ()) -> MarkdownToANSIConverter:
+    """Get this process's converter for a style and options, creating it on first use
+
+    A converter is built again once its theme has been replaced (see
+    ThemeRegistry.register).
+    """
+    key = (style_name, max_mode, options)
+    theme = get_theme(style_name)
+    cached = _converters.get(key)
+    if cached is not None and cached[0] is theme:
+        return cached[1]
+    converter = MarkdownToANSIConverter(style_name, max_mode=max_mode, **dict(options))
+    _converters[key] = (theme, converter)
+    return converter
+
+
+def init_worker(cache_dir=None, cache_max_bytes: Optional[int] = None,
+                sauce: bool = False) -> None:
+    """Open this process's conversion cache; cache_max_bytes None disables it
+
+    With sauce, every output ends with a SAUCE record titled after its source.
+    """
+    global _cache, _sauce
+    _sauce = sauce
+    if cache_max_bytes is None:
+        _cache = None
+        return
+    _cache = ConversionCache(cache_dir, cache_max_bytes)
+
+
+def glob_base(pattern: str) -> Path:
+    """Get the directory part of a glob pattern before the first wildcard"""
+    parts = []
+    for part in Path(pattern).parts[:-1]:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return Path(*parts) if parts else Path('.')
+
+
+def find_jobs(pattern: str, out_dir: str, style_name: str, max_mode: bool,
+              options: Tuple = ()) -> List[Job]:
+    """Expand a glob into jobs whose outputs mirror the source tree under out_dir"""
+    base = glob_base(pattern)
+    out = Path(out_dir)
+    jobs = []
+    for source in sorted(glob.glob(pattern, recursive=True)):
+        path = Path(source)
+        if not path.is_file():
+            continue
+        try:
+            relative = path.relative_to(base)
+        except ValueError:
+            relative = Path(path.name)
+        jobs.append((source, str((out / relative).with_suffix('.ans')), style_name, max_mode, options))
+    return jobs
+
+
+def convert_file(job: Job) -> Tuple[str, str, Optional[str]]:
+    """Convert one file, returning (source, destination, error message or None)"""
+    source, destination, style_name, max_mode, options = job
+    try:
+        path = Path(source)
+        data = path.read_bytes()
+        output = None
+        if _cache is not None:
+            key = cache_key(data, style_name, max_mode, options)
+            output = _cache.get(key)
+        if output is None:
+            converter = get_converter(style_name, max_mode, options)
+            output = encode_text(converter.convert(decode_markdown(data)), converter.encoding)
+            if _cache is not None:
+                _cache.put(key, output)
+        if _sauce:
+            from .cp437 import SauceCounter
+            counter = SauceCounter()
+            counter.write(output)
+            # Dated by the source, so unchanged inputs give identical outputs
+            date = datetime.date.fromtimestamp(path.stat().st_mtime)
+            output += counter.record(path.stem, date)
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        Path(destination).write_bytes(output)
+    except Exception as e:
+        return source, destination, str(e) or type(e).__name__
+    return source, destination, None
+
+
+def run_batch(jobs: List[Job], workers: Optional[int] = None,
+              on_error: Optional[Callable[[str, str], None]] = None,
+              cache_dir=None, cache_max_bytes: Optional[int] = None,
+              sauce: bool = False) -> Tuple[int, int]:
+    """Convert all jobs across a process pool, returning (converted, failed) counts
+
+    A failing file is reported through on_error(source, message) and does not
+    stop the run. With workers == 1 everything runs in this process. Unchanged
+    inputs are copied from the conversion cache unless cache_max_bytes is None.
+    With sauce, outputs end with a SAUCE record.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(jobs) <= 1:
+        init_worker(cache_dir, cache_max_bytes, sauce)
+        results = map(convert_file, jobs)
+        return _collect(results, on_error)
+
+    # Batch small files together so per-task IPC doesn't dominate
+    chunksize = max(1, min(64, len(jobs) // (workers * 8)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(cache_dir, cache_max_bytes, sauce)) as executor:
+        return _collect(executor.map(convert_file, jobs, chunksize=chunksize), on_error)
+
+
+def _collect(results, on_error) -> Tuple[int, int]:
+    """Tally results, reporting failures as they arrive"""
+    converted = failed = 0
+    for source, _, error in results:
+        if error is None:
+            converted += 1
+        else:
+            failed += 1
+            if on_error is not None:
+                on_error(source, error)
+    return converted, failed
+
+
+def report_error(source: str, message: str) -> None:
+    """Default failure reporter for the CLI"""
+    print(f"Error: {source}: {message}", file=sys.stderr)
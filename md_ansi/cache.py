@@ -0,0 +1,180 @@
+"""
+On-disk conversion cache keyed on input content, style, mode, options and version
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+from . import __version__
+
+
+# Bump whenever the same input and options render differently, so entries
+# written by older code are never served
+RENDER_REVISION = 4
+
+# Default size cap for cached output (bytes)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# When over the cap, evict least recently used entries down to this fraction
+EVICT_TO = 0.9
+
+# Outputs bigger than this fraction of the cap are not stored, so one huge
+# output cannot evict most of the cache
+MAX_ENTRY_FRACTION = 0.05
+
+# Bytes read at a time when a cached output is streamed out
+READ_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    output BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('total_size', 0);
+"""
+
+
+def default_cache_dir() -> Path:
+    """Cache location: $MD_ANSI_CACHE_DIR, else $XDG_CACHE_HOME/md-ansi, else ~/.cache/md-ansi"""
+    path = os.environ.get('MD_ANSI_CACHE_DIR')
+    if path:
+        return Path(path)
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'md-ansi'
+
+
+def cache_key(data: bytes, style_name: str, max_mode: bool, options: Tuple = ()) -> str:
+    """Hash the input bytes together with everything that affects the output
+
+    options are the extra converter keyword arguments as sorted (name, value) pairs.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{__version__}\0{RENDER_REVISION}\0{style_name}\0{int(bool(max_mode))}\0"
+                  f"{options!r}\0".encode('utf-8'))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """sqlite-backed store of rendered output with a size cap and LRU eviction
+
+    Safe to share between processes; each process should open its own
+    instance.
+    """
+
+    def __init__(self, directory=None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = int(max_bytes * MAX_ENTRY_FRACTION)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.directory / 'cache.sqlite3'),
+                                   timeout=30, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get cached output for a key, marking it as recently used"""
+        row = self._db.execute('SELECT output FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        self._db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+        return row[0]
+
+    def get_chunks(self, key: str, chunk_size: int = READ_CHUNK_SIZE) -> Optional[Iterator[bytes]]:
+        """Get cached output for a key as chunks of at most chunk_size bytes
+
+        The output is read with incremental blob I/O inside one read
+        transaction, so a large entry is never held in memory whole and
+        stays readable if another process evicts it meanwhile. Python
+        builds without sqlite3 blob I/O (before 3.11) read it in one piece.
+        """
+        db = self._db
+        if not hasattr(db, 'blobopen'):
+            output = self.get(key)
+            return None if output is None else iter((output,))
+        db.execute('BEGIN')
+        try:
+            row = db.execute('SELECT rowid FROM entries WHERE key = ?', (key,)).fetchone()
+            blob = None if row is None else db.blobopen('entries', 'output', row[0], readonly=True)
+        except BaseException:
+            db.execute('COMMIT')
+            raise
+        if blob is None:
+            db.execute('COMMIT')
+            return None
+        return self._read_blob(key, blob, chunk_size)
+
+    def _read_blob(self, key: str, blob, chunk_size: int) -> Iterator[bytes]:
+        """Yield an open blob in chunks, then end the read transaction and mark the key used"""
+        try:
+            while True:
+                chunk = blob.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            blob.close()
+            self._db.execute('COMMIT')
+        self._db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+
+    def put(self, key: str, output: bytes) -> None:
+        """Store output for a key, evicting old entries if over the size cap
+
+        Outputs over max_entry_bytes (MAX_ENTRY_FRACTION of the cap) are not stored.
+        """
+        size = len(output)
+        if size > self.max_entry_bytes:
+            return
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute('SELECT size FROM entries WHERE key = ?', (key,)).fetchone()
+            delta = size - (row[0] if row else 0)
+            db.execute('INSERT OR REPLACE INTO entries (key, output, size, accessed) VALUES (?, ?, ?, ?)',
+                       (key, output, size, time.time()))
+            total = self._add_total(delta)
+            if total > self.max_bytes:
+                total = self._evict(total)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    def _add_total(self, delta: int) -> int:
+        """Adjust the running total size and return the new value"""
+        self._db.execute("UPDATE meta SET value = value + ? WHERE name = 'total_size'", (delta,))
+        return self._db.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+
+    def _evict(self, total: int) -> int:
+        """Delete least recently used entries until under the eviction target"""
+        target = int(self.max_bytes * EVICT_TO)
+        freed = 0
+        doomed = []
+        for key, size in self._db.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            if total - freed <= target:
+                break
+            doomed.append((key,))
+            freed += size
+        self._db.executemany('DELETE FROM entries WHERE key = ?', doomed)
+        self._db.execute("UPDATE meta SET value = value - ? WHERE name = 'total_size'", (freed,))
+        return total - freed
+
+    def clear(self) -> None:
+        """Remove every cached entry"""
+        self._db.execute('DELETE FROM entries')
+        self._db.execute("UPDATE meta SET value = 0 WHERE name = 'total_size'")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        self._db.close()
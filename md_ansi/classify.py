@@ -0,0 +1,123 @@
+"""
+Line classifier: decide what a markdown line is from its first non-space character
+"""
+
+from typing import NamedTuple, Tuple, Union
+
+
+# Line kinds
+PARAGRAPH = 0
+BLANK = 1
+HEADER = 2
+QUOTE = 3
+LIST = 4
+RULE = 5
+FENCE = 6
+
+
+class Fence(NamedTuple):
+    """An open fenced code block: fence character, fence length and info string"""
+    char: str
+    length: int
+    info: str
+
+
+# A parsed line: (kind, indent, marker, content start)
+#   indent  - number of leading whitespace characters
+#   marker  - header level (int), list marker ('-', '*', '+' or e.g. '12.'),
+#             '>' for quotes, the Fence a code fence opens, '' otherwise
+#   start   - index in the line where the content after the marker begins
+LineInfo = Tuple[int, int, Union[int, str, Fence], int]
+
+
+def _header(line: str, indent: int) -> LineInfo:
+    end = indent
+    length = len(line)
+    while end < length and line[end] == '#':
+        end += 1
+    return (HEADER, indent, end - indent, end)
+
+
+def _quote(line: str, indent: int) -> LineInfo:
+    return (QUOTE, indent, '>', indent + 1)
+
+
+def _bullet(line: str, indent: int) -> LineInfo:
+    after = indent + 1
+    if after < len(line) and line[after].isspace():
+        return (LIST, indent, line[indent], after + 1)
+
+    # A run of three or more '-' or '*' and nothing else is a rule
+    char = line[indent]
+    rest = line[indent:].rstrip()
+    if char != '+' and len(rest) >= 3 and rest.count(char) == len(rest):
+        return (RULE, indent, char, len(line))
+    return (PARAGRAPH, indent, '', 0)
+
+
+def _ordered(line: str, indent: int) -> LineInfo:
+    end = indent + 1
+    length = len(line)
+    while end < length and line[end].isdecimal():
+        end += 1
+    if end + 1 < length and line[end] == '.' and line[end + 1].isspace():
+        return (LIST, indent, line[indent:end + 1], end + 2)
+    return (PARAGRAPH, indent, '', 0)
+
+
+def _fence(line: str, indent: int) -> LineInfo:
+    # CommonMark: at most three spaces of indent, a run of at least three
+    # backticks or tildes, and no backticks in a backtick fence's info string
+    if indent > 3 or '\t' in line[:indent]:
+        return (PARAGRAPH, indent, '', 0)
+    char = line[indent]
+    end = indent + 1
+    length = len(line)
+    while end < length and line[end] == char:
+        end += 1
+    info = line[end:].strip()
+    if end - indent < 3 or (char == '`' and '`' in info):
+        return (PARAGRAPH, indent, '', 0)
+    return (FENCE, indent, Fence(char, end - indent, info), end)
+
+
+def closes_fence(line: str, fence: Fence) -> bool:
+    """Whether a line inside a fenced code block is its closing fence
+
+    The closing fence uses the opening fence's character, is at least as
+    long, is indented at most three spaces and has nothing after it.
+    """
+    content = line.lstrip(' ')
+    indent = len(line) - len(content)
+    if indent > 3 or not content.startswith(fence.char * fence.length):
+        return False
+    return not content.lstrip(fence.char).strip()
+
+
+# First non-space character -> parser; anything else is a paragraph
+_DISPATCH = {
+    '#': _header,
+    '>': _quote,
+    '-': _bullet,
+    '*': _bullet,
+    '+': _bullet,
+    '`': _fence,
+    '~': _fence,
+}
+for _digit in '0123456789':
+    _DISPATCH[_digit] = _ordered
+
+
+def classify_line(line: str) -> LineInfo:
+    """Classify a markdown line (outside code blocks) in a single scan"""
+    content = line.lstrip()
+    if not content:
+        return (BLANK, len(line), '', len(line))
+    indent = len(line) - len(content)
+    first = content[0]
+    parse = _DISPATCH.get(first)
+    if parse is None:
+        if not first.isdecimal():
+            return (PARAGRAPH, indent, '', 0)
+        parse = _ordered
+    return parse(line, indent)
@@ -5,13 +5,28 @@ Command-line interface for md-ansi
 
 import argparse
 import sys
-from pathlib import Path
-from .converter import MarkdownToANSIConverter
 from .styles import THEMES
 
+# Everything else (pathlib, the converter, fonts, batch, cache, server) is
+# imported where it is needed, so short invocations start fast.
 
-def main():
+# Buffer size for binary output files
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Outputs are copied into the conversion cache only up to this size; bigger
+# ones are streamed out without being kept in memory
+CACHE_COPY_LIMIT = 4 * 1024 * 1024
+
+
+def main(argv=None):
     """Main CLI entry point"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'serve':
+        from .server import main as serve_main
+        serve_main(argv[1:])
+        return
+    
     parser = argparse.ArgumentParser(
         description='Convert Markdown files to BBS-style ANSI documents',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -29,6 +44,12 @@ Examples:
   %(prog)s --style vaporwave document.md
   %(prog)s --style codc --output output.ans input.md
   %(prog)s --max --style edgelord wild_document.md
+  %(prog)s --width auto README.md
+  %(prog)s --lines 5000:5050 huge-manual.md
+  %(prog)s --batch 'docs/**/*.md' --out-dir build/ansi -j 8
+  %(prog)s --watch docs/ --out-dir build/ansi
+  %(prog)s --encoding cp437 --sauce -o README.ans README.md
+  %(prog)s serve --unix /tmp/md-ansi.sock
         '''
     )
     
@@ -56,6 +77,133 @@ Examples:
         help='Enhanced formatting with ASCII art headers and wilder colors'
     )
     
+    parser.add_argument(
+        '--highlight',
+        action='store_true',
+        help='Syntax-highlight python, json, shell, diff and yaml code blocks'
+    )
+    
+    parser.add_argument(
+        '--width',
+        type=parse_width,
+        metavar='N|auto',
+        help='Wrap text to N columns, or to the terminal width with "auto" (default: no wrapping)'
+    )
+    
+    parser.add_argument(
+        '--color-depth',
+        choices=('16', '256', 'truecolor', 'auto'),
+        default='16',
+        help='Output colors; themes use their 24-bit colors above 16, "auto" '
+             'goes by $COLORTERM and $TERM (default: 16)'
+    )
+    
+    parser.add_argument(
+        '--minify',
+        action='store_true',
+        help='Drop redundant color codes from the output (savings shown with --profile)'
+    )
+    
+    parser.add_argument(
+        '--encoding',
+        choices=('utf-8', 'cp437'),
+        default='utf-8',
+        help='Output encoding; cp437 maps glyphs it lacks to near equivalents, for BBS '
+             'software and ANSI viewers (default: utf-8)'
+    )
+    
+    parser.add_argument(
+        '--sauce',
+        action='store_true',
+        help='Append a SAUCE record (title, size, width, line count) to the output; '
+             'needs --encoding cp437'
+    )
+    
+    parser.add_argument(
+        '--stream',
+        action='store_true',
+        help='Convert line by line as input arrives, flushing output per line'
+    )
+    
+    parser.add_argument(
+        '--mmap',
+        action='store_true',
+        help='Memory-map the input file and decode it line by line (for very large files)'
+    )
+    
+    parser.add_argument(
+        '--lines',
+        type=parse_line_range,
+        metavar='FIRST:LAST',
+        help='Render only source lines FIRST to LAST (1-based, LAST optional) through a '
+             'line index saved beside the file as FILE.mdidx'
+    )
+    
+    parser.add_argument(
+        '--toc',
+        action='store_true',
+        help='Print the line number, level and title of every header, using the line index'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        metavar='PATTERN',
+        help='Convert every file matching a glob pattern (use with --out-dir)'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        metavar='DIR',
+        help='Convert every .md file under DIR, then re-render files as they change '
+             '(use with --out-dir; Ctrl-C stops). Changes are polled twice a second; in trees '
+             'over 1000 files an in-place edit to a file not changed in the last minute can '
+             'take up to 5 s to show up'
+    )
+    
+    parser.add_argument(
+        '--out-dir',
+        help='Output directory for --batch and --watch; .ans files mirror the source tree'
+    )
+    
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=None,
+        help='Worker processes for --batch and the first --watch build (default: number of CPUs)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Print per-stage timings and byte counts to stderr'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        action='store_true',
+        help='Use the conversion cache for a single file too (--batch and --watch use it '
+             'unless --no-cache)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        help='Conversion cache location (default: ~/.cache/md-ansi)'
+    )
+    
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=512,
+        metavar='MB',
+        help='Conversion cache size cap in MB (default: 512)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always convert, without reading or writing the conversion cache (--batch, --watch)'
+    )
+    
     parser.add_argument(
         '--list-styles',
         action='store_true',
@@ -68,18 +216,49 @@ Examples:
         version='%(prog)s 0.1.0'
     )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     if args.list_styles:
         print("Available styles:")
-        for name, theme in THEMES.items():
+        for name in THEMES:
             print(f"  {name:12} - {get_style_description(name)}")
         return
     
+    if args.sauce and args.encoding != 'cp437':
+        parser.error("--sauce requires --encoding cp437")
+    
+    if args.batch:
+        if not args.out_dir:
+            parser.error("--batch requires --out-dir")
+        batch_convert(args)
+        return
+    
+    if args.watch:
+        if not args.out_dir:
+            parser.error("--watch requires --out-dir")
+        watch_convert(args)
+        return
+    
     if not args.input:
-        parser.error("input is required unless using --list-styles")
+        parser.error("input is required unless using --list-styles, --batch or --watch")
+    
+    if args.stream:
+        stream_convert(args)
+        return
+    
+    if args.mmap:
+        mmap_convert(args)
+        return
+    
+    if args.lines or args.toc:
+        viewport_convert(args)
+        return
+    
+    from pathlib import Path
+    from .converter import MarkdownToANSIConverter, decode_markdown
     
     # Read input
+    data = None
     try:
         if args.input == '-':
             content = sys.stdin.read()
@@ -88,30 +267,417 @@ Examples:
             if not input_path.exists():
                 print(f"Error: File '{args.input}' not found", file=sys.stderr)
                 sys.exit(1)
-            content = input_path.read_text(encoding='utf-8')
+            data = input_path.read_bytes()
+            content = None
     except Exception as e:
         print(f"Error reading input: {e}", file=sys.stderr)
         sys.exit(1)
     
-    # Convert
+    # With --cache, files whose content, style and mode were converted before
+    # are served from the cache
+    cache = open_cache(args) if data is not None else None
+    cached = None
+    if cache is not None:
+        from .cache import cache_key
+        key = cache_key(data, args.style, args.max, converter_options(args))
+        cached = cache.get_chunks(key)
+        if cached is not None:
+            # The input is not needed to serve a hit
+            data = None
+    
+    out = open_output(args)
+    counter = sauce_counter(args, out)
+    write = counter.write if counter is not None else out.write
     try:
-        converter = MarkdownToANSIConverter(args.style, max_mode=args.max)
-        result = converter.convert(content)
-    except Exception as e:
-        print(f"Error converting content: {e}", file=sys.stderr)
+        if cached is not None:
+            for chunk in cached:
+                write(chunk)
+        else:
+            try:
+                if content is None:
+                    content = decode_markdown(data)
+                    data = None
+                converter = MarkdownToANSIConverter(args.style, max_mode=args.max,
+                                                    stats=make_stats(args),
+                                                    **dict(converter_options(args)))
+                # Output goes out in encoded chunks; a copy is kept for the
+                # cache only while it is under CACHE_COPY_LIMIT
+                target = write
+                if cache is not None:
+                    copy, target = cache_tee(write, min(CACHE_COPY_LIMIT, cache.max_entry_bytes))
+                converter.convert_to(content, target)
+            except OSError:
+                raise
+            except Exception as e:
+                print(f"Error converting content: {e}", file=sys.stderr)
+                sys.exit(1)
+            if cache is not None and copy['chunks'] is not None:
+                cache.put(key, b''.join(copy['chunks']))
+        write(output_end(args).encode('ascii'))
+        if counter is not None:
+            write_sauce(args, out, counter)
+        finish_output(out)
+    except OSError as e:
+        print(f"Error writing output: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
     
-    # Output
+    if args.output:
+        print(f"Output written to {args.output}")
+    report_stats(args)
+
+
+def open_cache(args):
+    """Open the conversion cache for --cache, or return None if not enabled or unavailable
+    
+    Opening it costs a sqlite connection and a write to ~/.cache, which
+    would dominate converting a small file, so plain runs leave it alone.
+    """
+    if args.no_cache or not args.cache:
+        return None
+    try:
+        from .cache import ConversionCache
+        return ConversionCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    except Exception as e:
+        print(f"Warning: conversion cache disabled: {e}", file=sys.stderr)
+        return None
+
+
+def open_output(args):
+    """Open the --output file, or stdout's binary buffer, for encoded output
+    
+    A regular --output file is written under a temporary name and only
+    replaced by finish_output, so a conversion that fails leaves an
+    existing output as it was. Devices and pipes are written directly.
+    """
+    import os
+    from .output import AtomicFile
     try:
         if args.output:
-            output_path = Path(args.output)
-            output_path.write_text(result, encoding='utf-8')
-            print(f"Output written to {args.output}")
+            if os.path.exists(args.output) and not os.path.isfile(args.output):
+                return open(args.output, 'wb', buffering=OUTPUT_BUFFER_SIZE)
+            return AtomicFile(args.output, buffering=OUTPUT_BUFFER_SIZE)
+        sys.stdout.flush()
+        return sys.stdout.buffer
+    except Exception as e:
+        print(f"Error writing output: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+def finish_output(out):
+    """Flush the output after a successful conversion, putting an --output file in place"""
+    out.flush()
+    if hasattr(out, 'commit'):
+        out.commit()
+
+
+def output_end(args):
+    """What follows the output: a newline on stdout, as print wrote, nothing in an --output file"""
+    return '' if args.output else '\n'
+
+
+def sauce_counter(args, out):
+    """For --sauce, a SauceCounter that measures what is written to out; else None"""
+    if not args.sauce:
+        return None
+    from .cp437 import SauceCounter
+    return SauceCounter(out.write)
+
+
+def write_sauce(args, out, counter):
+    """Append the --sauce record, titled and dated after the input file"""
+    import datetime
+    import os
+    title, date = '', None
+    if args.input != '-':
+        title = os.path.splitext(os.path.basename(args.input))[0]
+        date = datetime.date.fromtimestamp(os.stat(args.input).st_mtime)
+    out.write(counter.record(title, date))
+
+
+def cache_tee(write, limit):
+    """Wrap a bytes writer so it also keeps a copy of what it writes
+    
+    Returns (copy, tee). copy['chunks'] lists the chunks written so far, or
+    is None once they exceeded limit bytes and the copy was dropped.
+    """
+    copy = {'chunks': [], 'size': 0}
+    
+    def tee(chunk):
+        write(chunk)
+        if copy['chunks'] is not None:
+            copy['size'] += len(chunk)
+            if copy['size'] > limit:
+                copy['chunks'] = None
+            else:
+                copy['chunks'].append(chunk)
+    
+    return copy, tee
+
+
+def batch_convert(args):
+    """Convert every file matching the --batch pattern across worker processes"""
+    from .batch import find_jobs, report_error, run_batch
+    
+    jobs = find_jobs(args.batch, args.out_dir, args.style, args.max, converter_options(args))
+    if not jobs:
+        print(f"Error: No files match '{args.batch}'", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.no_cache:
+        cache_dir, cache_max_bytes = None, None
+    else:
+        cache_dir, cache_max_bytes = args.cache_dir, args.cache_size * 1024 * 1024
+    converted, failed = run_batch(jobs, workers=args.jobs, on_error=report_error,
+                                  cache_dir=cache_dir, cache_max_bytes=cache_max_bytes,
+                                  sauce=args.sauce)
+    print(f"Converted {converted} of {len(jobs)} files into {args.out_dir}")
+    if failed:
+        print(f"{failed} files failed", file=sys.stderr)
+        sys.exit(1)
+
+
+def watch_convert(args):
+    """Convert the --watch tree, then keep re-rendering files as they change"""
+    import os
+    from .watch import TreeWatcher
+    
+    if not os.path.isdir(args.watch):
+        print(f"Error: Directory '{args.watch}' not found", file=sys.stderr)
+        sys.exit(1)
+    if args.no_cache:
+        cache_dir, cache_max_bytes = None, None
+    else:
+        cache_dir, cache_max_bytes = args.cache_dir, args.cache_size * 1024 * 1024
+    
+    watcher = TreeWatcher(args.watch, args.out_dir, args.style, args.max, converter_options(args))
+    try:
+        watcher.start(workers=args.jobs, cache_dir=cache_dir, cache_max_bytes=cache_max_bytes,
+                      sauce=args.sauce)
+        print(f"Watching {args.watch} for changes (Ctrl-C to stop)", flush=True)
+        watcher.run()
+    except KeyboardInterrupt:
+        print(f"Stopped ({watcher.rebuilds} rebuilds)")
+
+
+def stream_convert(args):
+    """Convert input incrementally, writing each rendered line as it is produced"""
+    from pathlib import Path
+    from .converter import MarkdownToANSIConverter
+    from .output import encode_text
+    
+    try:
+        if args.input == '-':
+            source = sys.stdin
         else:
-            print(result)
+            input_path = Path(args.input)
+            if not input_path.exists():
+                print(f"Error: File '{args.input}' not found", file=sys.stderr)
+                sys.exit(1)
+            source = input_path.open('r', encoding='utf-8')
+    except Exception as e:
+        print(f"Error reading input: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    out = open_output(args)
+    counter = sauce_counter(args, out)
+    write = counter.write if counter is not None else out.write
+    converter = MarkdownToANSIConverter(args.style, max_mode=args.max, stats=make_stats(args),
+                                        **dict(converter_options(args)))
+    encoding = converter.encoding
+    try:
+        # Each line break is written ahead of the next chunk, so the output
+        # matches convert's even where the last line is not a blank one
+        separator = ''
+        for chunk in converter.convert_stream(source):
+            write(encode_text(separator + chunk, encoding))
+            out.flush()
+            separator = '\n'
+        write(encode_text(converter.reset + output_end(args), encoding))
+        if counter is not None:
+            write_sauce(args, out, counter)
+        finish_output(out)
     except Exception as e:
+        print(f"Error converting content: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout.buffer:
+            out.close()
+    
+    if args.output:
+        print(f"Output written to {args.output}")
+    report_stats(args)
+
+
+def mmap_convert(args):
+    """Convert a memory-mapped file, writing encoded output in fixed-size chunks
+    
+    Peak memory is bounded by the longest line rather than the file size.
+    """
+    from pathlib import Path
+    from .converter import MarkdownToANSIConverter
+    from .largefile import iter_mmap_lines
+    
+    if args.input == '-':
+        print("Error: --mmap needs an input file, not stdin", file=sys.stderr)
+        sys.exit(1)
+    if not Path(args.input).exists():
+        print(f"Error: File '{args.input}' not found", file=sys.stderr)
+        sys.exit(1)
+    
+    out = open_output(args)
+    counter = sauce_counter(args, out)
+    write = counter.write if counter is not None else out.write
+    converter = MarkdownToANSIConverter(args.style, max_mode=args.max, stats=make_stats(args),
+                                        **dict(converter_options(args)))
+    try:
+        converter.convert_to(iter_mmap_lines(args.input), write)
+        write(output_end(args).encode('ascii'))
+        if counter is not None:
+            write_sauce(args, out, counter)
+        finish_output(out)
+    except Exception as e:
+        print(f"Error converting content: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    
+    if args.output:
+        print(f"Output written to {args.output}")
+    report_stats(args)
+
+
+def viewport_convert(args):
+    """Render a slice of a file, or list its headers, through its persistent line index"""
+    from pathlib import Path
+    from .converter import MarkdownToANSIConverter
+    from .output import encode_text
+    from .viewport import IndexedDocument
+    
+    if args.input == '-':
+        print("Error: --lines and --toc need an input file, not stdin", file=sys.stderr)
+        sys.exit(1)
+    if not Path(args.input).exists():
+        print(f"Error: File '{args.input}' not found", file=sys.stderr)
+        sys.exit(1)
+    
+    converter = MarkdownToANSIConverter(args.style, max_mode=args.max, stats=make_stats(args),
+                                        **dict(converter_options(args)))
+    try:
+        with IndexedDocument(args.input, converter=converter) as document:
+            if args.toc:
+                text = '\n'.join(f"{line + 1:>8}  {'  ' * (level - 1)}{title}"
+                                  for line, level, title in document.toc())
+            else:
+                start, stop = args.lines
+                stop = min(stop or document.line_count, document.line_count)
+                text = '\n'.join(document.render_range(start, stop))
+                if converter.stats is not None and start < stop:
+                    offsets = document.index.offsets
+                    converter.stats.bytes_in += offsets[stop] - 1 - offsets[start]
+                    converter.stats.bytes_out += len(text.encode('utf-8'))
+                if converter.minify:
+                    text = converter._minify_batch(text)
+                text += converter.reset
+    except Exception as e:
+        print(f"Error converting content: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    out = open_output(args)
+    counter = sauce_counter(args, out)
+    write = counter.write if counter is not None else out.write
+    try:
+        write(encode_text(text + output_end(args), converter.encoding))
+        if counter is not None:
+            write_sauce(args, out, counter)
+        finish_output(out)
+    except OSError as e:
         print(f"Error writing output: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    
+    if args.output:
+        print(f"Output written to {args.output}")
+    report_stats(args)
+
+
+def converter_options(args):
+    """Converter keyword arguments set on the command line, as sorted (name, value) pairs
+    
+    Only options that differ from the converter defaults are included, so
+    cache keys and batch jobs stay the same when none are given.
+    """
+    options = {}
+    if args.highlight:
+        options['highlight'] = True
+    if args.width is not None:
+        if args.width == 'auto':
+            from .width import terminal_width
+            args.width = terminal_width()
+        options['width'] = args.width
+    if args.minify:
+        options['minify'] = True
+    if args.encoding != 'utf-8':
+        options['encoding'] = args.encoding
+    if args.color_depth != '16':
+        if args.color_depth == 'auto':
+            from .colors import detect_color_depth
+            args.color_depth = detect_color_depth()
+        if args.color_depth != '16':
+            options['color_depth'] = args.color_depth
+    return tuple(sorted(options.items()))
+
+
+def parse_width(value):
+    """argparse type for --width: a positive column count or 'auto'"""
+    if value == 'auto':
+        return value
+    try:
+        width = int(value)
+    except ValueError:
+        width = 0
+    if width < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive number of columns or 'auto', got '{value}'")
+    return width
+
+
+def parse_line_range(value):
+    """argparse type for --lines: 'FIRST:LAST' (1-based, inclusive) as a (start, stop) slice
+    
+    stop is None when LAST is left out, for the rest of the document.
+    """
+    first, _, last = value.partition(':')
+    try:
+        start = int(first) - 1
+        stop = int(last) if last else None
+    except ValueError:
+        start = -1
+    if start < 0 or (stop is not None and stop <= start):
+        raise argparse.ArgumentTypeError(f"expected FIRST:LAST with 1 <= FIRST <= LAST, got '{value}'")
+    return start, stop
+
+
+def make_stats(args):
+    """Create the --profile stats collector, or None when profiling is off"""
+    if not args.profile:
+        return None
+    from .profiling import ConversionStats
+    args.stats = ConversionStats()
+    return args.stats
+
+
+def report_stats(args):
+    """Print the --profile table to stderr"""
+    stats = getattr(args, 'stats', None)
+    if stats is not None:
+        print(stats.format_table(), file=sys.stderr)
 
 
 def get_style_description(style_name):
@@ -0,0 +1,65 @@
+"""
+Client helper for the md-ansi rendering server
+"""
+
+import json
+import socket
+from typing import Optional
+from .server import DEFAULT_PORT
+
+
+class RenderError(Exception):
+    """The server rejected or failed a request"""
+
+
+class RenderClient:
+    """Blocking client for md-ansi serve, keeping one connection open
+
+    Usage:
+        with RenderClient(unix_path='/tmp/md-ansi.sock') as client:
+            ansi = client.render('# Hello', style='vaporwave')
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                 unix_path: Optional[str] = None, timeout: Optional[float] = 30.0):
+        if unix_path:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(unix_path)
+        else:
+            self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rwb')
+        self._next_id = 0
+
+    def request(self, payload: dict) -> dict:
+        """Send one request and wait for its response"""
+        self._next_id += 1
+        payload = dict(payload, id=self._next_id)
+        self._file.write(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise RenderError('connection closed by server')
+        response = json.loads(line)
+        if 'error' in response:
+            raise RenderError(response['error'])
+        return response
+
+    def render(self, text: str, style: str = 'beach', max_mode: bool = False) -> str:
+        """Convert markdown text on the server"""
+        return self.request({'text': text, 'style': style, 'max': max_mode})['output']
+
+    def metrics(self) -> dict:
+        """Fetch the server's request counters and latency percentiles"""
+        return self.request({'op': 'metrics'})['metrics']
+
+    def close(self) -> None:
+        """Close the connection"""
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
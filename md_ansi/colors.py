@@ -0,0 +1,221 @@
+"""
+Color depths: 24-bit theme colors rendered as truecolor, 256-color or 16-color SGR
+
+RGB colors are reduced with lookup tables built once per process: a
+per-channel table picks the nearest 6x6x6 cube level, a per-level table the
+nearest gray ramp entry, and a 256-entry table maps the 256-color palette
+onto the 16 basic colors. A theme is resolved once per depth and cached, so
+rendering never searches for nearest colors.
+"""
+
+import copy
+import os
+import re
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from .styles import StyleTheme
+
+
+RGB = Tuple[int, int, int]
+
+# Output color depths, from fewest colors to most
+DEPTHS = ('16', '256', 'truecolor')
+
+# xterm's default values for the 16 basic colors (30-37, then 90-97)
+BASIC_RGB: Tuple[RGB, ...] = (
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+)
+
+# Channel levels of the 6x6x6 cube (indexes 16-231) and the gray ramp (232-255)
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+GRAY_LEVELS = tuple(8 + 10 * i for i in range(24))
+
+_SGR_PARAMS = re.compile(r'\x1b\[([0-9;]*)m')
+
+# Lookup tables, built on first use
+_CUBE_INDEX: Optional[bytes] = None
+_GRAY_INDEX: Optional[bytes] = None
+_TO_BASIC: Optional[bytes] = None
+
+# (name, depth) -> (theme, resolved copy)
+_THEMES: Dict[Tuple[str, str], Tuple[StyleTheme, StyleTheme]] = {}
+
+
+def hex_rgb(value: Union[str, RGB]) -> RGB:
+    """Parse '#rrggbb' (or pass an (r, g, b) tuple through)"""
+    if isinstance(value, tuple):
+        return value
+    value = value.lstrip('#')
+    return int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16)
+
+
+def detect_color_depth(environ=None) -> str:
+    """Best depth for the terminal described by $COLORTERM and $TERM"""
+    environ = os.environ if environ is None else environ
+    if environ.get('COLORTERM', '').lower() in ('truecolor', '24bit'):
+        return 'truecolor'
+    if '256' in environ.get('TERM', ''):
+        return '256'
+    return '16'
+
+
+def _nearest(value: int, levels: Sequence[int]) -> int:
+    """Index of the level closest to value"""
+    return min(range(len(levels)), key=lambda i: abs(levels[i] - value))
+
+
+def _distance(a: RGB, b: RGB) -> int:
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 + (a[2] - b[2]) ** 2
+
+
+def _build_tables() -> None:
+    global _CUBE_INDEX, _GRAY_INDEX, _TO_BASIC
+    _CUBE_INDEX = bytes(_nearest(v, CUBE_LEVELS) for v in range(256))
+    _GRAY_INDEX = bytes(_nearest(v, GRAY_LEVELS) for v in range(256))
+    _TO_BASIC = bytes(
+        min(range(16), key=lambda basic: _distance(palette_rgb(index), BASIC_RGB[basic]))
+        if index >= 16 else index
+        for index in range(256)
+    )
+
+
+def palette_rgb(index: int) -> RGB:
+    """RGB value of an entry in the 256-color palette"""
+    if index < 16:
+        return BASIC_RGB[index]
+    if index < 232:
+        index -= 16
+        return CUBE_LEVELS[index // 36], CUBE_LEVELS[index // 6 % 6], CUBE_LEVELS[index % 6]
+    gray = GRAY_LEVELS[index - 232]
+    return gray, gray, gray
+
+
+def to_256(rgb: RGB) -> int:
+    """Nearest 256-color palette index (cube or gray ramp) by table lookup"""
+    if _CUBE_INDEX is None:
+        _build_tables()
+    r, g, b = rgb
+    cube = (CUBE_LEVELS[_CUBE_INDEX[r]], CUBE_LEVELS[_CUBE_INDEX[g]], CUBE_LEVELS[_CUBE_INDEX[b]])
+    gray_index = _GRAY_INDEX[(r + g + b) // 3]
+    gray = GRAY_LEVELS[gray_index]
+    if _distance(rgb, (gray, gray, gray)) < _distance(rgb, cube):
+        return 232 + gray_index
+    return 16 + 36 * _CUBE_INDEX[r] + 6 * _CUBE_INDEX[g] + _CUBE_INDEX[b]
+
+
+def to_16(rgb: RGB) -> int:
+    """Nearest basic color index (0-15), via the 256-color palette"""
+    index = to_256(rgb)
+    return _TO_BASIC[index]
+
+
+def color_params(rgb: RGB, depth: str, background: bool = False) -> str:
+    """SGR parameters selecting rgb as the foreground or background color"""
+    if depth == 'truecolor':
+        return f"{48 if background else 38};2;{rgb[0]};{rgb[1]};{rgb[2]}"
+    if depth == '256':
+        return f"{48 if background else 38};5;{to_256(rgb)}"
+    index = to_16(rgb)
+    return str((40 if background else 30) + index if index < 8 else (100 if background else 90) + index - 8)
+
+
+def basic_rgb(escape: str) -> Optional[RGB]:
+    """RGB value of the first basic foreground color in an escape string, if any"""
+    for params in _SGR_PARAMS.findall(escape):
+        for param in params.split(';'):
+            if param and (30 <= int(param) <= 37 or 90 <= int(param) <= 97):
+                code = int(param)
+                return BASIC_RGB[code - 30 if code < 90 else code - 82]
+    return None
+
+
+def recolor(escape: str, depth: str, foreground: Optional[RGB] = None,
+            background: Optional[RGB] = None) -> str:
+    """Replace the colors in an escape string, keeping its other attributes
+
+    Colors left as None keep whatever the escape string had.
+    """
+    attributes: List[str] = []
+    colors = {}
+    for params in _SGR_PARAMS.findall(escape):
+        for param in params.split(';'):
+            code = int(param or 0)
+            if 30 <= code <= 37 or 90 <= code <= 97:
+                colors['fg'] = param
+            elif 40 <= code <= 47 or 100 <= code <= 107:
+                colors['bg'] = param
+            else:
+                attributes.append(param)
+    if foreground is not None:
+        colors['fg'] = color_params(foreground, depth)
+    if background is not None:
+        colors['bg'] = color_params(background, depth, background=True)
+    params = attributes + [colors[key] for key in ('fg', 'bg') if key in colors]
+    return f"\x1b[{';'.join(params)}m" if params else ''
+
+
+def gradient(stops: Sequence[RGB], count: int) -> List[RGB]:
+    """count colors spread evenly along the straight lines between stops"""
+    if count <= 1 or len(stops) == 1:
+        return [stops[0]] * count
+    colors = []
+    spans = len(stops) - 1
+    for i in range(count):
+        position = i * spans / (count - 1)
+        index = min(int(position), spans - 1)
+        t = position - index
+        a, b = stops[index], stops[index + 1]
+        colors.append((round(a[0] + (b[0] - a[0]) * t),
+                       round(a[1] + (b[1] - a[1]) * t),
+                       round(a[2] + (b[2] - a[2]) * t)))
+    return colors
+
+
+def paint_gradient(text: str, stops: Sequence[RGB], depth: str) -> str:
+    """Color each character of text along a gradient, one escape per color change
+
+    Spaces keep whatever color is current, since they show no foreground.
+    """
+    out = []
+    previous = None
+    for char, rgb in zip(text, gradient(stops, len(text))):
+        if char != ' ':
+            escape = f"\x1b[{color_params(rgb, depth)}m"
+            if escape != previous:
+                out.append(escape)
+                previous = escape
+        out.append(char)
+    return ''.join(out)
+
+
+def theme_at_depth(theme: StyleTheme, depth: str) -> StyleTheme:
+    """A theme with its colors rendered for a depth (cached per theme and depth)
+
+    At 256 colors and truecolor, attributes listed in theme.rgb get those
+    colors, as '#rrggbb' or a (foreground, background) pair. At 16 colors
+    the hand-picked escape strings are kept, unless the theme sets
+    basic_colors_from_rgb, in which case its RGB colors are reduced to the
+    nearest basic ones.
+    """
+    if depth not in DEPTHS:
+        raise ValueError(f"unknown color depth '{depth}' (expected one of {', '.join(DEPTHS)})")
+    if depth == '16' and not theme.basic_colors_from_rgb:
+        return theme
+    key = (theme.name, depth)
+    cached = _THEMES.get(key)
+    if cached is not None and cached[0] is theme:
+        return cached[1]
+
+    resolved = copy.copy(theme)
+    resolved.color_depth = depth
+    for name, value in theme.rgb.items():
+        foreground, background = value if isinstance(value, tuple) and len(value) == 2 else (value, None)
+        setattr(resolved, name, recolor(
+            getattr(theme, name), depth,
+            hex_rgb(foreground) if foreground else None,
+            hex_rgb(background) if background else None,
+        ))
+    _THEMES[key] = (theme, resolved)
+    return resolved
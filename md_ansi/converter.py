@@ -2,439 +2,624 @@
 Core markdown to ANSI converter
 """
 
-import re
-from typing import List, Tuple
+import zlib
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from .classify import (BLANK, FENCE, HEADER, LIST, PARAGRAPH, QUOTE, Fence, LineInfo,
+                       classify_line, closes_fence)
+from .inline import format_inline, has_markup
+from .plan import MAX_PLANNED_LEVEL, get_render_plan, header_affixes
 from .styles import ANSIColors, get_theme
+from .tables import (TABLE_SAMPLE_ROWS, Cell, TableLayout, fit_widths, is_table_row, split_row,
+                     table_alignments, table_end)
+from .width import display_width, truncate_ansi, visible_width, wrap_ansi
 
 
-# ASCII art font definitions for max mode
-ASCII_FONT_SMALL = {
-    'A': ['▄▀█', '█▄▄'],
-    'B': ['█▄▄', '█▄█'],
-    'C': ['▄▀█', '█▄▄'],
-    'D': ['█▀▄', '█▄▀'],
-    'E': ['█▀▀', '█▄▄'],
-    'F': ['█▀▀', '█▀▀'],
-    'G': ['▄▀█', '█▄█'],
-    'H': ['█▄█', '█▀█'],
-    'I': ['█', '█'],
-    'J': ['  █', '█▄█'],
-    'K': ['█▄▀', '█▀▄'],
-    'L': ['█  ', '█▄▄'],
-    'M': ['█▄█', '█▀█'],
-    'N': ['█▄█', '█▀█'],
-    'O': ['▄▀█', '█▄█'],
-    'P': ['█▀▄', '█▀▀'],
-    'Q': ['▄▀█', '█▄█'],
-    'R': ['█▀▄', '█▀▄'],
-    'S': ['▄▀▀', '▄▄█'],
-    'T': ['▀█▀', ' █ '],
-    'U': ['█▄█', '█▄█'],
-    'V': ['█▄█', ' █ '],
-    'W': ['█▄█', '█▄█'],
-    'X': ['█▄█', '█▀█'],
-    'Y': ['█▄█', ' █ '],
-    'Z': ['▀▀█', '█▄▄'],
-    ' ': [' ', ' '],
-    '1': ['█', '█'],
-    '2': ['▀▀█', '█▄▄'],
-    '3': ['▀▀█', '▄▄█'],
-    '4': ['█▄█', '  █'],
-    '5': ['█▀▀', '▄▄█'],
-    '6': ['█▀▀', '█▄█'],
-    '7': ['▀▀█', '  █'],
-    '8': ['█▄█', '█▄█'],
-    '9': ['█▄█', '▄▄█'],
-    '0': ['█▄█', '█▄█'],
-}
+def stable_hash(text: str) -> int:
+    """Hash used to pick decorations; unlike hash() it is the same in every process"""
+    return zlib.crc32(text.encode('utf-8'))
 
-ASCII_FONT_LARGE = {
-    'A': ['  ▄▀█  ', ' █▄▄█ ', '█▀   ▀█'],
-    'B': ['█▀▀▀▀▄', '█▄▄▄▄▀', '█▄▄▄▄▀'],
-    'C': [' ▄▀▀▀▀▄', '█▀     ', '█▄▄▄▄▄▀'],
-    'D': ['█▀▀▀▀▄ ', '█     █', '█▄▄▄▄▀ '],
-    'E': ['█▀▀▀▀▀▀', '█▄▄▄▄▄ ', '█▄▄▄▄▄▄'],
-    'F': ['█▀▀▀▀▀▀', '█▄▄▄▄▄ ', '█      '],
-    'G': [' ▄▀▀▀▀▄ ', '█▀   ▄▄', '█▄▄▄▄▀█'],
-    'H': ['█▄   ▄█', '█▀▀▀▀▀█', '█     █'],
-    'I': ['█', '█', '█'],
-    'J': ['     █', '     █', '█▄▄▄▄▀'],
-    'K': ['█▄  ▄▀', '█▀▀▀▄ ', '█   ▀▄'],
-    'L': ['█      ', '█      ', '█▄▄▄▄▄▄'],
-    'M': ['█▄   ▄█', '█▀▀▀▀▀█', '█     █'],
-    'N': ['█▄   ▄█', '█▀▀▀▀▀█', '█     █'],
-    'O': [' ▄▀▀▀▀▄ ', '█▀   ▀█', '█▄▄▄▄▄▀'],
-    'P': ['█▀▀▀▀▄ ', '█▄▄▄▄▀ ', '█      '],
-    'Q': [' ▄▀▀▀▀▄ ', '█▀   ▀█', '█▄▄▄▄▄▀'],
-    'R': ['█▀▀▀▀▄ ', '█▄▄▄▄▀ ', '█   ▀▄ '],
-    'S': [' ▄▀▀▀▀▄', '█▄▄▄▄▄ ', '▄▄▄▄▄▀█'],
-    'T': ['▀▀▀█▀▀▀', '   █   ', '   █   '],
-    'U': ['█▄   ▄█', '█▀   ▀█', '█▄▄▄▄▄▀'],
-    'V': ['█▄   ▄█', '█▀▄ ▄▀█', '  ▀█▀  '],
-    'W': ['█▄   ▄█', '█▀▀▀▀▀█', '█▄   ▄█'],
-    'X': ['█▄   ▄█', ' ▀▄▄▄▀ ', '█▀   ▀█'],
-    'Y': ['█▄   ▄█', ' ▀▄▄▄▀ ', '   █   '],
-    'Z': ['▀▀▀▀▀▀█', '  ▄▄▄▀ ', '█▄▄▄▄▄▄'],
-    ' ': ['   ', '   ', '   '],
-    '1': [' █', ' █', ' █'],
-    '2': [' ▄▀▀▀▄', '▄▄▄▄▄▀', '█▄▄▄▄▄'],
-    '3': [' ▄▀▀▀▄', '▄▄▄▄▄▀', '▄▄▄▄▄▀'],
-    '4': ['█▄   █', '▀▀▀▀▀█', '     █'],
-    '5': ['█▀▀▀▀▀', '█▄▄▄▄▄', '▄▄▄▄▄▀'],
-    '6': ['█▀▀▀▀▀', '█▄▄▄▄▄', '█▄▄▄▄▄'],
-    '7': ['▀▀▀▀▀█', '     █', '     █'],
-    '8': ['█▄▄▄▄█', '█▄▄▄▄█', '█▄▄▄▄█'],
-    '9': ['█▄▄▄▄█', '▀▀▀▀▀█', '▄▄▄▄▄▀'],
-    '0': ['█▄▄▄▄█', '█▄▄▄▄█', '█▄▄▄▄█'],
-}
 
+# Rendered lines joined into one string per write in convert_to
+LINES_PER_WRITE = 4096
 
-def generate_ascii_art(text: str, font_size: str = 'small') -> List[str]:
-    """Generate ASCII art from text using the specified font size"""
-    text = text.upper()
-    font = ASCII_FONT_SMALL if font_size == 'small' else ASCII_FONT_LARGE
-    
-    # Get the height of the font
-    height = len(font.get('A', [' ']))
+
+# Names that moved to the lazily imported fonts module
+_FONT_NAMES = frozenset((
+    'ASCII_FONT_SMALL', 'ASCII_FONT_LARGE', 'HEADER_CACHE_SIZE', 'generate_ascii_art',
+    'render_ascii_header', 'header_cache_info', 'clear_header_cache',
+))
+
+
+def __getattr__(name):
+    """Load font names from the fonts module on first access"""
+    if name in _FONT_NAMES:
+        from . import fonts
+        return getattr(fonts, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def split_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Yield lines without their newlines, as text.split('\\n') would
     
-    # Create lines for the ASCII art
-    lines = [''] * height
+    Like str.split, a final newline ends one more, empty line, so that the
+    tail of an unclosed code block renders the same either way.
+    """
+    line = None
+    for line in lines:
+        yield line[:-1] if line.endswith('\n') else line
+    if line is not None and line.endswith('\n'):
+        yield ''
+
+
+def decode_markdown(data: bytes, encoding: str = 'utf-8') -> str:
+    """Decode file contents with universal newlines, as open() in text mode would
     
-    for char in text:
-        char_art = font.get(char, font.get(' ', [' '] * height))
-        for i, line in enumerate(char_art):
-            if i < len(lines):
-                lines[i] += line + ' '
+    '\\r\\n' and lone '\\r' line ends become '\\n', so a CRLF file renders
+    like its LF copy instead of keeping a '\\r' before every line's reset.
+    """
+    text = data.decode(encoding)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def find_closing_fence(text: str, start: int, fence: Fence) -> int:
+    """Find the line that closes a code block whose body starts at text[start]
     
-    return lines
+    Returns the offset of the closing fence line, or -1 if the block runs
+    to the end of the text.
+    """
+    marker = fence.char * fence.length
+    find = text.find
+    pos = start
+    while True:
+        hit = find(marker, pos)
+        if hit < 0:
+            return -1
+        line_start = text.rfind('\n', start, hit) + 1 or start
+        line_end = find('\n', hit)
+        if line_end < 0:
+            line_end = len(text)
+        if closes_fence(text[line_start:line_end], fence):
+            return line_start
+        pos = line_end + 1
 
 
 class MarkdownToANSIConverter:
     """Convert markdown to ANSI-formatted text"""
     
-    def __init__(self, style_name='beach', max_mode=False):
+    def __init__(self, style_name='beach', max_mode=False, stats=None, highlight=False,
+                 width=None, minify=False, color_depth='16', encoding='utf-8'):
         self.theme = get_theme(style_name)
+        
+        # Output colors: '16' (the default), '256', 'truecolor' or 'auto' to
+        # go by $COLORTERM/$TERM; themes' 24-bit colors are used above 16
+        if color_depth != '16' or self.theme.basic_colors_from_rgb:
+            from .colors import detect_color_depth, theme_at_depth
+            if color_depth == 'auto':
+                color_depth = detect_color_depth()
+            self.theme = theme_at_depth(self.theme, color_depth)
+        self.color_depth = color_depth
         self.max_mode = max_mode
         self.reset = ANSIColors.RESET
         
+        # Syntax highlighting for code blocks in known languages (see highlight.py).
+        # Blocks are tokenized whole, so render_line alone paints code plainly.
+        self.highlight = highlight
+        
+        # Wrap paragraphs, quotes, list items and headers to this many columns
+        # (None leaves them unwrapped); borders and rules are cut to fit
+        self.width = width
+        
+        # Drop redundant SGR sequences from the output (see minify.py);
+        # bytes_saved adds up what that removed across conversions
+        self.minify = minify
+        self.bytes_saved = 0
+        
+        # Default encoding for convert_to: 'utf-8' or 'cp437', which maps the
+        # glyphs CP437 lacks to near equivalents (see cp437.py)
+        self.encoding = encoding
+        self.plan = get_render_plan(self.theme, max_mode)
+        self.inline_palette = self.plan.inline_palette
+        
+        # Opt-in profiling (see profiling.ConversionStats); wraps this instance only
+        self.stats = stats
+        if stats is not None:
+            stats.instrument(self)
+    
     def convert(self, markdown_text: str) -> str:
         """Convert markdown text to ANSI-formatted text"""
-        lines = markdown_text.split('\n')
-        result = []
-        
-        in_code_block = False
-        code_block_lang = None
-        
-        for line in lines:
-            if line.strip().startswith('```'):
-                # Code block toggle
-                if in_code_block:
-                    in_code_block = False
-                    code_block_lang = None
-                    result.append(self._format_code_block_end())
-                else:
-                    in_code_block = True
-                    code_block_lang = line.strip()[3:].strip()
-                    result.append(self._format_code_block_start(code_block_lang))
-                continue
-            
-            if in_code_block:
-                result.append(self._format_code_line(line))
-                continue
-                
-            # Process line based on markdown syntax
-            formatted_line = self._format_line(line)
-            result.append(formatted_line)
+        text = '\n'.join(self._render_text(markdown_text))
+        if self.minify:
+            text = self._minify_batch(text)
+        return text + self.reset
+    
+    def convert_to(self, markdown, target, encoding: Optional[str] = None) -> int:
+        """Convert markdown and write the output to a stream or callback
+        
+        ``markdown`` is a string or an iterable of lines; ``target`` is a
+        binary or text stream, a callable taking bytes chunks, or an
+        output.BufferedSink. Writes exactly what convert() would return, but
+        in fixed-size encoded chunks, so the whole output string is never
+        built. encoding defaults to the converter's. Returns the number of
+        characters written.
+        """
+        from .output import BufferedSink
+        
+        sink = (target if isinstance(target, BufferedSink)
+                else BufferedSink(target, encoding or self.encoding))
+        start = sink.chars_written
+        write = sink.write
         
-        return '\n'.join(result) + self.reset
+        # Join rendered lines in batches so the sink sees few, large writes
+        if isinstance(markdown, str):
+            chunks = self._render_text(markdown)
+        else:
+            chunks = self._stream_chunks(markdown)
+        if self.minify:
+            from .minify import SGRMinifier
+            minifier = SGRMinifier()
+        batch = list(islice(chunks, LINES_PER_WRITE))
+        while batch:
+            text = '\n'.join(batch)
+            if self.minify:
+                text = self._minify_batch(text, minifier)
+            write(text)
+            batch = list(islice(chunks, LINES_PER_WRITE))
+            if batch:
+                write('\n')
+        write(self.reset)
+        sink.flush()
+        return sink.chars_written - start
     
-    def _format_line(self, line: str) -> str:
-        """Format a single line of markdown"""
-        stripped = line.strip()
+    def convert_stream(self, lines: Iterable[str]) -> Iterator[str]:
+        """Convert an iterable of markdown lines, yielding ANSI output as it goes
         
-        # Headers
-        if stripped.startswith('#'):
-            return self._format_header(line)
+        Code block state is carried across lines, so input may be read
+        incrementally (e.g. from a file or stdin). Input lines may keep their
+        newlines; as with text.split('\\n'), a final newline ends one more,
+        empty line, so joining the chunks with newlines gives what convert
+        returns for the same text. Each yielded chunk is one rendered line
+        without its line terminator; chunks for headers may span several
+        terminal lines. The final reset is left to the caller.
         
-        # Blockquotes
-        if stripped.startswith('>'):
-            return self._format_blockquote(line)
+        Each line's chunk is yielded before the next line is read, except
+        for a paragraph line with a pipe in it, which may be a table's header
+        row: that waits for the next line. Tables are yielded once their
+        first TABLE_SAMPLE_ROWS rows (or all of them) are read, and
+        highlighted code blocks once closed.
+        """
+        if self.minify:
+            return self._minified(self._stream_chunks(lines))
+        return self._stream_chunks(lines)
+    
+    def _stream_chunks(self, lines: Iterable[str]) -> Iterator[str]:
+        """Render lines one by one for convert_stream, before minifying"""
+        render_line = self.render_line
+        fence = None
+        if self.highlight:
+            from .highlight import HIGHLIGHT_MAX_CHARS, get_lexer
+        # Lines of a code block held back until it can be highlighted whole
+        block = None
+        lines = split_lines(lines)
+        # A line read ahead to see whether a table starts, rendered next
+        held = None
         
-        # Lists
-        if re.match(r'^[\s]*[-*+]\s', line) or re.match(r'^[\s]*\d+\.\s', line):
-            return self._format_list_item(line)
+        while True:
+            if held is not None:
+                line, held = held, None
+            else:
+                line = next(lines, None)
+                if line is None:
+                    break
+            if block is not None:
+                if not closes_fence(line, fence):
+                    block.append(line)
+                    size += len(line) + 1
+                    if size > HIGHLIGHT_MAX_CHARS:
+                        # Too big to highlight: the rest of the block streams plainly
+                        yield from self._code_block_lines(block)
+                        block = None
+                    continue
+                yield from self._code_block_lines(block, fence.info)
+                block = None
+            # Only a paragraph line with a pipe can be a table's header row,
+            # and only the line after it tells; any other line goes out at once
+            if fence is None and '|' in line and is_table_row(line):
+                held = next(lines, None)
+                aligns = table_alignments(line, held) if held is not None else None
+                if aligns is not None:
+                    held = yield from self._stream_table(line, aligns, lines)
+                    continue
+            opened = fence is None
+            chunk, fence = render_line(line, fence)
+            yield chunk
+            if opened and fence is not None and self.highlight and get_lexer(fence.info):
+                block = []
+                size = 0
         
-        # Horizontal rules
-        if re.match(r'^[\s]*-{3,}[\s]*$', stripped) or re.match(r'^[\s]*\*{3,}[\s]*$', stripped):
-            return self._format_horizontal_rule()
+        if block:
+            yield from self._code_block_lines(block, fence.info)
+    
+    def _minified(self, chunks: Iterable[str]) -> Iterator[str]:
+        """Minify rendered chunks one at a time, as convert_stream yields them"""
+        from .minify import SGRMinifier
         
-        # Regular paragraph
-        return self._format_paragraph(line)
+        minifier = SGRMinifier()
+        for chunk in chunks:
+            yield self._minify_batch(chunk, minifier)
     
-    def _format_header(self, line: str) -> str:
-        """Format header lines"""
-        stripped = line.strip()
-        level = 0
-        while level < len(stripped) and stripped[level] == '#':
-            level += 1
+    def _minify_batch(self, text: str, minifier=None) -> str:
+        """Minify newline-joined rendered lines, continuing from minifier's state
+        
+        Minifying lines one by one or joined in batches gives the same
+        output, so every conversion path writes the same bytes.
+        """
+        if minifier is None:
+            from .minify import SGRMinifier
+            minifier = SGRMinifier()
+        size = len(text)
+        text = minifier.feed(text, whole=True) + minifier.line_break()
+        self.bytes_saved += size - len(text)
+        if self.stats is not None:
+            self.stats.bytes_saved += size - len(text)
+        return text
+    
+    def _render_text(self, text: str) -> Iterator[str]:
+        """Render a whole document, emitting each fenced code block in one piece
+        
+        Joining the chunks with newlines gives the same output as
+        convert_stream, but the closing fence of a code block is located
+        with str.find over the text instead of checking every line in it.
+        """
+        lines = text.split('\n')
+        count = len(lines)
+        render_line = self.render_line
+        index = offset = 0
+        
+        while index < count:
+            line = lines[index]
+            if '|' in line and index + 1 < count:
+                aligns = table_alignments(line, lines[index + 1])
+                if aligns is not None:
+                    end = table_end(lines, index + 2)
+                    yield from self._table_chunks(line, aligns, iter(lines[index + 2:end]))
+                    offset += sum(map(len, lines[index:end])) + end - index
+                    index = end
+                    continue
+            chunk, fence = render_line(line)
+            yield chunk
+            offset += len(line) + 1
+            index += 1
+            if fence is None:
+                continue
+            
+            close = find_closing_fence(text, offset, fence)
+            end = count if close < 0 else index + text.count('\n', offset, close)
+            if end > index:
+                yield self._format_code_block(lines[index:end], fence.info)
+            if close < 0:
+                return
+            yield self._format_code_block_end()
+            offset = close + len(lines[end]) + 1
+            index = end + 1
+    
+    def render_lines(self, lines: Sequence[str], start: int = 0,
+                     fence: Optional[Fence] = None) -> Iterator[Tuple[str, Optional[Fence]]]:
+        """Render lines[start:] one by one, yielding (chunk, state after the line)
+        
+        Like calling render_line on each line, except that tables are
+        recognized by looking ahead in lines. A table lies within one run of
+        consecutive paragraph lines, so start must not be in the middle of
+        such a run. Stop iterating once no more lines are needed.
+        """
+        render_line = self.render_line
+        count = len(lines)
+        index = start
+        while index < count:
+            line = lines[index]
+            if fence is None and '|' in line and index + 1 < count:
+                aligns = table_alignments(line, lines[index + 1])
+                if aligns is not None:
+                    end = table_end(lines, index + 2)
+                    for chunk in self._table_chunks(line, aligns, iter(lines[index + 2:end])):
+                        yield chunk, None
+                    index = end
+                    continue
+            chunk, fence = render_line(line, fence)
+            yield chunk, fence
+            index += 1
+    
+    def render_line(self, line: str, fence: Optional[Fence] = None) -> Tuple[str, Optional[Fence]]:
+        """Render one line given the code block state before it
+        
+        ``fence`` is None outside a code block, otherwise the Fence that
+        opened it. Returns the rendered line and the state after it.
+        """
+        if fence is not None:
+            if closes_fence(line, fence):
+                return self._format_code_block_end(), None
+            return self._format_code_line(line), fence
+        
+        # Process line based on markdown syntax
+        info = classify_line(line)
+        if info[0] == FENCE:
+            fence = info[2]
+            return self._format_code_block_start(fence.info), fence
+        return self._format_line(line, info), None
+    
+    # The formatters below take the content's inline formatting as ``formatted``
+    # when the caller already has it (ir.paint renders it from parsed tokens)
+    # and otherwise format it themselves.
+    
+    def _format_line(self, line: str, info: Optional[LineInfo] = None) -> str:
+        """Format a single line of markdown"""
+        if info is None:
+            info = classify_line(line)
+        kind = info[0]
         
-        header_text = stripped[level:].strip()
+        if kind == PARAGRAPH:
+            return self._format_paragraph(line, info)
+        if kind == BLANK:
+            return ''
+        if kind == LIST:
+            return self._format_list_item(line, info)
+        if kind == HEADER:
+            return self._format_header(line, info)
+        if kind == QUOTE:
+            return self._format_blockquote(line, info)
+        return self._format_horizontal_rule()
+    
+    def _format_header(self, line: str, info: Optional[LineInfo] = None,
+                       formatted: Optional[str] = None) -> str:
+        """Format header lines"""
+        if info is None:
+            info = classify_line(line)
+        level = info[2]
+        header_text = line[info[3]:].strip()
         
         if self.max_mode:
-            return self._format_header_max(header_text, level)
+            return self._format_header_max(header_text, level, formatted)
         else:
-            return self._format_header_normal(header_text, level)
+            return self._format_header_normal(header_text, level, formatted)
     
-    def _format_header_normal(self, header_text: str, level: int) -> str:
+    def _format_header_normal(self, header_text: str, level: int,
+                              formatted: Optional[str] = None) -> str:
         """Format header lines in normal mode"""
-        formatted_text = self._format_inline_elements(header_text)
+        formatted_text = self._format_inline_elements(header_text) if formatted is None else formatted
+        plan = self.plan
         
         # Add decorative elements based on header level
-        if level == 1:
-            border = '═' * (len(header_text) + 4)
-            return f"{self.theme.border_color}{border}{self.reset}\n{self.theme.header_color}  {formatted_text}  {self.reset}\n{self.theme.border_color}{border}{self.reset}"
-        elif level == 2:
-            border = '─' * (len(header_text) + 2)
-            return f"{self.theme.border_color}{border}{self.reset}\n{self.theme.header_color} {formatted_text} {self.reset}\n{self.theme.border_color}{border}{self.reset}"
-        else:
-            prefix = '▶' if level == 3 else '•'
-            return f"{self.theme.header_color}{prefix} {formatted_text}{self.reset}"
+        if level <= 2:
+            color, char, padding, prefix, suffix = plan.header_rules[level]
+            # Borders match the text as displayed, not the raw markdown
+            border_width = visible_width(formatted_text) + padding
+            title = f"{prefix}{formatted_text}{suffix}"
+            if self.width:
+                border_width = min(border_width, self.width)
+                title = wrap_ansi(title, self.width, prefix)
+            border = f"{color}{char * border_width}{self.reset}"
+            return f"{border}\n{title}\n{border}"
+        prefix, suffix = self._header_affixes(level)
+        return self._wrap(f"{prefix}{formatted_text}{suffix}", prefix)
+    
+    def _header_affixes(self, level: int):
+        """Get the precomputed (prefix, suffix) pair for an H3+ header"""
+        if 3 <= level <= MAX_PLANNED_LEVEL:
+            return self.plan.header_affixes[level]
+        return header_affixes(level, self.max_mode, self.theme)
     
-    def _format_header_max(self, header_text: str, level: int) -> str:
+    def _format_header_max(self, header_text: str, level: int,
+                           formatted: Optional[str] = None) -> str:
         """Format header lines in max mode with ASCII art"""
         # Use different ASCII art based on header level
-        if level == 1:
-            # Large ASCII art for H1
-            ascii_lines = generate_ascii_art(header_text, 'large')
-            # Add multiple color layers for extra flair
-            colors = [
-                ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
-            ]
-            
-            # Create border with gradient effect
-            border_width = max(len(line) for line in ascii_lines) + 4
-            top_border = f"{ANSIColors.BRIGHT_YELLOW}╔{'═' * border_width}╗{self.reset}"
-            bottom_border = f"{ANSIColors.BRIGHT_YELLOW}╚{'═' * border_width}╝{self.reset}"
-            
-            result = [top_border]
-            for i, line in enumerate(ascii_lines):
-                color = colors[i % len(colors)]
-                padded_line = line.ljust(border_width)
-                result.append(f"{ANSIColors.BRIGHT_YELLOW}║{color}{padded_line}{ANSIColors.BRIGHT_YELLOW}║{self.reset}")
-            result.append(bottom_border)
-            
-            return '\n'.join(result)
-            
-        elif level == 2:
-            # Medium ASCII art for H2
-            ascii_lines = generate_ascii_art(header_text, 'small')
-            colors = [
-                ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_BLUE + ANSIColors.BOLD,
-            ]
-            
-            border_width = max(len(line) for line in ascii_lines) + 2
-            top_border = f"{ANSIColors.BRIGHT_CYAN}┌{'─' * border_width}┐{self.reset}"
-            bottom_border = f"{ANSIColors.BRIGHT_CYAN}└{'─' * border_width}┘{self.reset}"
-            
-            result = [top_border]
-            for i, line in enumerate(ascii_lines):
-                color = colors[i % len(colors)]
-                padded_line = line.ljust(border_width)
-                result.append(f"{ANSIColors.BRIGHT_CYAN}│{color}{padded_line}{ANSIColors.BRIGHT_CYAN}│{self.reset}")
-            result.append(bottom_border)
-            
-            return '\n'.join(result)
-            
-        else:
-            # Enhanced regular headers for H3+
-            decorative_chars = ['◆', '◇', '◈', '◉', '◎']
-            char = decorative_chars[level % len(decorative_chars)]
-            enhanced_colors = [
-                ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_RED + ANSIColors.BOLD,
-            ]
-            color = enhanced_colors[level % len(enhanced_colors)]
-            
-            # Add some decorative elements
-            decoration = '▸' * (level - 2)
-            formatted_text = self._format_inline_elements(header_text)
-            
-            return f"{color}{decoration}{char} {formatted_text} {char}{decoration}{self.reset}"
+        if level <= 2:
+            from .fonts import render_ascii_header
+            # Large ASCII art for H1, medium for H2
+            font_size = 'large' if level == 1 else 'small'
+            art = render_ascii_header(header_text, font_size, self.theme.name, self.color_depth)
+            if self.width:
+                # Art cannot wrap: step down to the small font, then to a plain header
+                if font_size == 'large' and visible_width(art.split('\n', 1)[0]) > self.width:
+                    art = render_ascii_header(header_text, 'small', self.theme.name, self.color_depth)
+                if visible_width(art.split('\n', 1)[0]) <= self.width:
+                    return art
+            else:
+                return art
+        # Enhanced regular headers for H3+ (and H1/H2 too wide for the art)
+        prefix, suffix = self._header_affixes(level)
+        if formatted is None:
+            formatted = self._format_inline_elements(header_text)
+        
+        return self._wrap(f"{prefix}{formatted}{suffix}", prefix)
     
-    def _format_blockquote(self, line: str) -> str:
+    def _format_blockquote(self, line: str, info: Optional[LineInfo] = None,
+                           formatted: Optional[str] = None) -> str:
         """Format blockquote lines"""
-        content = line.strip()[1:].strip()
-        formatted_content = self._format_inline_elements(content)
+        if info is None:
+            info = classify_line(line)
+        content = line[info[3]:].strip()
+        formatted_content = self._format_inline_elements(content) if formatted is None else formatted
         
         if self.max_mode:
             # Enhanced blockquote with more decorative elements
-            decorative_chars = ['┃', '┋', '┊', '│', '║']
-            colors = [
-                ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
-            ]
-            char = decorative_chars[hash(content) % len(decorative_chars)]
-            color = colors[hash(content) % len(colors)]
-            return f"{color}{char} {formatted_content}{self.reset}"
+            prefixes = self.plan.quote_prefixes
+            prefix = prefixes[stable_hash(content) % len(prefixes)]
         else:
-            return f"{self.theme.quote_color}┃ {formatted_content}{self.reset}"
+            prefix = self.plan.quote_prefix
+        if self.width:
+            return wrap_ansi(f"{prefix}{formatted_content}{self.reset}", self.width, prefix)
+        return f"{prefix}{formatted_content}{self.reset}"
     
-    def _format_list_item(self, line: str) -> str:
+    def _format_list_item(self, line: str, info: Optional[LineInfo] = None,
+                          formatted: Optional[str] = None) -> str:
         """Format list item lines"""
-        # Determine indentation level
-        indent_match = re.match(r'^(\s*)', line)
-        indent = len(indent_match.group(1)) if indent_match else 0
-        
-        # Get list marker and content
-        content_match = re.match(r'^[\s]*[-*+]\s(.*)$', line)
-        if not content_match:
-            content_match = re.match(r'^[\s]*\d+\.\s(.*)$', line)
-        
-        if content_match:
-            content = content_match.group(1)
-            formatted_content = self._format_inline_elements(content)
-            
-            if self.max_mode:
-                # Enhanced list items with more decorative bullets
-                decorative_bullets = ['◆', '◇', '◈', '◉', '◎', '●', '○', '◐', '◑', '◒', '◓']
-                colors = [
-                    ANSIColors.BRIGHT_RED + ANSIColors.BOLD,
-                    ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
-                    ANSIColors.BRIGHT_BLUE + ANSIColors.BOLD,
-                    ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
-                    ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
-                    ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
-                ]
-                
-                bullet_index = (indent // 2) % len(decorative_bullets)
-                color_index = (indent // 2) % len(colors)
-                bullet = decorative_bullets[bullet_index]
-                color = colors[color_index]
-                
-                return f"{' ' * indent}{color}{bullet} {formatted_content}{self.reset}"
-            else:
-                bullet = '•' if indent == 0 else '◦'
-                return f"{' ' * indent}{self.theme.list_color}{bullet} {formatted_content}{self.reset}"
+        if info is None:
+            info = classify_line(line)
+        indent = info[1]
+        formatted_content = (self._format_inline_elements(line[info[3]:])
+                             if formatted is None else formatted)
+        prefixes = self.plan.list_prefixes
         
-        return line
+        if self.max_mode:
+            # Enhanced list items with more decorative bullets
+            prefix = prefixes[(indent // 2) % len(prefixes)]
+        else:
+            prefix = prefixes[0] if indent == 0 else prefixes[1]
+        item = f"{' ' * indent}{prefix}{formatted_content}{self.reset}"
+        if self.width:
+            # Hanging indent under the item's text
+            return wrap_ansi(item, self.width, ' ' * (indent + visible_width(prefix)))
+        return item
     
     def _format_horizontal_rule(self) -> str:
         """Format horizontal rule"""
-        if self.max_mode:
-            # Enhanced horizontal rule with gradient effect
-            chars = ['▀', '▄', '█', '▌', '▐', '░', '▒', '▓']
-            colors = [
-                ANSIColors.BRIGHT_RED,
-                ANSIColors.BRIGHT_YELLOW,
-                ANSIColors.BRIGHT_GREEN,
-                ANSIColors.BRIGHT_CYAN,
-                ANSIColors.BRIGHT_BLUE,
-                ANSIColors.BRIGHT_MAGENTA,
-            ]
-            
-            rule_parts = []
-            for i in range(80):
-                char = chars[i % len(chars)]
-                color = colors[i % len(colors)]
-                rule_parts.append(f"{color}{char}")
-            
-            return ''.join(rule_parts) + self.reset
-        else:
-            return f"{self.theme.border_color}{'─' * 60}{self.reset}"
+        if self.width:
+            return truncate_ansi(self.plan.horizontal_rule, self.width)
+        return self.plan.horizontal_rule
     
-    def _format_paragraph(self, line: str) -> str:
+    def _format_paragraph(self, line: str, info: Optional[LineInfo] = None,
+                          formatted: Optional[str] = None) -> str:
         """Format regular paragraph text"""
-        if not line.strip():
+        if info is None and not line.strip():
             return ''
         
-        formatted_line = self._format_inline_elements(line)
-        return f"{self.theme.text_color}{formatted_line}{self.reset}"
+        formatted_line = self._format_inline_elements(line) if formatted is None else formatted
+        if self.width:
+            return wrap_ansi(f"{self.plan.paragraph_prefix}{formatted_line}{self.reset}", self.width)
+        return f"{self.plan.paragraph_prefix}{formatted_line}{self.reset}"
+    
+    def _wrap(self, text: str, prefix: str) -> str:
+        """Wrap a header line when a width is set, indenting continuations past the prefix"""
+        if not self.width:
+            return text
+        return wrap_ansi(text, self.width, ' ' * visible_width(prefix))
     
     def _format_inline_elements(self, text: str) -> str:
         """Format inline markdown elements (bold, italic, code, links)"""
         if not text:
             return ''
         
-        if self.max_mode:
-            # Enhanced inline formatting with more colors and effects
-            # Bold text (**text** or __text__)
-            text = re.sub(r'\*\*([^*]+)\*\*', f'{ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD + ANSIColors.BLINK}\\1{self.theme.text_color}', text)
-            text = re.sub(r'__([^_]+)__', f'{ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD + ANSIColors.BLINK}\\1{self.theme.text_color}', text)
-            
-            # Italic text (*text* or _text_)
-            text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', f'{ANSIColors.BRIGHT_MAGENTA + ANSIColors.ITALIC + ANSIColors.UNDERLINE}\\1{self.theme.text_color}', text)
-            text = re.sub(r'(?<!_)_([^_]+)_(?!_)', f'{ANSIColors.BRIGHT_MAGENTA + ANSIColors.ITALIC + ANSIColors.UNDERLINE}\\1{self.theme.text_color}', text)
-            
-            # Inline code (`code`)
-            text = re.sub(r'`([^`]+)`', f'{ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD + ANSIColors.BG_BLACK}\\1{self.theme.text_color}', text)
-            
-            # Links [text](url)
-            text = re.sub(r'\[([^\]]+)\]\([^)]+\)', f'{ANSIColors.BRIGHT_CYAN + ANSIColors.UNDERLINE + ANSIColors.BLINK}\\1{self.theme.text_color}', text)
-        else:
-            # Normal formatting
-            # Bold text (**text** or __text__)
-            text = re.sub(r'\*\*([^*]+)\*\*', f'{self.theme.strong_color}\\1{self.theme.text_color}', text)
-            text = re.sub(r'__([^_]+)__', f'{self.theme.strong_color}\\1{self.theme.text_color}', text)
-            
-            # Italic text (*text* or _text_)
-            text = re.sub(r'(?<!\*)\*([^*]+)\*(?!\*)', f'{self.theme.emphasis_color}\\1{self.theme.text_color}', text)
-            text = re.sub(r'(?<!_)_([^_]+)_(?!_)', f'{self.theme.emphasis_color}\\1{self.theme.text_color}', text)
-            
-            # Inline code (`code`)
-            text = re.sub(r'`([^`]+)`', f'{self.theme.code_color}\\1{self.theme.text_color}', text)
-            
-            # Links [text](url)
-            text = re.sub(r'\[([^\]]+)\]\([^)]+\)', f'{self.theme.link_color}\\1{self.theme.text_color}', text)
+        return format_inline(text, self.inline_palette)
+    
+    def _stream_table(self, header: str, aligns: List[int], lines: Iterator[str]):
+        """Render a table whose rows come from a stream of lines
         
-        return text
+        Returns (as the generator's value) the line that ended the table,
+        or None if the stream ended first.
+        """
+        ended = []
+        
+        def rows():
+            for row in lines:
+                if not is_table_row(row):
+                    ended.append(row)
+                    return
+                yield row
+        
+        yield from self._table_chunks(header, aligns, rows())
+        return ended[0] if ended else None
+    
+    def _table_chunks(self, header: str, aligns: List[int], rows: Iterator[str]) -> Iterator[str]:
+        """Render a table one chunk per source line, from its header and body rows
+        
+        Only the first TABLE_SAMPLE_ROWS body rows are held, to size the
+        columns; the rest are rendered as they come.
+        """
+        sample = list(islice(rows, TABLE_SAMPLE_ROWS))
+        layout, cells = self._measure_table(header, aligns, sample)
+        yield layout.header_chunk(cells[0])
+        yield layout.delimiter_chunk(bool(sample))
+        
+        # Each row is rendered once the next is known, so the last gets the bottom border
+        columns = len(aligns)
+        table_cells = self._table_cells
+        pending = chain(islice(cells, 1, None), (table_cells(row, columns) for row in rows))
+        previous = next(pending, None)
+        for current in pending:
+            yield layout.row_chunk(previous, False)
+            previous = current
+        if previous is not None:
+            yield layout.row_chunk(previous, True)
+    
+    def _measure_table(self, header: str, aligns: List[int],
+                       rows: Sequence[str]) -> Tuple[TableLayout, List[List[Cell]]]:
+        """Format the header and rows of a table and size its columns in one pass
+        
+        Returns the layout and the formatted cells, header row first.
+        """
+        columns = len(aligns)
+        palette = self.inline_palette
+        cells = [self._table_cells(header, columns, palette[:4] + (self.plan.table_header,))]
+        cells.extend([self._table_cells(row, columns) for row in rows])
+        widths = [1] * columns
+        for row in cells:
+            for column, (_, width) in enumerate(row):
+                if width > widths[column]:
+                    widths[column] = width
+        if self.width:
+            widths = fit_widths(widths, self.width - 3 * columns - 1)
+        return TableLayout(self.plan, aligns, widths), cells
+    
+    def _table_cells(self, line: str, columns: int, palette=None) -> List[Cell]:
+        """Inline-formatted cells of a table row and their display widths
+        
+        Missing cells are empty and cells past the header's count are dropped.
+        """
+        palette = palette or self.inline_palette
+        escapes = '\x1b' in line
+        cells = []
+        for cell in split_row(line)[:columns]:
+            if escapes or has_markup(cell):
+                text = format_inline(cell, palette)
+                cells.append((text, visible_width(text)))
+            else:
+                cells.append((cell, display_width(cell)))
+        if len(cells) < columns:
+            cells.extend([('', 0)] * (columns - len(cells)))
+        return cells
     
     def _format_code_block_start(self, lang: str) -> str:
         """Format start of code block"""
         lang_display = f" ({lang})" if lang else ""
+        plan = self.plan
         
+        prefixes = plan.code_start_prefixes
+        prefix = prefixes[stable_hash(lang) % len(prefixes)] if self.max_mode else prefixes[0]
+        fill = plan.code_start_fill * (50 - len(lang_display))
         if self.max_mode:
-            # Enhanced code block borders
-            border_chars = ['╔', '╗', '╠', '╣', '╚', '╝', '═', '║']
-            colors = [
-                ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
-            ]
-            
-            color = colors[hash(lang) % len(colors)]
-            border = '═' * (50 - len(lang_display))
-            return f"{color}╔─ CODE{lang_display} ─{border}╗{self.reset}"
+            start = f"{prefix}{lang_display} ─{fill}╗{self.reset}"
         else:
-            return f"{self.theme.border_color}┌─ CODE{lang_display} ─{'─' * (50 - len(lang_display))}{self.reset}"
+            start = f"{prefix}{lang_display} ─{fill}{self.reset}"
+        return truncate_ansi(start, self.width) if self.width else start
     
     def _format_code_block_end(self) -> str:
         """Format end of code block"""
-        if self.max_mode:
-            colors = [
-                ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
-            ]
-            color = colors[0]  # Use consistent color
-            return f"{color}╚{'═' * 60}╝{self.reset}"
-        else:
-            return f"{self.theme.border_color}└─{'─' * 58}{self.reset}"
+        if self.width:
+            return truncate_ansi(self.plan.code_block_end, self.width)
+        return self.plan.code_block_end
     
     def _format_code_line(self, line: str) -> str:
         """Format a line inside a code block"""
-        if self.max_mode:
-            colors = [
-                ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
-                ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
-            ]
-            border_color = colors[0]
-            return f"{border_color}║{self.reset} {self.theme.code_color}{line}{self.reset}"
-        else:
-            return f"{self.theme.border_color}│{self.reset} {self.theme.code_color}{line}{self.reset}"
\ No newline at end of file
+        return f"{self.plan.code_line_prefix}{line}{self.reset}"
+    
+    def _format_code_block(self, lines: List[str], info: str = '') -> str:
+        """Format consecutive code block lines as one chunk"""
+        plan = self.plan
+        if self.highlight:
+            lines = self._highlight_code(lines, info)
+        return f"{plan.code_line_prefix}{plan.code_line_separator.join(lines)}{self.reset}"
+    
+    def _code_block_lines(self, lines: List[str], info: str = '') -> List[str]:
+        """Format code block lines as one chunk per line"""
+        if info:
+            lines = self._highlight_code(lines, info)
+        prefix = self.plan.code_line_prefix
+        reset = self.reset
+        return [f"{prefix}{line}{reset}" for line in lines]
+    
+    def _highlight_code(self, lines: List[str], info: str) -> List[str]:
+        """Highlight code block lines; unknown languages and oversized blocks stay plain"""
+        from .highlight import highlight_block
+        return highlight_block(lines, info, self.theme) or lines
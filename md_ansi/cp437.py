@@ -0,0 +1,170 @@
+"""
+CP437 output and SAUCE records for BBS software and ANSI art viewers
+
+encode_cp437 encodes whole chunks through the C charmap encoder; only the
+runs of characters CP437 lacks reach the error handler, which maps them
+with CP437_TABLE (the bullets, arrows and heavy or dashed lines the themes
+use) and falls back to fallback_text for anything else. SauceCounter
+measures encoded output as it is written so that a SAUCE record with its
+size, width and line count can be appended without holding the output.
+"""
+
+import codecs
+import datetime
+import re
+import struct
+import unicodedata
+from typing import Callable, Dict, Optional
+from .width import display_width
+
+
+# Substitutes for the theme glyphs CP437 has no code for. The block and
+# double or light box-drawing characters of the fonts, borders and tables
+# (▀▄█░▒▓ ═║╔ ─│┌ ...) are all in CP437 and encode as themselves.
+CP437_SUBSTITUTES = {
+    '•': '∙', '◦': '°', '◇': '°',
+    '●': '■', '◉': '■', '◆': '■', '◈': '■', '◐': '■', '◑': '■', '◒': '■', '◓': '■',
+    '○': 'o', '◎': 'o',
+    '▶': '»', '▸': '»',
+    '┃': '║', '┊': '│', '┋': '│',
+    # Typographic punctuation common in prose
+    '‘': "'", '’': "'", '‚': "'", '“': '"', '”': '"', '„': '"', '–': '-', '—': '-',
+}
+
+CP437_TABLE = str.maketrans(CP437_SUBSTITUTES)
+
+# Error handler name for encoding to CP437 with the substitutes and fallback
+CP437_ERRORS = 'md_ansi.cp437'
+
+# C encoding map of the 256 CP437 characters; codecs' own cp437 module
+# encodes through a dict, several times slower
+_ENCODING_MAP = codecs.charmap_build(bytes(range(256)).decode('cp437'))
+
+# Characters already run through fallback_text
+_fallbacks: Dict[str, bytes] = {}
+
+
+def fallback_text(char: str) -> str:
+    """CP437 stand-in for a character with no code or substitute
+
+    The character's compatibility decomposition without the characters
+    CP437 lacks (so 'ā' becomes 'a') when that keeps its display width,
+    else one '?' per column (so 'ﬀ', whose decomposition 'ff' is wider, is
+    '?'), so that wrapped lines and table columns stay aligned.
+    """
+    width = display_width(char)
+    decomposed = ''.join(part for part in unicodedata.normalize('NFKD', char)
+                         if part.encode('cp437', 'ignore'))
+    if decomposed and display_width(decomposed) == width:
+        return decomposed
+    return '?' * width
+
+
+def _encode_error(error: UnicodeError):
+    """codecs error handler: substitute a run of characters CP437 lacks"""
+    if not isinstance(error, UnicodeEncodeError):
+        raise error
+    out = []
+    for char in error.object[error.start:error.end].translate(CP437_TABLE):
+        data = _fallbacks.get(char)
+        if data is None:
+            try:
+                data = codecs.charmap_encode(char, 'strict', _ENCODING_MAP)[0]
+            except UnicodeEncodeError:
+                data = codecs.charmap_encode(fallback_text(char), 'replace', _ENCODING_MAP)[0]
+            _fallbacks[char] = data
+        out.append(data)
+    return b''.join(out), error.end
+
+
+codecs.register_error(CP437_ERRORS, _encode_error)
+
+
+def encode_cp437(text: str) -> bytes:
+    """Encode text as CP437, substituting the characters it lacks"""
+    return codecs.charmap_encode(text, CP437_ERRORS, _ENCODING_MAP)[0]
+
+
+# SAUCE (Standard Architecture for Universal Comment Extensions) record: the
+# 128 bytes ANSI viewers and BBS software read from the end of a file
+SAUCE_SIZE = 128
+
+# DataType 1 (character), FileType 1 (ANSi)
+SAUCE_DATA_TYPE = 1
+SAUCE_FILE_TYPE = 1
+
+# Font name recorded in TInfoS
+SAUCE_FONT = 'IBM VGA'
+
+_SAUCE = struct.Struct('<5s2s35s20s20s8sIBBHHHHBB22s')
+
+# SGR sequences, which take no columns
+_ESCAPE_RE = re.compile(rb'\x1b\[[0-9;]*m')
+
+
+def sauce_record(size: int, width: int, lines: int, title: str = '', author: str = '',
+                 group: str = '', date: Optional[datetime.date] = None) -> bytes:
+    """The end-of-file marker and SAUCE record for size bytes of ANSi text
+
+    width and lines are the columns and rows the text needs; date defaults
+    to today. Text fields are encoded as CP437 and cut to fit.
+    """
+    date = date or datetime.date.today()
+
+    def field(text, length):
+        return encode_cp437(text)[:length].ljust(length, b' ')
+
+    record = _SAUCE.pack(
+        b'SAUCE', b'00', field(title, 35), field(author, 20), field(group, 20),
+        date.strftime('%Y%m%d').encode('ascii'), min(size, 0xFFFFFFFF),
+        SAUCE_DATA_TYPE, SAUCE_FILE_TYPE, min(width, 0xFFFF), min(lines, 0xFFFF), 0, 0,
+        0, 0, SAUCE_FONT.encode('ascii'))
+    return b'\x1a' + record
+
+
+class SauceCounter:
+    """Count the bytes, lines and widest line of encoded output as it is written
+
+    write passes each chunk on to the wrapped writer (if any). Widths are
+    byte counts less SGR sequences, which is the column count for CP437
+    output. The unfinished last line of a chunk is carried over, so chunks
+    may split lines and escape sequences anywhere.
+    """
+
+    __slots__ = ('_write', 'size', 'lines', 'width', '_tail')
+
+    def __init__(self, write: Optional[Callable[[bytes], object]] = None):
+        self._write = write
+        self.size = 0
+        self.lines = 0
+        self.width = 0
+        self._tail = b''
+
+    def write(self, data: bytes) -> None:
+        """Count a chunk and write it through"""
+        if self._write is not None:
+            self._write(data)
+        self.size += len(data)
+        end = data.rfind(b'\n')
+        if end < 0:
+            self._tail += data
+            return
+        lines = (self._tail + data[:end]).split(b'\n')
+        self._tail = data[end + 1:]
+        self.lines += len(lines)
+        # Escapes only make a line shorter, so lines are measured longest
+        # first, until one is no longer than the widest found
+        width = self.width
+        for line in sorted(lines, key=len, reverse=True):
+            if len(line) <= width:
+                break
+            width = max(width, len(_ESCAPE_RE.sub(b'', line)))
+        self.width = width
+
+    def record(self, title: str = '', date: Optional[datetime.date] = None) -> bytes:
+        """The end-of-file marker and SAUCE record for everything written so far"""
+        lines, width = self.lines, self.width
+        if self._tail:
+            lines += 1
+            width = max(width, len(_ESCAPE_RE.sub(b'', self._tail)))
+        return sauce_record(self.size, width, lines, title, date=date)
@@ -0,0 +1,162 @@
+"""
+ASCII art fonts and cached header rendering for max mode
+
+Imported on first use, so plain conversions never load the font tables.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from .plan import MAX_H1_COLORS, MAX_H2_COLORS
+from .styles import ANSIColors
+
+
+# Bound on the number of rendered ASCII art header blocks kept in memory
+HEADER_CACHE_SIZE = 4096
+
+
+def _normalize_font(font: Dict[str, List[str]]) -> Dict[str, Tuple[str, ...]]:
+    """Pad every glyph to a fixed-width tuple of rows"""
+    normalized = {}
+    for char, rows in font.items():
+        width = max(len(row) for row in rows)
+        normalized[char] = tuple(row.ljust(width) for row in rows)
+    return normalized
+
+
+# ASCII art font definitions for max mode
+ASCII_FONT_SMALL = _normalize_font({
+    'A': ['▄▀█', '█▄▄'],
+    'B': ['█▄▄', '█▄█'],
+    'C': ['▄▀█', '█▄▄'],
+    'D': ['█▀▄', '█▄▀'],
+    'E': ['█▀▀', '█▄▄'],
+    'F': ['█▀▀', '█▀▀'],
+    'G': ['▄▀█', '█▄█'],
+    'H': ['█▄█', '█▀█'],
+    'I': ['█', '█'],
+    'J': ['  █', '█▄█'],
+    'K': ['█▄▀', '█▀▄'],
+    'L': ['█  ', '█▄▄'],
+    'M': ['█▄█', '█▀█'],
+    'N': ['█▄█', '█▀█'],
+    'O': ['▄▀█', '█▄█'],
+    'P': ['█▀▄', '█▀▀'],
+    'Q': ['▄▀█', '█▄█'],
+    'R': ['█▀▄', '█▀▄'],
+    'S': ['▄▀▀', '▄▄█'],
+    'T': ['▀█▀', ' █ '],
+    'U': ['█▄█', '█▄█'],
+    'V': ['█▄█', ' █ '],
+    'W': ['█▄█', '█▄█'],
+    'X': ['█▄█', '█▀█'],
+    'Y': ['█▄█', ' █ '],
+    'Z': ['▀▀█', '█▄▄'],
+    ' ': [' ', ' '],
+    '1': ['█', '█'],
+    '2': ['▀▀█', '█▄▄'],
+    '3': ['▀▀█', '▄▄█'],
+    '4': ['█▄█', '  █'],
+    '5': ['█▀▀', '▄▄█'],
+    '6': ['█▀▀', '█▄█'],
+    '7': ['▀▀█', '  █'],
+    '8': ['█▄█', '█▄█'],
+    '9': ['█▄█', '▄▄█'],
+    '0': ['█▄█', '█▄█'],
+})
+
+ASCII_FONT_LARGE = _normalize_font({
+    'A': ['  ▄▀█  ', ' █▄▄█ ', '█▀   ▀█'],
+    'B': ['█▀▀▀▀▄', '█▄▄▄▄▀', '█▄▄▄▄▀'],
+    'C': [' ▄▀▀▀▀▄', '█▀     ', '█▄▄▄▄▄▀'],
+    'D': ['█▀▀▀▀▄ ', '█     █', '█▄▄▄▄▀ '],
+    'E': ['█▀▀▀▀▀▀', '█▄▄▄▄▄ ', '█▄▄▄▄▄▄'],
+    'F': ['█▀▀▀▀▀▀', '█▄▄▄▄▄ ', '█      '],
+    'G': [' ▄▀▀▀▀▄ ', '█▀   ▄▄', '█▄▄▄▄▀█'],
+    'H': ['█▄   ▄█', '█▀▀▀▀▀█', '█     █'],
+    'I': ['█', '█', '█'],
+    'J': ['     █', '     █', '█▄▄▄▄▀'],
+    'K': ['█▄  ▄▀', '█▀▀▀▄ ', '█   ▀▄'],
+    'L': ['█      ', '█      ', '█▄▄▄▄▄▄'],
+    'M': ['█▄   ▄█', '█▀▀▀▀▀█', '█     █'],
+    'N': ['█▄   ▄█', '█▀▀▀▀▀█', '█     █'],
+    'O': [' ▄▀▀▀▀▄ ', '█▀   ▀█', '█▄▄▄▄▄▀'],
+    'P': ['█▀▀▀▀▄ ', '█▄▄▄▄▀ ', '█      '],
+    'Q': [' ▄▀▀▀▀▄ ', '█▀   ▀█', '█▄▄▄▄▄▀'],
+    'R': ['█▀▀▀▀▄ ', '█▄▄▄▄▀ ', '█   ▀▄ '],
+    'S': [' ▄▀▀▀▀▄', '█▄▄▄▄▄ ', '▄▄▄▄▄▀█'],
+    'T': ['▀▀▀█▀▀▀', '   █   ', '   █   '],
+    'U': ['█▄   ▄█', '█▀   ▀█', '█▄▄▄▄▄▀'],
+    'V': ['█▄   ▄█', '█▀▄ ▄▀█', '  ▀█▀  '],
+    'W': ['█▄   ▄█', '█▀▀▀▀▀█', '█▄   ▄█'],
+    'X': ['█▄   ▄█', ' ▀▄▄▄▀ ', '█▀   ▀█'],
+    'Y': ['█▄   ▄█', ' ▀▄▄▄▀ ', '   █   '],
+    'Z': ['▀▀▀▀▀▀█', '  ▄▄▄▀ ', '█▄▄▄▄▄▄'],
+    ' ': ['   ', '   ', '   '],
+    '1': [' █', ' █', ' █'],
+    '2': [' ▄▀▀▀▄', '▄▄▄▄▄▀', '█▄▄▄▄▄'],
+    '3': [' ▄▀▀▀▄', '▄▄▄▄▄▀', '▄▄▄▄▄▀'],
+    '4': ['█▄   █', '▀▀▀▀▀█', '     █'],
+    '5': ['█▀▀▀▀▀', '█▄▄▄▄▄', '▄▄▄▄▄▀'],
+    '6': ['█▀▀▀▀▀', '█▄▄▄▄▄', '█▄▄▄▄▄'],
+    '7': ['▀▀▀▀▀█', '     █', '     █'],
+    '8': ['█▄▄▄▄█', '█▄▄▄▄█', '█▄▄▄▄█'],
+    '9': ['█▄▄▄▄█', '▀▀▀▀▀█', '▄▄▄▄▄▀'],
+    '0': ['█▄▄▄▄█', '█▄▄▄▄█', '█▄▄▄▄█'],
+})
+
+
+def generate_ascii_art(text: str, font_size: str = 'small') -> List[str]:
+    """Generate ASCII art from text using the specified font size"""
+    font = ASCII_FONT_SMALL if font_size == 'small' else ASCII_FONT_LARGE
+    blank = font[' ']
+    glyphs = [font.get(char, blank) for char in text.upper()]
+    
+    # Glyph rows are fixed width, so each output row is a single join
+    return [''.join([glyph[i] + ' ' for glyph in glyphs]) for i in range(len(blank))]
+
+
+@lru_cache(maxsize=HEADER_CACHE_SIZE)
+def render_ascii_header(text: str, font_size: str, theme_name: str, depth: str = '16') -> str:
+    """Render a complete boxed ASCII art header block (cached)
+    
+    Large font blocks are used for H1 and small font blocks for H2. Above
+    16-color depth each row fades into the next row's color.
+    """
+    ascii_lines = generate_ascii_art(text, font_size)
+    reset = ANSIColors.RESET
+    if font_size == 'large':
+        # Add multiple color layers for extra flair
+        colors = MAX_H1_COLORS
+        edge = ANSIColors.BRIGHT_YELLOW
+        top, bottom, side, rule, padding = '╔╗', '╚╝', '║', '═', 4
+    else:
+        colors = MAX_H2_COLORS
+        edge = ANSIColors.BRIGHT_CYAN
+        top, bottom, side, rule, padding = '┌┐', '└┘', '│', '─', 2
+    
+    border_width = max(len(line) for line in ascii_lines) + padding
+    border = rule * border_width
+    result = [f"{edge}{top[0]}{border}{top[1]}{reset}"]
+    if depth != '16':
+        from .colors import basic_rgb, paint_gradient
+    for i, line in enumerate(ascii_lines):
+        color = colors[i % len(colors)]
+        line = line.ljust(border_width)
+        if depth != '16':
+            stops = (basic_rgb(color), basic_rgb(colors[(i + 1) % len(colors)]))
+            line = paint_gradient(line, stops, depth)
+            color = ANSIColors.BOLD
+        result.append(f"{edge}{side}{color}{line}{edge}{side}{reset}")
+    result.append(f"{edge}{bottom[0]}{border}{bottom[1]}{reset}")
+    
+    return '\n'.join(result)
+
+
+def header_cache_info():
+    """Hit/miss counters for the rendered ASCII art header cache"""
+    return render_ascii_header.cache_info()
+
+
+def clear_header_cache() -> None:
+    """Drop all cached ASCII art header blocks"""
+    render_ascii_header.cache_clear()
@@ -0,0 +1,175 @@
+"""
+Stdlib-only syntax highlighting for fenced code blocks
+
+Each language is a list of (token kind, regex) rules. The rules are joined
+into one pattern, compiled the first time a block in that language is
+highlighted and kept in a registry. A block is tokenized as a whole, so
+tokens such as triple-quoted strings may span lines.
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+from .styles import ANSIColors, StyleTheme
+
+
+# Token kinds, used as indexes into a theme's syntax palette
+KEYWORD = 0
+STRING = 1
+COMMENT = 2
+NUMBER = 3
+CONSTANT = 4
+KEY = 5
+HEADING = 6
+ADDED = 7
+REMOVED = 8
+
+# Blocks larger than this many characters keep the plain code color
+HIGHLIGHT_MAX_CHARS = 64 * 1024
+
+Rules = Sequence[Tuple[int, str]]
+
+_PYTHON = (
+    (COMMENT, r'#[^\n]*'),
+    (STRING, r'[rRbBuUfF]{0,2}(?:"""[\s\S]*?(?:"""|\Z)|\'\'\'[\s\S]*?(?:\'\'\'|\Z)'
+             r'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')'),
+    (KEYWORD, r'\b(?:and|as|assert|async|await|break|class|continue|def|del|elif|else|except'
+              r'|finally|for|from|global|if|import|in|is|lambda|nonlocal|not|or|pass|raise'
+              r'|return|try|while|with|yield)\b'),
+    (CONSTANT, r'\b(?:True|False|None|self|cls)\b|@[\w.]+'),
+    (NUMBER, r'\b(?:0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+'
+             r'|\d[\d_]*(?:\.\d[\d_]*)?(?:[eE][+-]?\d+)?j?)\b'),
+)
+
+_JSON = (
+    (KEY, r'"(?:\\.|[^"\\\n])*"(?=\s*:)'),
+    (STRING, r'"(?:\\.|[^"\\\n])*"'),
+    (CONSTANT, r'\b(?:true|false|null)\b'),
+    (NUMBER, r'-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b'),
+)
+
+_SHELL = (
+    (COMMENT, r'(?<!\S)#[^\n]*'),
+    (STRING, r'"(?:\\[\s\S]|[^"\\])*"|\'[^\']*\''),
+    (CONSTANT, r'\$(?:\{[^}\n]*\}|\w+|[@*#?$!-])'),
+    (KEYWORD, r'\b(?:if|then|else|elif|fi|for|while|until|do|done|case|esac|in|function'
+              r'|select|return|export|local|readonly|source|sudo)\b'),
+)
+
+_DIFF = (
+    (HEADING, r'^(?:diff |index |--- |\+\+\+ |@@)[^\n]*'),
+    (ADDED, r'^\+[^\n]*'),
+    (REMOVED, r'^-[^\n]*'),
+)
+
+_YAML = (
+    (COMMENT, r'(?<!\S)#[^\n]*'),
+    (HEADING, r'^(?:---|\.\.\.)[ \t]*$'),
+    (KEY, r'[\w.\-/]+(?=:(?:[ \t]|$))'),
+    (STRING, r'"(?:\\.|[^"\\\n])*"|\'(?:\'\'|[^\'\n])*\''),
+    (CONSTANT, r'\b(?:true|false|null|yes|no|on|off|True|False|Null)\b|[&*][\w\-]+'),
+    (NUMBER, r'(?<![\w.])-?\d+(?:\.\d+)?\b'),
+)
+
+# Language (or alias) -> rules; see register_language
+LANGUAGES: Dict[str, Rules] = {}
+
+# Language -> (compiled pattern, token kind per group), filled on first use
+_LEXERS: Dict[str, Tuple[re.Pattern, Tuple[Optional[int], ...]]] = {}
+
+# (theme name, color depth) -> (theme, colors per token kind)
+_PALETTES: Dict[Tuple[str, str], Tuple[StyleTheme, Tuple[str, ...]]] = {}
+
+
+def register_language(name: str, rules: Rules, aliases: Sequence[str] = ()) -> None:
+    """Add or replace the rules for a language and its aliases
+
+    Rules are tried in order at each position; patterns must not contain
+    capturing groups, and are compiled with re.MULTILINE.
+    """
+    for key in (name, *aliases):
+        LANGUAGES[key.lower()] = rules
+        _LEXERS.pop(key.lower(), None)
+
+
+register_language('python', _PYTHON, ('py', 'python3', 'py3'))
+register_language('json', _JSON, ('jsonc', 'geojson'))
+register_language('shell', _SHELL, ('sh', 'bash', 'zsh', 'console', 'shell-session'))
+register_language('diff', _DIFF, ('patch', 'udiff'))
+register_language('yaml', _YAML, ('yml',))
+
+
+def get_lexer(info: str) -> Optional[Tuple[re.Pattern, Tuple[Optional[int], ...]]]:
+    """Get the compiled lexer for a fence info string, or None if unsupported"""
+    words = info.split()
+    if not words:
+        return None
+    language = words[0].lower()
+    lexer = _LEXERS.get(language)
+    if lexer is None:
+        rules = LANGUAGES.get(language)
+        if rules is None:
+            return None
+        pattern = re.compile('|'.join(f'({regex})' for _, regex in rules), re.MULTILINE)
+        lexer = _LEXERS[language] = (pattern, (None,) + tuple(kind for kind, _ in rules))
+    return lexer
+
+
+def syntax_palette(theme: StyleTheme) -> Tuple[str, ...]:
+    """Colors per token kind for a theme (cached per theme and depth)"""
+    key = (theme.name, theme.color_depth)
+    cached = _PALETTES.get(key)
+    if cached is not None and cached[0] is theme:
+        return cached[1]
+    palette = (
+        theme.strong_color,    # KEYWORD
+        theme.emphasis_color,  # STRING
+        theme.quote_color,     # COMMENT
+        theme.list_color,      # NUMBER
+        theme.border_color,    # CONSTANT
+        theme.header_color,    # KEY
+        theme.header_color,    # HEADING
+        theme.added_color,     # ADDED
+        theme.removed_color,   # REMOVED
+    )
+    _PALETTES[key] = (theme, palette)
+    return palette
+
+
+def highlight_block(lines: Sequence[str], info: str, theme: StyleTheme,
+                    max_chars: Optional[int] = None) -> Optional[List[str]]:
+    """Highlight the lines of a code block as one text
+
+    Returns the painted lines, each ready to go between a code line prefix
+    and a reset, or None when the language is unknown or the block is over
+    max_chars (default HIGHLIGHT_MAX_CHARS; the caller then renders it plainly).
+    """
+    if max_chars is None:
+        max_chars = HIGHLIGHT_MAX_CHARS
+    lexer = get_lexer(info)
+    if lexer is None or not lines or sum(map(len, lines)) + len(lines) > max_chars:
+        return None
+    pattern, kinds = lexer
+    palette = syntax_palette(theme)
+    # Each token is followed by a reset, then the block's own color again
+    restore = ANSIColors.RESET + theme.code_color
+
+    text = '\n'.join(lines)
+    out = []
+    pos = 0
+    for match in pattern.finditer(text):
+        start = match.start()
+        if start == match.end():
+            continue
+        if start > pos:
+            out.append(text[pos:start])
+        color = palette[kinds[match.lastindex]]
+        token = match.group()
+        if '\n' in token:
+            # The line prefix resets colors, so continue the token after it
+            token = token.replace('\n', '\n' + color)
+        out.append(color)
+        out.append(token)
+        out.append(restore)
+        pos = match.end()
+    out.append(text[pos:])
+    return ''.join(out).split('\n')
@@ -0,0 +1,132 @@
+"""
+Incremental re-rendering for live preview and editor integration
+"""
+
+from typing import List, Optional, Sequence, Tuple
+from .classify import Fence
+from .converter import MarkdownToANSIConverter
+from .tables import is_table_row
+
+
+class IncrementalConverter:
+    """Keep a rendered document up to date as its source lines are edited
+
+    Every source line renders to one chunk (see
+    MarkdownToANSIConverter.render_lines), and rendering only depends on the
+    code block state at the line boundary, plus, for tables, the other lines
+    of the same run of paragraph lines. An edit therefore re-renders the
+    replaced lines (from the start of their paragraph run), then keeps going
+    only until the code block state matches the previous render again and
+    the run has ended.
+
+    With a highlighting converter, each line of a code block depends on the
+    whole block, so any code block the re-rendered lines fall in is
+    highlighted again whole and the changed range grows to cover it.
+
+    Minifying is supported by output only: whether an SGR sequence is
+    redundant depends on all the output before it, so the chunks in rendered
+    (and the ranges edits return) stay unminified. Each of them draws the
+    same as its minified form, so they can still be repainted on their own.
+    """
+
+    def __init__(self, style_name='beach', max_mode=False,
+                 converter: Optional[MarkdownToANSIConverter] = None):
+        self.converter = converter or MarkdownToANSIConverter(style_name, max_mode=max_mode)
+        self.lines: List[str] = []
+        self.rendered: List[str] = []
+        # states[i] is the code block state before line i; one entry per boundary
+        self.states: List[Optional[Fence]] = [None]
+
+    def set_text(self, markdown_text: str) -> Tuple[int, int]:
+        """Render a whole document, returning the range of changed chunks"""
+        return self.apply_edit(0, len(self.lines), markdown_text.split('\n'))
+
+    def apply_edit(self, start: int, stop: int, new_lines: Sequence[str]) -> Tuple[int, int]:
+        """Replace source lines [start, stop) with new_lines
+
+        Returns the (start, stop) range of chunk indexes, in the updated
+        document, whose rendered output changed. Chunks after that range keep
+        their output but shift by len(new_lines) - (stop - start).
+        """
+        count = len(self.lines)
+        if not 0 <= start <= stop <= count:
+            raise IndexError(f"edit range {start}:{stop} outside document of {count} lines")
+
+        lines = self.lines
+        states = self.states
+        # Whether the line before the first one after the edit was a table row,
+        # so that line may have continued a table starting at or before the edit
+        joined = stop > 0 and states[stop - 1] is None and is_table_row(lines[stop - 1])
+        lines[start:stop] = new_lines
+        shift = len(new_lines) - (stop - start)
+        end = start + len(new_lines)
+
+        # A table lies within one run of paragraph lines and any of its rows
+        # can change every other, so start over from the run the edit joins
+        begin = start
+        while begin > 0 and states[begin - 1] is None and is_table_row(lines[begin - 1]):
+            begin -= 1
+
+        chunks = []
+        after = []
+        line = begin
+        for chunk, state in self.converter.render_lines(lines, begin, states[begin]):
+            chunks.append(chunk)
+            after.append(state)
+            line += 1
+            # Lines past the edit only change while the code block state
+            # differs, or until the paragraph run (and any table) ends
+            if (line >= end and state == states[line - shift]
+                    and (state is not None or not is_table_row(lines[line - 1]))
+                    and (line > end or not joined)):
+                break
+
+        old = line - shift
+        self.rendered[begin:old] = chunks
+        states[begin + 1:old + 1] = after
+        if self.converter.highlight:
+            return self._highlight_blocks(begin, begin + len(chunks))
+        return begin, begin + len(chunks)
+
+    def _highlight_blocks(self, first: int, last: int) -> Tuple[int, int]:
+        """Highlight the code blocks lines [first, last) touch, returning the widened range"""
+        lines = self.lines
+        states = self.states
+        count = len(lines)
+        # Back up to the opening fence of a block the range starts in
+        line = first
+        while line > 0 and states[line] is not None:
+            line -= 1
+        changed = first, last
+        while line < last:
+            # Code lines are those inside a block both before and after them
+            if states[line] is None or states[line + 1] is None:
+                line += 1
+                continue
+            end = line + 1
+            while end < count and states[end + 1] is not None:
+                end += 1
+            self.rendered[line:end] = self.converter._code_block_lines(lines[line:end], states[line].info)
+            changed = min(changed[0], line), max(changed[1], end)
+            line = end
+        return changed
+
+    def insert_lines(self, index: int, new_lines: Sequence[str]) -> Tuple[int, int]:
+        """Insert lines before index"""
+        return self.apply_edit(index, index, new_lines)
+
+    def delete_lines(self, start: int, stop: int) -> Tuple[int, int]:
+        """Delete lines [start, stop)"""
+        return self.apply_edit(start, stop, ())
+
+    @property
+    def output(self) -> str:
+        """The full rendered document, identical to MarkdownToANSIConverter.convert
+
+        With a minifying converter the whole document is minified again on
+        every call.
+        """
+        text = '\n'.join(self.rendered)
+        if self.converter.minify:
+            text = self.converter._minify_batch(text)
+        return text + self.converter.reset
@@ -0,0 +1,89 @@
+"""
+Single-pass inline markdown engine (bold, italic, code, links)
+"""
+
+import re
+from typing import List, Sequence
+
+
+# Span kinds, used as indexes into a palette of style strings
+STRONG = 0
+EMPHASIS = 1
+CODE = 2
+LINK = 3
+CLOSE = 4
+
+# One combined pattern; each alternative has exactly one group, so
+# ``match.lastindex`` tells which span matched. Code spans come first so
+# markup inside backticks is never styled; ``***text***`` is emphasis
+# wrapping strong.
+_INLINE_RE = re.compile(
+    r'`([^`]+)`'
+    r'|(?<!\*)\*(\*\*[^*]+\*\*)\*(?!\*)'
+    r'|(?<!_)_(__[^_]+__)_(?!_)'
+    r'|\*\*([^*]+)\*\*'
+    r'|__([^_]+)__'
+    r'|(?<!\*)\*([^*]+)\*(?!\*)'
+    r'|(?<!_)_([^_]+)_(?!_)'
+    r'|\[([^\]]+)\]\([^)]+\)'
+)
+
+_GROUP_KINDS = (None, CODE, EMPHASIS, EMPHASIS, STRONG, STRONG, EMPHASIS, EMPHASIS, LINK)
+
+# Characters every span starts with; text without any is never styled
+_MARKUP_RE = re.compile(r'[`*_\[]')
+
+# Identity palette: formatting with it yields the span kinds themselves
+TOKEN_PALETTE = (STRONG, EMPHASIS, CODE, LINK, CLOSE)
+
+
+def _emit(text: str, palette: Sequence, out: list) -> None:
+    """Append the pieces for ``text`` to ``out`` in a single scan"""
+    search = _INLINE_RE.search
+    pos = 0
+    match = search(text)
+    while match is not None:
+        start = match.start()
+        if start > pos:
+            out.append(text[pos:start])
+        group = match.lastindex
+        kind = _GROUP_KINDS[group]
+        out.append(palette[kind])
+        if kind == CODE:
+            out.append(match.group(group))
+        else:
+            # Spans may nest, e.g. code inside bold or bold inside a link
+            _emit(match.group(group), palette, out)
+        out.append(palette[CLOSE])
+        pos = match.end()
+        match = search(text, pos)
+    if pos < len(text):
+        out.append(text[pos:])
+
+
+def has_markup(text: str) -> bool:
+    """Whether text may contain inline spans (false means format_inline leaves it as is)"""
+    return _MARKUP_RE.search(text) is not None
+
+
+def tokenize_inline(text: str) -> List:
+    """Split text into plain strings and span kind markers (ints)"""
+    tokens = []
+    _emit(text, TOKEN_PALETTE, tokens)
+    return tokens
+
+
+def paint_inline(tokens: List, palette: Sequence[str]) -> str:
+    """Render tokens from tokenize_inline with a palette of style strings"""
+    return ''.join([palette[token] if token.__class__ is int else token for token in tokens])
+
+
+def format_inline(text: str, palette: Sequence[str]) -> str:
+    """Format inline elements of text, writing the output once
+
+    ``palette`` holds the style strings for STRONG, EMPHASIS, CODE, LINK and
+    CLOSE (the color to return to after a span).
+    """
+    out = []
+    _emit(text, palette, out)
+    return ''.join(out)
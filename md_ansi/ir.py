@@ -0,0 +1,250 @@
+"""
+Parse once, paint many: a compact block/inline representation of a document
+
+parse does the work that does not depend on the theme or mode (splitting,
+line classification, locating code blocks and tokenizing inline markup)
+once. paint then renders the result with any converter, giving exactly
+what that converter's convert would, and paint_plain / paint_stripped
+render it without colors.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from .classify import BLANK, FENCE, HEADER, LIST, PARAGRAPH, QUOTE, RULE, LineInfo, classify_line
+from .converter import MarkdownToANSIConverter, find_closing_fence
+from .inline import paint_inline, tokenize_inline
+from .tables import CENTER, RIGHT, split_row, table_alignments, table_end
+from .width import display_width, strip_ansi, wrap_ansi
+
+
+# Block kinds beyond the classify line kinds (FENCE is a code block's opening line)
+CODE = 7
+CODE_END = 8
+TABLE = 9
+
+# Width of plain-text horizontal rules, as in normal mode
+PLAIN_RULE_WIDTH = 60
+
+
+class Block:
+    """One rendered chunk of a document, or a whole table
+
+    kind is a classify line kind, CODE, CODE_END or TABLE. line and info
+    are the source line and its classify_line result (None for CODE blocks
+    and closing fences). content holds the inline tokens (see
+    inline.tokenize_inline) of the text a formatter would format, or, for
+    a CODE block, the lines of the code block body. A TABLE block has the
+    header row as line, the column alignments as info and the body rows as
+    content; it renders to one chunk per source line.
+    """
+
+    __slots__ = ('kind', 'line', 'info', 'content')
+
+    def __init__(self, kind: int, line: Optional[str], info: Optional[LineInfo], content=None):
+        self.kind = kind
+        self.line = line
+        self.info = info
+        self.content = content
+
+    def __repr__(self):
+        return f"Block({self.kind}, {self.line!r}, {self.info!r}, {self.content!r})"
+
+
+class Document:
+    """Parsed blocks of one markdown text, in order"""
+
+    __slots__ = ('blocks',)
+
+    def __init__(self, blocks: List[Block]):
+        self.blocks = blocks
+
+
+def parse(text: str) -> Document:
+    """Parse a markdown text into blocks, one per chunk convert would render
+
+    Code block bodies are located with str.find over the text, as in
+    MarkdownToANSIConverter.convert, and become single CODE blocks.
+    """
+    lines = text.split('\n')
+    count = len(lines)
+    blocks = []
+    append = blocks.append
+    index = offset = 0
+
+    while index < count:
+        line = lines[index]
+        if '|' in line and index + 1 < count:
+            aligns = table_alignments(line, lines[index + 1])
+            if aligns is not None:
+                end = table_end(lines, index + 2)
+                append(Block(TABLE, line, aligns, lines[index + 2:end]))
+                offset += sum(map(len, lines[index:end])) + end - index
+                index = end
+                continue
+        info = classify_line(line)
+        kind = info[0]
+        offset += len(line) + 1
+        index += 1
+        if kind == PARAGRAPH:
+            append(Block(kind, line, info, tokenize_inline(line)))
+        elif kind == LIST:
+            append(Block(kind, line, info, tokenize_inline(line[info[3]:])))
+        elif kind == HEADER or kind == QUOTE:
+            append(Block(kind, line, info, tokenize_inline(line[info[3]:].strip())))
+        else:
+            # Blank lines, rules and opening fences
+            append(Block(kind, line, info))
+            if kind != FENCE:
+                continue
+            fence = info[2]
+            close = find_closing_fence(text, offset, fence)
+            end = count if close < 0 else index + text.count('\n', offset, close)
+            if end > index:
+                append(Block(CODE, None, fence, lines[index:end]))
+            if close < 0:
+                break
+            append(Block(CODE_END, lines[end], None))
+            offset = close + len(lines[end]) + 1
+            index = end + 1
+
+    return Document(blocks)
+
+
+def paint_chunks(document: Document, converter: MarkdownToANSIConverter) -> List[str]:
+    """Render each block with a converter's formatters, before minifying"""
+    palette = converter.inline_palette
+    format_paragraph = converter._format_paragraph
+    format_header = converter._format_header
+    format_quote = converter._format_blockquote
+    format_list = converter._format_list_item
+    chunks = []
+    append = chunks.append
+
+    for block in document.blocks:
+        kind = block.kind
+        if kind == PARAGRAPH:
+            append(format_paragraph(block.line, block.info, paint_inline(block.content, palette)))
+        elif kind == BLANK:
+            append('')
+        elif kind == LIST:
+            append(format_list(block.line, block.info, paint_inline(block.content, palette)))
+        elif kind == HEADER:
+            append(format_header(block.line, block.info, paint_inline(block.content, palette)))
+        elif kind == QUOTE:
+            append(format_quote(block.line, block.info, paint_inline(block.content, palette)))
+        elif kind == RULE:
+            append(converter._format_horizontal_rule())
+        elif kind == FENCE:
+            append(converter._format_code_block_start(block.info[2].info))
+        elif kind == CODE:
+            append(converter._format_code_block(block.content, block.info.info))
+        elif kind == TABLE:
+            chunks.extend(converter._table_chunks(block.line, block.info, iter(block.content)))
+        else:
+            append(converter._format_code_block_end())
+    return chunks
+
+
+def paint(document: Document, converter: MarkdownToANSIConverter) -> str:
+    """Render a parsed document; equal to converter.convert on the parsed text"""
+    text = '\n'.join(paint_chunks(document, converter))
+    if converter.minify:
+        text = converter._minify_batch(text)
+    return text + converter.reset
+
+
+def paint_stripped(document: Document, converter: MarkdownToANSIConverter) -> str:
+    """Render a parsed document with a converter's layout and decorations, but no escapes"""
+    return strip_ansi('\n'.join(paint_chunks(document, converter)))
+
+
+def paint_plain(document: Document, width: Optional[int] = None) -> str:
+    """Render a parsed document as plain text
+
+    Inline markup is removed, H1/H2 headers are underlined with '=' and
+    '-', quotes keep a '> ' prefix, list items their marker, tables are
+    aligned pipe tables, and code blocks are indented four spaces with the
+    fence lines left blank. With width, paragraphs, headers, quotes and
+    list items are wrapped.
+    """
+    out = []
+    append = out.append
+
+    def wrap(text, continuation=''):
+        # wrap_ansi ends every wrapped line with a reset, which plain text drops
+        return strip_ansi(wrap_ansi(text, width, continuation)) if width else text
+
+    for block in document.blocks:
+        kind = block.kind
+        if kind == PARAGRAPH:
+            append(wrap(_plain_inline(block.content)))
+        elif kind == LIST:
+            indent = block.info[1]
+            prefix = f"{' ' * indent}{block.info[2]} "
+            append(wrap(prefix + _plain_inline(block.content), ' ' * display_width(prefix)))
+        elif kind == HEADER:
+            title = wrap(_plain_inline(block.content))
+            level = block.info[2]
+            if level <= 2:
+                underline = max(display_width(row) for row in title.split('\n'))
+                title = f"{title}\n{('=' if level == 1 else '-') * underline}"
+            append(title)
+        elif kind == QUOTE:
+            append(wrap('> ' + _plain_inline(block.content), '> '))
+        elif kind == RULE:
+            append('-' * (min(PLAIN_RULE_WIDTH, width) if width else PLAIN_RULE_WIDTH))
+        elif kind == CODE:
+            append('\n'.join(f"    {line}" if line else '' for line in block.content))
+        elif kind == TABLE:
+            append(_plain_table(block))
+        else:
+            # Blank lines and code fences
+            append('')
+    return '\n'.join(out)
+
+
+def _plain_inline(tokens: List) -> str:
+    """Text of inline tokens without their span markers"""
+    return ''.join([token for token in tokens if token.__class__ is str])
+
+
+def _plain_table(block: Block) -> str:
+    """A TABLE block as a pipe table with aligned columns and no inline markup"""
+    aligns = block.info
+    columns = len(aligns)
+    rows = []
+    for line in [block.line, *block.content]:
+        cells = [_plain_inline(tokenize_inline(cell)) for cell in split_row(line)[:columns]]
+        rows.append(cells + [''] * (columns - len(cells)))
+    widths = [max(3, *(display_width(row[column]) for row in rows)) for column in range(columns)]
+
+    def format_row(cells):
+        parts = []
+        for cell, width, align in zip(cells, widths, aligns):
+            pad = width - display_width(cell)
+            if align == RIGHT:
+                parts.append(' ' * pad + cell)
+            elif align == CENTER:
+                parts.append(' ' * (pad // 2) + cell + ' ' * (pad - pad // 2))
+            else:
+                parts.append(cell + ' ' * pad)
+        return f"| {' | '.join(parts)} |"
+
+    rule = '|' + '|'.join('-' * (width + 2) for width in widths) + '|'
+    return '\n'.join([format_row(rows[0]), rule, *map(format_row, rows[1:])])
+
+
+def convert_multi(text: str, styles: Iterable[str] = ('beach',),
+                  max_modes: Iterable[bool] = (False,),
+                  **options) -> Dict[Tuple[str, bool], str]:
+    """Convert one text in several styles and modes, parsing it only once
+
+    Returns {(style, max_mode): output} for every combination, each equal to
+    MarkdownToANSIConverter(style, max_mode=max_mode, **options).convert(text).
+    """
+    document = parse(text)
+    max_modes = [bool(max_mode) for max_mode in max_modes]
+    return {
+        (style, max_mode): paint(document, MarkdownToANSIConverter(style, max_mode=max_mode, **options))
+        for style in styles
+        for max_mode in max_modes
+    }
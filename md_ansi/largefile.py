@@ -0,0 +1,53 @@
+"""
+Memory-mapped input for very large markdown files
+"""
+
+import mmap
+import os
+from typing import Iterator
+
+
+# Hand pages already read back to the OS after this many bytes, so resident
+# memory stays bounded instead of growing with the file
+RELEASE_BYTES = 16 * 1024 * 1024
+
+
+def iter_mmap_lines(path, encoding: str = 'utf-8') -> Iterator[str]:
+    """Yield the lines of a file (without newlines), decoding each lazily
+
+    The file is memory-mapped and line boundaries are found with
+    mmap.find, so only the current line is ever copied into a str. Yields
+    the same lines as ``text.split('\\n')`` of the file read with universal
+    newlines (as the plain path reads it), including a final empty line
+    after a trailing newline.
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield ''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, 'madvise'):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            can_release = hasattr(mmap, 'MADV_DONTNEED')
+            find = mapped.find
+            pos = released = 0
+            while True:
+                end = find(b'\n', pos)
+                if end < 0:
+                    line = mapped[pos:].decode(encoding)
+                    if '\r' in line:
+                        yield from line.split('\r')
+                    else:
+                        yield line
+                    return
+                line = mapped[pos:end].decode(encoding)
+                if '\r' in line:
+                    # '\r\n' ends one line; any other '\r' ends a line of its own
+                    yield from (line[:-1] if line.endswith('\r') else line).split('\r')
+                else:
+                    yield line
+                pos = end + 1
+                if can_release and pos - released >= RELEASE_BYTES:
+                    boundary = pos - pos % mmap.PAGESIZE
+                    mapped.madvise(mmap.MADV_DONTNEED, released, boundary - released)
+                    released = boundary
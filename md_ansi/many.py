@@ -0,0 +1,126 @@
+"""
+Convert many small markdown documents in one call
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from .classify import HEADER, LIST, PARAGRAPH, QUOTE, RULE, classify_line
+from .converter import MarkdownToANSIConverter
+from .inline import format_inline
+from .styles import StyleTheme, get_theme
+
+
+# Converters shared by every convert_many call in this process, with the
+# theme each was built from
+_converters: Dict[Tuple[str, bool], Tuple[StyleTheme, MarkdownToANSIConverter]] = {}
+
+# Documents handed to a pool worker at a time
+DOCS_PER_TASK = 2048
+
+BACKENDS = ('thread', 'process')
+
+
+def get_converter(style_name: str, max_mode: bool) -> MarkdownToANSIConverter:
+    """Get this process's converter for a style, creating it on first use
+
+    A converter is built again once its theme has been replaced (see
+    ThemeRegistry.register).
+    """
+    key = (style_name, bool(max_mode))
+    theme = get_theme(style_name)
+    cached = _converters.get(key)
+    if cached is not None and cached[0] is theme:
+        return cached[1]
+    converter = MarkdownToANSIConverter(style_name, max_mode=max_mode)
+    _converters[key] = (theme, converter)
+    return converter
+
+
+def convert_many(texts: Iterable[str], style_name: str = 'beach', max_mode: bool = False,
+                 workers: Optional[int] = None, backend: str = 'thread') -> List[str]:
+    """Convert many documents at once; returns outputs in input order
+
+    Each output equals MarkdownToANSIConverter(style_name, max_mode).convert(text).
+    The lines of all documents are classified in one pass and then formatted
+    kind by kind with a shared converter, so per-document overhead is close
+    to nothing. With workers > 1 the documents are split into chunks of
+    DOCS_PER_TASK and converted on a thread or process pool.
+    """
+    texts = list(texts)
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}; expected one of {BACKENDS}")
+    if workers is None or workers <= 1 or len(texts) <= DOCS_PER_TASK:
+        return _convert_chunk(texts, style_name, max_mode)
+
+    chunks = [texts[i:i + DOCS_PER_TASK] for i in range(0, len(texts), DOCS_PER_TASK)]
+    pool = ThreadPoolExecutor if backend == 'thread' else ProcessPoolExecutor
+    results: List[str] = []
+    with pool(max_workers=min(workers, len(chunks), os.cpu_count() or 1)) as executor:
+        for outputs in executor.map(_convert_chunk, chunks,
+                                    [style_name] * len(chunks), [max_mode] * len(chunks)):
+            results.extend(outputs)
+    return results
+
+
+def _convert_chunk(texts: List[str], style_name: str, max_mode: bool) -> List[str]:
+    """Convert a list of documents in this process"""
+    converter = get_converter(style_name, max_mode)
+    plan = converter.plan
+    reset = converter.reset
+    render_line = converter.render_line
+
+    # Pass 1: split every document and follow its code blocks. Lines inside
+    # a code block, or that might open or close one, go through render_line,
+    # which owns the fence rules. Every other line is rendered only once per
+    # call however often it repeats, so each document becomes a list of
+    # indexes into rendered.
+    rendered: List[str] = []
+    slots: Dict[str, int] = {}
+    docs: List[List[int]] = []
+    for text in texts:
+        fence = None
+        doc = []
+        if '|' in text:
+            # May hold a table, whose lines depend on each other: render it whole
+            for chunk in converter._render_text(text):
+                doc.append(len(rendered))
+                rendered.append(chunk)
+            docs.append(doc)
+            continue
+        for line in text.split('\n'):
+            if fence is not None or line.lstrip().startswith(('`', '~')):
+                chunk, fence = render_line(line, fence)
+                doc.append(len(rendered))
+                rendered.append(chunk)
+                continue
+            slot = slots.get(line)
+            if slot is None:
+                slot = slots[line] = len(rendered)
+                rendered.append('')
+            doc.append(slot)
+        docs.append(doc)
+
+    # Pass 2: classify the distinct lines and format them kind by kind
+    groups = {PARAGRAPH: [], HEADER: [], QUOTE: [], LIST: [], RULE: []}
+    for line, slot in slots.items():
+        info = classify_line(line)
+        group = groups.get(info[0])
+        if group is not None:
+            group.append((slot, line, info))
+
+    prefix = plan.paragraph_prefix
+    palette = converter.inline_palette
+    for slot, line, _ in groups[PARAGRAPH]:
+        rendered[slot] = f"{prefix}{format_inline(line, palette)}{reset}"
+    for kind, format_kind in ((HEADER, converter._format_header),
+                              (QUOTE, converter._format_blockquote),
+                              (LIST, converter._format_list_item)):
+        for slot, line, info in groups[kind]:
+            rendered[slot] = format_kind(line, info)
+    rule = plan.horizontal_rule
+    for slot, _, _ in groups[RULE]:
+        rendered[slot] = rule
+
+    # Pass 3: assemble the documents in input order
+    return ['\n'.join([rendered[slot] for slot in doc]) + reset for doc in docs]
@@ -0,0 +1,257 @@
+"""
+SGR minimizer: drop redundant ANSI color resets and re-sets from rendered output
+"""
+
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+
+# Parameters of an SGR sequence (the part between ESC[ and m)
+_PARAMS = re.compile(r'[0-9;]*')
+
+# Parameters key that leaves the state as is; never valid SGR parameters
+_NO_ESCAPE = '-'
+
+# An SGR sequence cut off at the end of a chunk
+_PARTIAL = re.compile(r'\x1b(?:\[[0-9;]*)?\Z')
+
+# Terminal state: (foreground, background, attributes); colors are SGR
+# parameter strings such as '34' or '38;5;208', None for the default
+State = Tuple[Optional[str], Optional[str], FrozenSet[str]]
+
+RESET_STATE: State = (None, None, frozenset())
+
+# Codes that switch attributes off, and the attributes they clear
+_ATTRIBUTE_OFF = {
+    '21': ('4',),
+    '22': ('1', '2'),
+    '23': ('3',),
+    '24': ('4',),
+    '25': ('5', '6'),
+    '27': ('7',),
+    '28': ('8',),
+    '29': ('9',),
+}
+
+def apply_sgr(state: State, run: str) -> State:
+    """State after a run of one or more adjacent SGR sequences"""
+    foreground, background, attributes = state
+    attributes = set(attributes)
+    params = run[2:-1].replace('m\x1b[', ';').split(';')
+    index = 0
+    while index < len(params):
+        param = params[index].lstrip('0') or '0'
+        index += 1
+        if param == '0':
+            foreground = background = None
+            attributes.clear()
+        elif param in ('38', '48'):
+            # Extended color: 38;5;n or 38;2;r;g;b
+            count = 2 if index < len(params) and params[index] == '5' else 4
+            color = ';'.join([param] + params[index:index + count])
+            index += count
+            if param == '38':
+                foreground = color
+            else:
+                background = color
+        elif param == '39':
+            foreground = None
+        elif param == '49':
+            background = None
+        elif len(param) == 2 and param[0] in '39' and param[1] in '01234567':
+            foreground = param
+        elif (len(param) == 2 and param[0] == '4') or (len(param) == 3 and param[:2] == '10'):
+            background = param
+        elif param in _ATTRIBUTE_OFF:
+            attributes.difference_update(_ATTRIBUTE_OFF[param])
+        else:
+            attributes.add(param)
+
+    return (foreground, background, frozenset(attributes))
+
+
+def transition(current: State, desired: State) -> str:
+    """Shortest single SGR sequence taking the terminal from current to desired
+
+    Attributes and colors that must be switched off are handled with a
+    reset followed by the desired state, since ANSI.SYS-era terminals do
+    not know the individual "off" codes.
+    """
+    foreground, background, attributes = desired
+    if desired == RESET_STATE:
+        codes = ['0']
+    elif ((current[0] is not None and foreground is None)
+          or (current[1] is not None and background is None)
+          or not current[2] <= attributes):
+        codes = ['0', *sorted(attributes, key=int)]
+        codes += [color for color in (foreground, background) if color is not None]
+    else:
+        codes = sorted(attributes - current[2], key=int)
+        if foreground != current[0]:
+            codes.append(foreground)
+        if background != current[1]:
+            codes.append(background)
+    return f"\x1b[{';'.join(codes)}m"
+
+
+def _paints_lines(state: State) -> bool:
+    """Whether a line break in this state may fill the new line with color"""
+    return state[1] is not None or '7' in state[2]
+
+
+class SGRMinifier:
+    """Streaming rewrite of ANSI text with the fewest SGR sequences
+
+    Escape sequences are not written where they occur; the state they ask
+    for is tracked, and one merged sequence is written just before the next
+    visible character, only if it differs from what the terminal already
+    shows. Line breaks do not force the state out, except where a background
+    color (or reverse video) is active before or after the change, since
+    scrolling could paint the new line. Each chunk is processed in one pass;
+    sequences split between chunks are held until the next one.
+
+    States are numbered as they are first seen, and the effect of each
+    sequence and each state change is worked out once per minifier, so the
+    per-sequence cost is a couple of lookups.
+    """
+
+    def __init__(self):
+        self.chars_in = 0
+        self.chars_out = 0
+        self._held = ''
+        # State numbers: 0 is the reset state
+        self._states: List[State] = [RESET_STATE]
+        self._ids: Dict[State, int] = {RESET_STATE: 0}
+        self._paints = [False]
+        # Per state number: SGR parameters -> state number, state number -> escape
+        self._applied: List[Dict[str, int]] = [{_NO_ESCAPE: 0}]
+        self._transitions: List[Dict[int, str]] = [{}]
+        self._current = 0
+        self._desired = 0
+
+    @property
+    def saved(self) -> int:
+        """Characters (and, since escapes are ASCII, bytes) dropped so far"""
+        return self.chars_in - self.chars_out
+
+    def _apply(self, number: int, params: str) -> int:
+        """Number of the state after an SGR sequence, recording it for next time
+
+        Returns -1 if params are not those of an SGR sequence.
+        """
+        if not _PARAMS.fullmatch(params):
+            return -1
+        state = apply_sgr(self._states[number], f"\x1b[{params}m")
+        result = self._ids.get(state)
+        if result is None:
+            result = self._ids[state] = len(self._states)
+            self._states.append(state)
+            self._paints.append(_paints_lines(state))
+            self._applied.append({_NO_ESCAPE: result})
+            self._transitions.append({})
+        self._applied[number][params] = result
+        return result
+
+    def _transition(self, current: int, desired: int) -> str:
+        """Escape taking the terminal between two numbered states"""
+        escape = self._transitions[current].get(desired)
+        if escape is None:
+            escape = transition(self._states[current], self._states[desired])
+            self._transitions[current][desired] = escape
+        return escape
+
+    def feed(self, text: str, whole: bool = False) -> str:
+        """Minify the next chunk of output
+
+        Pass whole=True when the chunk is known not to end inside an escape
+        sequence (e.g. a complete rendered line), so nothing is held back.
+        """
+        self.chars_in += len(text)
+        if self._held:
+            text = self._held + text
+            self._held = ''
+        if not whole and '\x1b' in text[-24:]:
+            match = _PARTIAL.search(text, max(0, len(text) - 24))
+            if match:
+                self._held = text[match.start():]
+                text = text[:match.start()]
+
+        applied = self._applied
+        transitions = self._transitions
+        paints = self._paints
+        current = self._current
+        desired = self._desired
+        out: List[str] = []
+        append = out.append
+
+        # Each piece is an escape's parameters, its 'm', then the text up to
+        # the next escape; the text before the first escape gets a dummy key
+        pieces = text.split('\x1b[')
+        pieces[0] = f"{_NO_ESCAPE}m{pieces[0]}"
+        for piece in pieces:
+            end = piece.find('m')
+            following = applied[desired].get(piece[:end]) if end >= 0 else -1
+            if following is None or following < 0:
+                if end >= 0:
+                    following = self._apply(desired, piece[:end])
+                if following < 0:
+                    # Not an SGR sequence: pass it through as text
+                    following = desired
+                    piece = 'm\x1b[' + piece
+                    end = 0
+            desired = following
+            part = piece[end + 1:]
+            if not part:
+                continue
+            if desired != current:
+                if part[0] == '\n' and not paints[current] and not paints[desired]:
+                    # Line breaks are invisible: delay the change past them
+                    rest = part.lstrip('\n')
+                    if not rest:
+                        append(part)
+                        continue
+                    append(part[:len(part) - len(rest)])
+                    part = rest
+                escape = transitions[current].get(desired)
+                append(escape if escape is not None else self._transition(current, desired))
+                current = desired
+            append(part)
+
+        self._current = current
+        self._desired = desired
+        result = ''.join(out)
+        self.chars_out += len(result)
+        return result
+
+    def line_break(self) -> str:
+        """Escape to write before a line break added outside the minifier
+
+        Used when lines are joined by the caller (see convert_stream), so
+        the state is forced out where a '\\n' in the fed text would do it.
+        """
+        if self._desired == self._current or not (self._paints[self._current]
+                                                  or self._paints[self._desired]):
+            return ''
+        escape = self._transition(self._current, self._desired)
+        self._current = self._desired
+        self.chars_out += len(escape)
+        return escape
+
+    def finish(self) -> str:
+        """Flush held input and bring the terminal to the state the text ended in"""
+        text = ''
+        if self._desired != self._current:
+            text = self._transition(self._current, self._desired)
+            self._current = self._desired
+        if self._held:
+            # A cut-off sequence at the very end is passed through as text
+            text += self._held
+            self._held = ''
+        self.chars_out += len(text)
+        return text
+
+
+def minify(text: str) -> str:
+    """Minify a complete ANSI document"""
+    minifier = SGRMinifier()
+    return minifier.feed(text) + minifier.finish()
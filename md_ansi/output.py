@@ -0,0 +1,126 @@
+"""
+Buffered output sink: bulk-encode rendered text and write it in fixed-size chunks
+"""
+
+import io
+import os
+from typing import Callable, List, Union
+
+
+# Characters collected before encoding and writing one chunk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Output encodings the CLI offers
+ENCODINGS = ('utf-8', 'cp437')
+
+
+def encode_text(text: str, encoding: str = 'utf-8') -> bytes:
+    """Encode rendered text; cp437 substitutes the glyphs it lacks (see cp437.py)"""
+    if encoding == 'cp437':
+        from .cp437 import encode_cp437
+        return encode_cp437(text)
+    return text.encode(encoding)
+
+
+class AtomicFile:
+    """A binary file written under a temporary name and renamed into place by commit
+
+    close without commit removes the temporary file, so a failed write
+    leaves any existing file at path untouched.
+    """
+
+    def __init__(self, path, buffering: int = -1):
+        self.path = os.fspath(path)
+        self.temp = f"{self.path}.{os.getpid()}.tmp"
+        self._file = open(self.temp, 'wb', buffering=buffering)
+        self.write = self._file.write
+        self.flush = self._file.flush
+        self.committed = False
+
+    def commit(self) -> None:
+        """Finish writing and replace path with what was written"""
+        self._file.close()
+        os.replace(self.temp, self.path)
+        self.committed = True
+
+    def close(self) -> None:
+        """Discard what was written unless it was committed"""
+        self._file.close()
+        if not self.committed:
+            try:
+                os.unlink(self.temp)
+            except OSError:
+                pass
+
+
+class BufferedSink:
+    """Write rendered text to a stream or callback without building the whole output
+
+    ``target`` may be a binary stream, a text stream (streams with a binary
+    ``buffer``, like sys.stdout, are written through it) or a callable that
+    receives encoded bytes chunks. Pieces passed to write() are gathered in a
+    reusable list and encoded in one go each time chunk_size characters have
+    accumulated.
+    """
+
+    def __init__(self, target: Union[io.IOBase, Callable[[bytes], object]],
+                 encoding: str = 'utf-8', chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+        self.chars_written = 0
+        self.bytes_written = 0
+        self._pieces: List[str] = []
+        self._pending = 0
+        self._text_write = None
+        self._write = None
+        self._flush = None
+
+        if not hasattr(target, 'write'):
+            self._write = target
+        elif isinstance(target, io.TextIOBase):
+            buffer = getattr(target, 'buffer', None)
+            if buffer is not None:
+                # Anything already written through the text layer goes first
+                target.flush()
+                self._write = buffer.write
+                self._flush = buffer.flush
+            else:
+                # Text-only stream (e.g. StringIO): hand over str chunks
+                self._text_write = target.write
+                self._flush = target.flush
+        else:
+            self._write = target.write
+            self._flush = getattr(target, 'flush', None)
+
+    def write(self, text: str) -> None:
+        """Queue text, writing a chunk out once enough has accumulated"""
+        self._pieces.append(text)
+        self._pending += len(text)
+        self.chars_written += len(text)
+        if self._pending >= self.chunk_size:
+            self._drain()
+
+    def _drain(self) -> None:
+        if not self._pieces:
+            return
+        text = ''.join(self._pieces)
+        self._pieces.clear()
+        self._pending = 0
+        if self._text_write is not None:
+            self._text_write(text)
+            return
+        data = encode_text(text, self.encoding)
+        self.bytes_written += len(data)
+        self._write(data)
+
+    def flush(self) -> None:
+        """Write out everything queued so far"""
+        self._drain()
+        if self._flush is not None:
+            self._flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
@@ -0,0 +1,207 @@
+"""
+Precomputed render plans: every constant style string a converter needs
+"""
+
+from typing import Dict, Tuple
+from .styles import ANSIColors, StyleTheme
+
+
+# Max mode palettes
+MAX_H1_COLORS = (
+    ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
+)
+MAX_H2_COLORS = (
+    ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_BLUE + ANSIColors.BOLD,
+)
+MAX_HEADER_CHARS = ('◆', '◇', '◈', '◉', '◎')
+MAX_HEADER_COLORS = (
+    ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_RED + ANSIColors.BOLD,
+)
+MAX_QUOTE_CHARS = ('┃', '┋', '┊', '│', '║')
+MAX_QUOTE_COLORS = (
+    ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
+)
+MAX_BULLETS = ('◆', '◇', '◈', '◉', '◎', '●', '○', '◐', '◑', '◒', '◓')
+MAX_BULLET_COLORS = (
+    ANSIColors.BRIGHT_RED + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_BLUE + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_MAGENTA + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
+)
+MAX_RULE_CHARS = ('▀', '▄', '█', '▌', '▐', '░', '▒', '▓')
+MAX_RULE_COLORS = (
+    ANSIColors.BRIGHT_RED,
+    ANSIColors.BRIGHT_YELLOW,
+    ANSIColors.BRIGHT_GREEN,
+    ANSIColors.BRIGHT_CYAN,
+    ANSIColors.BRIGHT_BLUE,
+    ANSIColors.BRIGHT_MAGENTA,
+)
+MAX_CODE_COLORS = (
+    ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_CYAN + ANSIColors.BOLD,
+    ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD,
+)
+
+# Table box characters: corners and joins (top, middle, bottom rows), then the lines
+TABLE_CHARS = ('┌', '┬', '┐', '├', '┼', '┤', '└', '┴', '┘', '─', '│')
+MAX_TABLE_CHARS = ('╔', '╦', '╗', '╠', '╬', '╣', '╚', '╩', '╝', '═', '║')
+
+# Deepest header level with precomputed affixes; deeper levels are built on demand
+MAX_PLANNED_LEVEL = 6
+
+
+def _cycle_length(*sizes: int) -> int:
+    """Length after which indexing several cycling sequences repeats"""
+    length = 1
+    for size in sizes:
+        a, b = length, size
+        while b:
+            a, b = b, a % b
+        length = length * size // a
+    return length
+
+
+def header_affixes(level: int, max_mode: bool, theme: StyleTheme) -> Tuple[str, str]:
+    """Build the (prefix, suffix) pair for an H3+ header"""
+    reset = ANSIColors.RESET
+    if max_mode:
+        char = MAX_HEADER_CHARS[level % len(MAX_HEADER_CHARS)]
+        color = MAX_HEADER_COLORS[level % len(MAX_HEADER_COLORS)]
+        decoration = '▸' * (level - 2)
+        return f"{color}{decoration}{char} ", f" {char}{decoration}{reset}"
+    prefix = '▶' if level == 3 else '•'
+    return f"{theme.header_color}{prefix} ", reset
+
+
+class RenderPlan:
+    """Immutable table of the style strings used to render one (theme, max_mode, depth)
+
+    Built once by get_render_plan and shared between converters, so per-line
+    work is reduced to lookups and a join.
+    """
+
+    __slots__ = (
+        'theme', 'max_mode', 'reset', 'inline_palette', 'paragraph_prefix',
+        'header_rules', 'header_affixes', 'quote_prefix', 'quote_prefixes',
+        'list_prefixes', 'horizontal_rule', 'code_start_prefixes',
+        'code_start_fill', 'code_block_end', 'code_line_prefix', 'code_line_separator',
+        'table_chars', 'table_border', 'table_header',
+    )
+
+    def __init__(self, theme: StyleTheme, max_mode: bool):
+        reset = ANSIColors.RESET
+        setattr_ = object.__setattr__
+        setattr_(self, 'theme', theme)
+        setattr_(self, 'max_mode', max_mode)
+        setattr_(self, 'reset', reset)
+        setattr_(self, 'paragraph_prefix', theme.text_color)
+
+        # Affixes for H3+ headers, indexed by level
+        setattr_(self, 'header_affixes', tuple(
+            header_affixes(level, max_mode, theme) if level >= 3 else None
+            for level in range(MAX_PLANNED_LEVEL + 1)
+        ))
+
+        if max_mode:
+            setattr_(self, 'inline_palette', (
+                ANSIColors.BRIGHT_YELLOW + ANSIColors.BOLD + ANSIColors.BLINK,
+                ANSIColors.BRIGHT_MAGENTA + ANSIColors.ITALIC + ANSIColors.UNDERLINE,
+                ANSIColors.BRIGHT_GREEN + ANSIColors.BOLD + ANSIColors.BG_BLACK,
+                ANSIColors.BRIGHT_CYAN + ANSIColors.UNDERLINE + ANSIColors.BLINK,
+                theme.text_color,
+            ))
+            setattr_(self, 'header_rules', None)
+            setattr_(self, 'quote_prefix', None)
+            # Indexed by hash % 15, which fixes both hash % 3 and hash % 5
+            count = _cycle_length(len(MAX_QUOTE_COLORS), len(MAX_QUOTE_CHARS))
+            setattr_(self, 'quote_prefixes', tuple(
+                f"{MAX_QUOTE_COLORS[i % len(MAX_QUOTE_COLORS)]}{MAX_QUOTE_CHARS[i % len(MAX_QUOTE_CHARS)]} "
+                for i in range(count)
+            ))
+            # Indexed by (indent // 2) % 66, covering every bullet/color pairing
+            count = _cycle_length(len(MAX_BULLETS), len(MAX_BULLET_COLORS))
+            setattr_(self, 'list_prefixes', tuple(
+                f"{MAX_BULLET_COLORS[i % len(MAX_BULLET_COLORS)]}{MAX_BULLETS[i % len(MAX_BULLETS)]} "
+                for i in range(count)
+            ))
+            if theme.color_depth == '16':
+                setattr_(self, 'horizontal_rule', ''.join(
+                    f"{MAX_RULE_COLORS[i % len(MAX_RULE_COLORS)]}{MAX_RULE_CHARS[i % len(MAX_RULE_CHARS)]}"
+                    for i in range(80)
+                ) + reset)
+            else:
+                # A smooth sweep through the same colors instead of cycling them
+                from .colors import basic_rgb, paint_gradient
+                chars = ''.join(MAX_RULE_CHARS[i % len(MAX_RULE_CHARS)] for i in range(80))
+                stops = [basic_rgb(color) for color in MAX_RULE_COLORS]
+                setattr_(self, 'horizontal_rule', paint_gradient(chars, stops, theme.color_depth) + reset)
+            setattr_(self, 'code_start_prefixes', tuple(
+                f"{color}╔─ CODE" for color in MAX_CODE_COLORS
+            ))
+            setattr_(self, 'code_start_fill', '═')
+            setattr_(self, 'code_block_end', f"{MAX_CODE_COLORS[0]}╚{'═' * 60}╝{reset}")
+            setattr_(self, 'code_line_prefix', f"{MAX_CODE_COLORS[0]}║{reset} {theme.code_color}")
+            setattr_(self, 'table_chars', MAX_TABLE_CHARS)
+            setattr_(self, 'table_border', MAX_CODE_COLORS[1])
+            setattr_(self, 'table_header', MAX_H1_COLORS[0])
+        else:
+            setattr_(self, 'inline_palette', (
+                theme.strong_color,
+                theme.emphasis_color,
+                theme.code_color,
+                theme.link_color,
+                theme.text_color,
+            ))
+            # (border color, border char, padding, text prefix, text suffix) for H1/H2
+            setattr_(self, 'header_rules', (
+                None,
+                (theme.border_color, '═', 4, f"{theme.header_color}  ", f"  {reset}"),
+                (theme.border_color, '─', 2, f"{theme.header_color} ", f" {reset}"),
+            ))
+            setattr_(self, 'quote_prefix', f"{theme.quote_color}┃ ")
+            setattr_(self, 'quote_prefixes', None)
+            setattr_(self, 'list_prefixes', (
+                f"{theme.list_color}• ",
+                f"{theme.list_color}◦ ",
+            ))
+            setattr_(self, 'horizontal_rule', f"{theme.border_color}{'─' * 60}{reset}")
+            setattr_(self, 'code_start_prefixes', (f"{theme.border_color}┌─ CODE",))
+            setattr_(self, 'code_start_fill', '─')
+            setattr_(self, 'code_block_end', f"{theme.border_color}└─{'─' * 58}{reset}")
+            setattr_(self, 'code_line_prefix', f"{theme.border_color}│{reset} {theme.code_color}")
+            setattr_(self, 'table_chars', TABLE_CHARS)
+            setattr_(self, 'table_border', theme.border_color)
+            setattr_(self, 'table_header', theme.header_color)
+
+        # Joins code lines so a whole block renders as one chunk
+        setattr_(self, 'code_line_separator', f"{reset}\n{self.code_line_prefix}")
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+
+# Module-level cache, shared by every converter in the process
+_PLANS: Dict[Tuple[str, bool, str], RenderPlan] = {}
+
+
+def get_render_plan(theme: StyleTheme, max_mode: bool) -> RenderPlan:
+    """Get the cached render plan for a theme, mode and color depth, building it on first use"""
+    key = (theme.name, bool(max_mode), theme.color_depth)
+    plan = _PLANS.get(key)
+    if plan is None or plan.theme is not theme:
+        plan = _PLANS[key] = RenderPlan(theme, bool(max_mode))
+    return plan
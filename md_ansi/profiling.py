@@ -0,0 +1,161 @@
+"""
+Opt-in per-stage timing for MarkdownToANSIConverter
+"""
+
+from collections import defaultdict
+from functools import wraps
+from time import perf_counter_ns
+from typing import Callable, Iterable, Iterator, Optional
+
+
+# Converter methods timed when stats are enabled
+PROFILED_METHODS = (
+    'render_line',
+    '_format_line',
+    '_format_header',
+    '_format_header_normal',
+    '_format_header_max',
+    '_format_blockquote',
+    '_format_list_item',
+    '_format_horizontal_rule',
+    '_format_paragraph',
+    '_format_inline_elements',
+    '_format_code_block_start',
+    '_format_code_block_end',
+    '_format_code_line',
+    '_format_code_block',
+    '_code_block_lines',
+    '_highlight_code',
+    '_measure_table',
+    '_table_cells',
+    '_minify_batch',
+)
+
+
+class ConversionStats:
+    """Call counts and cumulative nanoseconds per converter stage, plus bytes in and out
+
+    Pass an instance as ``MarkdownToANSIConverter(..., stats=stats)``. Only that
+    converter's methods are wrapped, so converters without stats run the
+    original code untouched. Times are inclusive: a header's time includes
+    the inline formatting inside it. outer_nanoseconds adds up only the
+    calls made from outside any other timed stage, so convert time minus it
+    is the time spent outside every stage.
+    """
+
+    def __init__(self):
+        self.calls = defaultdict(int)
+        self.nanoseconds = defaultdict(int)
+        self.outer_nanoseconds = 0
+        self._depth = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.bytes_saved = 0
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        """Wrap func so every call is counted and timed under name"""
+        calls = self.calls
+        nanoseconds = self.nanoseconds
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            self._depth += 1
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter_ns() - start
+                nanoseconds[name] += elapsed
+                calls[name] += 1
+                self._depth -= 1
+                if not self._depth:
+                    self.outer_nanoseconds += elapsed
+        return wrapper
+
+    def instrument(self, converter) -> None:
+        """Replace a converter's stage methods with timed wrappers"""
+        for name in PROFILED_METHODS:
+            setattr(converter, name, self.timed(name, getattr(converter, name)))
+
+        convert = converter.convert
+        stream_chunks = converter._stream_chunks
+        converting = [False]
+
+        def counted_convert(markdown_text: str) -> str:
+            start = perf_counter_ns()
+            saved = self.bytes_saved
+            converting[0] = True
+            try:
+                result = convert(markdown_text)
+            finally:
+                converting[0] = False
+            self.nanoseconds['convert'] += perf_counter_ns() - start
+            self.calls['convert'] += 1
+            self.bytes_in += len(markdown_text.encode('utf-8'))
+            # Counted before minifying, like the streaming paths
+            self.bytes_out += len(result.encode('utf-8')) + self.bytes_saved - saved
+            return result
+
+        def counted_stream(lines: Iterable[str]) -> Iterator[str]:
+            if converting[0]:
+                # Bytes are counted once by counted_convert
+                yield from stream_chunks(lines)
+                return
+            for chunk in stream_chunks(self._count_in(lines)):
+                self.bytes_out += len(chunk.encode('utf-8')) + 1
+                yield chunk
+
+        render_text = converter._render_text
+
+        def counted_text(text: str) -> Iterator[str]:
+            if converting[0]:
+                yield from render_text(text)
+                return
+            self.bytes_in += len(text.encode('utf-8'))
+            for chunk in render_text(text):
+                self.bytes_out += len(chunk.encode('utf-8')) + 1
+                yield chunk
+
+        convert_to = converter.convert_to
+
+        def timed_convert_to(markdown, target, encoding: Optional[str] = None) -> int:
+            # Bytes are counted by counted_stream or counted_text as the lines go through
+            start = perf_counter_ns()
+            try:
+                return convert_to(markdown, target, encoding)
+            finally:
+                self.nanoseconds['convert'] += perf_counter_ns() - start
+                self.calls['convert'] += 1
+
+        converter.convert = counted_convert
+        converter.convert_to = timed_convert_to
+        converter._stream_chunks = counted_stream
+        converter._render_text = counted_text
+
+    def _count_in(self, lines: Iterable[str]) -> Iterator[str]:
+        """Pass lines through, adding their size to bytes_in"""
+        for line in lines:
+            self.bytes_in += len(line.encode('utf-8'))
+            yield line
+
+    def format_table(self) -> str:
+        """Render the collected stats as a plain-text table"""
+        total = self.nanoseconds.get('convert') or self.nanoseconds.get('render_line')
+        rows = [f"{'stage':28} {'calls':>10} {'total ms':>11} {'avg us':>9} {'share':>7}"]
+        for name in ('convert',) + PROFILED_METHODS:
+            calls = self.calls.get(name)
+            if not calls:
+                continue
+            ns = self.nanoseconds[name]
+            share = f"{ns * 100 / total:6.1f}%" if total else '      -'
+            rows.append(f"{name:28} {calls:>10,} {ns / 1e6:>11.2f} {ns / calls / 1e3:>9.2f} {share:>7}")
+        if self.calls.get('convert') and self.outer_nanoseconds:
+            other = self.nanoseconds['convert'] - self.outer_nanoseconds
+            rows.append(f"{'(split/join/write)':28} {'':>10} {other / 1e6:>11.2f} {'':>9} "
+                        f"{other * 100 / total:6.1f}%")
+        rows.append(f"bytes in: {self.bytes_in:,}  bytes out: {self.bytes_out:,}")
+        if self.bytes_saved:
+            share = self.bytes_saved * 100 / self.bytes_out if self.bytes_out else 0
+            rows.append(f"minify: {self.bytes_saved:,} bytes saved ({share:.1f}% of output), "
+                        f"{self.bytes_out - self.bytes_saved:,} written")
+        return '\n'.join(rows)
@@ -0,0 +1,247 @@
+"""
+Asyncio rendering server with warm converters (md-ansi serve)
+
+Protocol: JSON lines over a Unix socket or TCP. Each request is one JSON
+object on one line and gets exactly one JSON line back, in order:
+
+    {"id": 1, "text": "# Hi", "style": "beach", "max": false}
+    -> {"id": 1, "output": "..."}
+
+    {"id": 2, "op": "metrics"}
+    -> {"id": 2, "metrics": {"requests": ..., "latency_ms": {"p50": ...}, ...}}
+
+    {"op": "ping"} -> {"ok": true}
+
+Errors are reported as {"id": ..., "error": "..."}: "style" must be a
+string and "max" a boolean when given. A request line larger than the size
+limit closes the connection after an error reply.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+from .converter import MarkdownToANSIConverter
+from .styles import THEMES
+
+
+DEFAULT_PORT = 7777
+DEFAULT_MAX_REQUEST_BYTES = 4 * 1024 * 1024
+DEFAULT_MAX_IN_FLIGHT = 64
+
+# Number of recent request latencies kept for percentiles
+LATENCY_WINDOW = 10000
+
+
+class Metrics:
+    """Request counters and a sliding window of latencies"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.connections = 0
+        self.in_flight = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def percentiles(self) -> Dict[str, float]:
+        """Latency percentiles in milliseconds over the recent window"""
+        if not self.latencies:
+            return {}
+        ordered = sorted(self.latencies)
+        last = len(ordered) - 1
+        return {
+            name: round(ordered[min(last, int(fraction * len(ordered)))] * 1000, 3)
+            for name, fraction in (('p50', 0.50), ('p90', 0.90), ('p99', 0.99), ('max', 1.0))
+        }
+
+    def snapshot(self) -> dict:
+        """Current metrics as a JSON-serializable dict"""
+        return {
+            'uptime_s': round(time.time() - self.started, 3),
+            'requests': self.requests,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'connections': self.connections,
+            'in_flight': self.in_flight,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'latency_ms': self.percentiles(),
+        }
+
+
+class RenderServer:
+    """Serve conversions from one warm converter per (style, max_mode)
+
+    Rendering runs on a thread pool so the event loop keeps accepting and
+    reading while large documents convert. At most max_in_flight requests
+    render at once; further requests wait, and connections stop being read,
+    so clients see backpressure instead of unbounded queueing.
+    """
+
+    def __init__(self, max_request_bytes: int = DEFAULT_MAX_REQUEST_BYTES,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, threads: Optional[int] = None):
+        self.max_request_bytes = max_request_bytes
+        self.max_in_flight = max_in_flight
+        self.metrics = Metrics()
+        self.converters: Dict[Tuple[str, bool], MarkdownToANSIConverter] = {
+            (name, max_mode): MarkdownToANSIConverter(name, max_mode=max_mode)
+            for name in THEMES for max_mode in (False, True)
+        }
+        self._executor = ThreadPoolExecutor(max_workers=threads or min(32, (os.cpu_count() or 1) + 4))
+        self._slots = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve one connection until it closes"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        metrics = self.metrics
+        metrics.connections += 1
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    metrics.rejected += 1
+                    await self._reply(writer, {'error': f"request exceeds {self.max_request_bytes} bytes"})
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                metrics.bytes_in += len(line)
+                try:
+                    response = await self._respond(line)
+                except Exception as e:
+                    # A request that breaks the server still gets its reply
+                    metrics.errors += 1
+                    response = {'error': f"internal error: {type(e).__name__}: {e}"}
+                await self._reply(writer, response)
+        except ConnectionError:
+            pass
+        finally:
+            metrics.connections -= 1
+            writer.close()
+
+    async def _respond(self, line: bytes) -> dict:
+        """Handle one request line and build its response"""
+        metrics = self.metrics
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError('request must be a JSON object')
+            if not isinstance(request.get('op', 'render'), str):
+                raise ValueError('"op" must be a string')
+            if not isinstance(request.get('style', 'beach'), str):
+                raise ValueError('"style" must be a string')
+            if not isinstance(request.get('max', False), bool):
+                raise ValueError('"max" must be true or false')
+        except (ValueError, RecursionError) as e:
+            metrics.errors += 1
+            response = {'id': request['id']} if isinstance(request, dict) and 'id' in request else {}
+            response['error'] = f"invalid request: {e}"
+            return response
+
+        response = {'id': request['id']} if 'id' in request else {}
+        op = request.get('op', 'render')
+        if op == 'metrics':
+            response['metrics'] = metrics.snapshot()
+            return response
+        if op == 'ping':
+            response['ok'] = True
+            return response
+        if op != 'render':
+            metrics.errors += 1
+            response['error'] = f"unknown op: {op}"
+            return response
+
+        text = request.get('text')
+        style_name = request.get('style', 'beach')
+        converter = self.converters.get((style_name, request.get('max', False)))
+        if not isinstance(text, str) or converter is None:
+            metrics.errors += 1
+            response['error'] = 'render needs a "text" string and a known "style"'
+            return response
+
+        start = time.perf_counter()
+        async with self._slots:
+            metrics.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                response['output'] = await loop.run_in_executor(self._executor, converter.convert, text)
+            except Exception as e:
+                metrics.errors += 1
+                response['error'] = f"error converting content: {e}"
+            finally:
+                metrics.in_flight -= 1
+        metrics.requests += 1
+        metrics.latencies.append(time.perf_counter() - start)
+        return response
+
+    async def _reply(self, writer: asyncio.StreamWriter, response: dict) -> None:
+        """Write one response line, waiting if the client is slow to read"""
+        data = json.dumps(response, ensure_ascii=False).encode('utf-8') + b'\n'
+        self.metrics.bytes_out += len(data)
+        writer.write(data)
+        await writer.drain()
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT,
+                    unix_path: Optional[str] = None):
+        """Start listening; returns the asyncio server"""
+        # The reader limit bounds how much of a single request is buffered
+        limit = self.max_request_bytes + 1
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            return await asyncio.start_unix_server(self.handle, path=unix_path, limit=limit)
+        return await asyncio.start_server(self.handle, host, port, limit=limit)
+
+    def close(self) -> None:
+        """Stop the render threads"""
+        self._executor.shutdown(wait=False)
+
+
+async def serve(args) -> None:
+    """Run the server until cancelled"""
+    render_server = RenderServer(args.max_request_bytes, args.max_in_flight, args.threads)
+    server = await render_server.start(args.host, args.port, args.unix)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"md-ansi serving on {where}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        render_server.close()
+
+
+def main(argv=None):
+    """Entry point for md-ansi serve"""
+    parser = argparse.ArgumentParser(
+        prog='md-ansi serve',
+        description='Serve conversions over a JSON-lines socket protocol'
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='TCP host (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'TCP port (default: {DEFAULT_PORT})')
+    parser.add_argument('--unix', metavar='PATH', help='Listen on a Unix socket instead of TCP')
+    parser.add_argument('--max-request-bytes', type=int, default=DEFAULT_MAX_REQUEST_BYTES,
+                        help=f'Largest accepted request line (default: {DEFAULT_MAX_REQUEST_BYTES})')
+    parser.add_argument('--max-in-flight', type=int, default=DEFAULT_MAX_IN_FLIGHT,
+                        help=f'Requests rendered at once before callers wait (default: {DEFAULT_MAX_IN_FLIGHT})')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Render threads (default: CPUs + 4, at most 32)')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
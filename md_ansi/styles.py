@@ -2,6 +2,9 @@
 ANSI Style definitions for different themes
 """
 
+from collections.abc import Mapping
+
+
 class ANSIColors:
     """ANSI color codes"""
     # Reset
@@ -59,6 +62,17 @@ class StyleTheme:
         self.quote_color = ANSIColors.MAGENTA
         self.border_color = ANSIColors.WHITE
         self.background_color = ''
+        # Diff lines in highlighted code blocks
+        self.added_color = ANSIColors.GREEN
+        self.removed_color = ANSIColors.RED
+        # 24-bit colors used at 256-color and truecolor depth: attribute name ->
+        # '#rrggbb' foreground, or a (foreground, background) pair (see colors.py)
+        self.rgb = {}
+        # Reduce the rgb colors to basic ones at 16-color depth instead of
+        # keeping the escape strings above (for themes defined only in RGB)
+        self.basic_colors_from_rgb = False
+        # Depth the escape strings are written for; set by colors.theme_at_depth
+        self.color_depth = '16'
 
 
 class BeachTheme(StyleTheme):
@@ -74,6 +88,17 @@ class BeachTheme(StyleTheme):
         self.list_color = ANSIColors.YELLOW
         self.quote_color = ANSIColors.BRIGHT_CYAN
         self.border_color = ANSIColors.BRIGHT_YELLOW
+        self.rgb = {
+            'header_color': '#4de8f4',
+            'text_color': '#3b8fd9',
+            'emphasis_color': '#ffe08a',
+            'strong_color': '#5aa9ff',
+            'code_color': '#40c4c4',
+            'link_color': '#74c0ff',
+            'list_color': '#f2c14e',
+            'quote_color': '#7fe7e0',
+            'border_color': '#ffd36e',
+        }
 
 
 class VaporwaveTheme(StyleTheme):
@@ -89,6 +114,17 @@ class VaporwaveTheme(StyleTheme):
         self.list_color = ANSIColors.BRIGHT_CYAN
         self.quote_color = ANSIColors.MAGENTA + ANSIColors.ITALIC
         self.border_color = ANSIColors.BRIGHT_MAGENTA
+        self.rgb = {
+            'header_color': '#ff71ce',
+            'text_color': '#01cdfe',
+            'emphasis_color': '#ff9de2',
+            'strong_color': '#b967ff',
+            'code_color': ('#05ffa1', '#4b1d6e'),
+            'link_color': '#ff71ce',
+            'list_color': '#01cdfe',
+            'quote_color': '#b967ff',
+            'border_color': '#ff71ce',
+        }
 
 
 class EdgelordTheme(StyleTheme):
@@ -104,6 +140,17 @@ class EdgelordTheme(StyleTheme):
         self.list_color = ANSIColors.BRIGHT_BLACK
         self.quote_color = ANSIColors.RED + ANSIColors.ITALIC
         self.border_color = ANSIColors.BRIGHT_RED
+        self.rgb = {
+            'header_color': '#ff2a2a',
+            'text_color': '#c8c8c8',
+            'emphasis_color': '#b01010',
+            'strong_color': '#ff3030',
+            'code_color': ('#8a8a8a', '#4a0000'),
+            'link_color': '#a00000',
+            'list_color': '#5a5a5a',
+            'quote_color': '#8b0000',
+            'border_color': '#e00000',
+        }
 
 
 class RainbowTheme(StyleTheme):
@@ -119,6 +166,17 @@ class RainbowTheme(StyleTheme):
         self.list_color = ANSIColors.BRIGHT_CYAN
         self.quote_color = ANSIColors.YELLOW + ANSIColors.ITALIC
         self.border_color = ANSIColors.BRIGHT_WHITE
+        self.rgb = {
+            'header_color': '#ff4040',
+            'text_color': '#f0f0f0',
+            'emphasis_color': '#ffe14d',
+            'strong_color': '#4dff88',
+            'code_color': '#5c8dff',
+            'link_color': '#ff5cf4',
+            'list_color': '#4de1ff',
+            'quote_color': '#ffb347',
+            'border_color': '#ffffff',
+        }
 
 
 class HelveticaTheme(StyleTheme):
@@ -134,6 +192,17 @@ class HelveticaTheme(StyleTheme):
         self.list_color = ANSIColors.BRIGHT_BLACK
         self.quote_color = ANSIColors.BRIGHT_BLACK + ANSIColors.ITALIC
         self.border_color = ANSIColors.BRIGHT_WHITE
+        self.rgb = {
+            'header_color': '#ffffff',
+            'text_color': '#d0d0d0',
+            'emphasis_color': '#f0f0f0',
+            'strong_color': '#ffffff',
+            'code_color': ('#303030', '#e4e4e4'),
+            'link_color': '#ffffff',
+            'list_color': '#808080',
+            'quote_color': '#9e9e9e',
+            'border_color': '#ffffff',
+        }
 
 
 class CODCTheme(StyleTheme):
@@ -149,19 +218,65 @@ class CODCTheme(StyleTheme):
         self.list_color = ANSIColors.BRIGHT_GREEN
         self.quote_color = ANSIColors.GREEN + ANSIColors.ITALIC
         self.border_color = ANSIColors.BRIGHT_GREEN
+        self.rgb = {
+            'header_color': '#39ff14',
+            'text_color': '#20c040',
+            'emphasis_color': '#7dff6a',
+            'strong_color': '#39ff14',
+            'code_color': ('#39ff14', '#0a0f0a'),
+            'link_color': '#22aa44',
+            'list_color': '#5cff5c',
+            'quote_color': '#2e8b57',
+            'border_color': '#39ff14',
+        }
+
+
+class ThemeRegistry(Mapping):
+    """Theme name -> theme, built from its factory on first access"""
+    
+    def __init__(self, factories):
+        self._factories = dict(factories)
+        self._themes = {}
+    
+    def register(self, name, factory):
+        """Add or replace a theme factory
+        
+        Replacing a theme makes a new instance on next access. Caches of
+        derived data (render plans, per-depth themes, syntax palettes,
+        pooled converters) keep the theme they were built from and are
+        rebuilt when it is no longer the registered one.
+        """
+        self._factories[name] = factory
+        self._themes.pop(name, None)
+    
+    def __getitem__(self, name):
+        theme = self._themes.get(name)
+        if theme is None:
+            theme = self._themes[name] = self._factories[name]()
+        return theme
+    
+    def __contains__(self, name):
+        return name in self._factories
+    
+    def __iter__(self):
+        return iter(self._factories)
+    
+    def __len__(self):
+        return len(self._factories)
 
 
-# Theme registry
-THEMES = {
-    'beach': BeachTheme(),
-    'vaporwave': VaporwaveTheme(),
-    'edgelord': EdgelordTheme(),
-    'rainbow': RainbowTheme(),
-    'helvetica': HelveticaTheme(),
-    'codc': CODCTheme()
-}
+# Theme registry; themes are instantiated on first use
+THEMES = ThemeRegistry({
+    'beach': BeachTheme,
+    'vaporwave': VaporwaveTheme,
+    'edgelord': EdgelordTheme,
+    'rainbow': RainbowTheme,
+    'helvetica': HelveticaTheme,
+    'codc': CODCTheme,
+})
 
 
 def get_theme(name):
     """Get a theme by name"""
-    return THEMES.get(name.lower(), THEMES['beach'])  # Default to beach theme
\ No newline at end of file
+    name = name.lower()
+    return THEMES[name] if name in THEMES else THEMES['beach']  # Default to beach theme
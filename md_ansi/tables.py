@@ -0,0 +1,166 @@
+"""
+GitHub-style pipe tables: row parsing and precomputed column layouts
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple
+from .classify import PARAGRAPH, classify_line
+from .width import expand_tabs, truncate_ansi, visible_width
+
+
+# Body rows measured for the column widths. Bigger tables are sized from
+# this many leading rows, so they can be streamed with bounded memory;
+# later cells wider than their column are cut to fit.
+TABLE_SAMPLE_ROWS = 1024
+
+# Column alignments
+LEFT = 0
+CENTER = 1
+RIGHT = 2
+
+# A delimiter row cell: dashes with optional colons marking the alignment
+_DELIMITER_CELL = re.compile(r':?-+:?')
+
+# Pipes that separate cells (a backslash escapes a pipe inside a cell)
+_CELL_SEPARATOR = re.compile(r'(?<!\\)\|')
+
+# An inline-formatted cell and its display width
+Cell = Tuple[str, int]
+
+
+def split_row(line: str) -> List[str]:
+    """Cells of a table row, without the outer pipes and surrounding spaces
+
+    Tabs inside a cell are expanded from the cell's start, since the
+    terminal's tab stops would not line up with the padded columns.
+    """
+    text = line.strip()
+    if text.startswith('|'):
+        text = text[1:]
+    if text.endswith('|') and not text.endswith('\\|'):
+        text = text[:-1]
+    if '\\|' not in text:
+        cells = [cell.strip() for cell in text.split('|')]
+    else:
+        cells = [cell.strip().replace('\\|', '|') for cell in _CELL_SEPARATOR.split(text)]
+    if '\t' in text:
+        cells = [expand_tabs(cell) for cell in cells]
+    return cells
+
+
+def table_alignments(header: str, delimiter: str) -> Optional[List[int]]:
+    """Column alignments if two lines start a table, otherwise None
+
+    The header must be a paragraph line with a pipe in it, and the line
+    after it a delimiter row (such as ``| :--- | ---: |``) with the same
+    number of cells.
+    """
+    if '|' not in header or '|' not in delimiter or '-' not in delimiter:
+        return None
+    aligns = []
+    for cell in split_row(delimiter):
+        if not _DELIMITER_CELL.fullmatch(cell):
+            return None
+        if cell[0] == ':':
+            aligns.append(CENTER if cell[-1] == ':' else LEFT)
+        else:
+            aligns.append(RIGHT if cell[-1] == ':' else LEFT)
+    if len(split_row(header)) != len(aligns):
+        return None
+    if classify_line(header)[0] != PARAGRAPH or classify_line(delimiter)[0] != PARAGRAPH:
+        return None
+    return aligns
+
+
+def is_table_row(line: str) -> bool:
+    """Whether a line after a delimiter row continues the table
+
+    A table ends at a blank line or any line that is not a paragraph, so
+    a table always lies within one run of consecutive paragraph lines.
+    """
+    return classify_line(line)[0] == PARAGRAPH
+
+
+def table_end(lines: Sequence[str], start: int) -> int:
+    """Index of the first line at or after start that is not a table row"""
+    count = len(lines)
+    while start < count and is_table_row(lines[start]):
+        start += 1
+    return start
+
+
+def fit_widths(widths: List[int], available: int) -> List[int]:
+    """Cap the widest columns so the column widths add up to at most available
+
+    Finds the largest cap that fits by binary search, so narrow columns
+    keep their width. Every column keeps at least one column.
+    """
+    if sum(widths) <= available:
+        return widths
+    low, high = 1, max(widths)
+    while low < high:
+        cap = (low + high + 1) // 2
+        if sum(min(width, cap) for width in widths) <= available:
+            low = cap
+        else:
+            high = cap - 1
+    return [min(width, low) for width in widths]
+
+
+class TableLayout:
+    """Column widths of one table and the strings its lines are built from
+
+    Borders and the row template (a %-format string with one slot per
+    cell) are built once per table, so a row costs one padding lookup per
+    cell and a single string format.
+    """
+
+    __slots__ = ('aligns', 'widths', 'top', 'separator', 'bottom', 'template', 'pads',
+                 'header_color', 'body_color')
+
+    def __init__(self, plan, aligns: List[int], widths: List[int]):
+        (top_left, top_mid, top_right, mid_left, mid_mid, mid_right,
+         bottom_left, bottom_mid, bottom_right, horizontal, vertical) = plan.table_chars
+        border = plan.table_border
+        reset = plan.reset
+        rules = [horizontal * (width + 2) for width in widths]
+        self.aligns = aligns
+        self.widths = widths
+        self.top = f"{border}{top_left}{top_mid.join(rules)}{top_right}{reset}"
+        self.separator = f"{border}{mid_left}{mid_mid.join(rules)}{mid_right}{reset}"
+        self.bottom = f"{border}{bottom_left}{bottom_mid.join(rules)}{bottom_right}{reset}"
+        bar = f"{border}{vertical}{reset}"
+        self.template = f"{bar} " + f"{reset} {bar} ".join(['%s'] * len(widths)) + f"{reset} {bar}"
+        self.pads = [' ' * count for count in range(max(widths) + 1)]
+        self.header_color = plan.table_header
+        self.body_color = plan.paragraph_prefix
+
+    def row(self, cells: Sequence[Cell], color: str) -> str:
+        """One table row from its formatted cells"""
+        pads = self.pads
+        parts = []
+        for (text, width), column, align in zip(cells, self.widths, self.aligns):
+            if width > column:
+                text = truncate_ansi(text, column)
+                width = visible_width(text)
+            pad = column - width
+            if align == LEFT:
+                parts.append(f"{color}{text}{pads[pad]}")
+            elif align == RIGHT:
+                parts.append(f"{color}{pads[pad]}{text}")
+            else:
+                parts.append(f"{color}{pads[pad // 2]}{text}{pads[pad - pad // 2]}")
+        return self.template % tuple(parts)
+
+    def header_chunk(self, cells: Sequence[Cell]) -> str:
+        """Rendered header row, under the top border"""
+        return f"{self.top}\n{self.row(cells, self.header_color)}"
+
+    def delimiter_chunk(self, has_rows: bool) -> str:
+        """Rendered delimiter row: the rule under the header, or the bottom border"""
+        return self.separator if has_rows else self.bottom
+
+    def row_chunk(self, cells: Sequence[Cell], last: bool) -> str:
+        """Rendered body row, with the bottom border under the last one"""
+        row = self.row(cells, self.body_color)
+        return f"{row}\n{self.bottom}" if last else row
@@ -0,0 +1,474 @@
+"""
+Random-access rendering of huge documents through a persistent line index
+
+A file is scanned once into a LineIndex: the byte offset of every line,
+the code block state every ``interval`` lines and the position of every
+header and table. Rendering lines [start, stop) then decodes just those
+lines, after replaying at most ``interval`` lines from the nearest
+checkpoint to recover the code block state. The index is saved beside the
+file (``name.md.mdidx``) and reused while the file's size and modification
+time are unchanged.
+"""
+
+import json
+import mmap
+import os
+import re
+import sys
+from array import array
+from bisect import bisect_right
+from itertools import accumulate, count
+from operator import add
+from typing import List, Optional, Tuple
+from .classify import FENCE, HEADER, Fence, classify_line, closes_fence
+from .converter import MarkdownToANSIConverter
+from .tables import TABLE_SAMPLE_ROWS, is_table_row, table_alignments
+
+
+# Lines between code block state checkpoints; rendering a slice replays at most this many
+CHECKPOINT_INTERVAL = 256
+
+# Bytes of the file scanned per block while building an index
+SCAN_BLOCK = 8 * 1024 * 1024
+
+INDEX_SUFFIX = '.mdidx'
+INDEX_MAGIC = b'MDIX'
+# Bump whenever line classification changes, so older index files are rebuilt
+INDEX_VERSION = 2
+
+# Lines that can open or close a code block or be a header: the first
+# character after any whitespace (or non-ASCII bytes, which may be Unicode
+# whitespace) is '#', '`' or '~'. Lines made only of '|', ':', '-' and such
+# whitespace may be a table's delimiter row. Every other line is skipped
+# while scanning. Matching from the newline rather than with ^ lets the
+# regex engine jump between newlines instead of trying every byte.
+_CANDIDATE = re.compile(
+    rb'\n[\t\x0b\x0c\r\x1c-\x1f \x80-\xff]*(?:[#`~]|[|:-][\t\x0b\x0c\r\x1c-\x1f \x80-\xff|:-]*(?![^\n]))'
+)
+
+
+class LineIndex:
+    """Line offsets, code block checkpoints, header and table positions of one file
+
+    offsets[i] is the byte offset where line i starts, with a final entry
+    one past the end of the file, so line i is the bytes between offsets[i]
+    and offsets[i + 1] - 1. Checkpoint k holds the code block state before
+    line k * interval, as an index into fences (None for outside a block),
+    and the line where that block was opened (-1 outside a block). Table k
+    spans lines table_starts[k] (its header row) to table_ends[k], exclusive.
+    """
+
+    __slots__ = (
+        'size', 'mtime_ns', 'encoding', 'interval', 'offsets', 'fences',
+        'checkpoint_fences', 'checkpoint_openers', 'header_lines', 'header_levels',
+        'table_starts', 'table_ends',
+    )
+
+    def __init__(self, size: int, mtime_ns: int, encoding: str, interval: int):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.encoding = encoding
+        self.interval = interval
+        # 4-byte offsets unless the file is 4 GB or larger
+        self.offsets = array('I' if size + 1 < 2 ** 32 else 'Q')
+        self.fences: List[Optional[Fence]] = [None]
+        self.checkpoint_fences = array('I')
+        self.checkpoint_openers = array('q')
+        self.header_lines = array('Q')
+        self.header_levels = array('I')
+        self.table_starts = array('Q')
+        self.table_ends = array('Q')
+
+    @property
+    def line_count(self) -> int:
+        """Number of lines, counted like ``text.split('\\n')``"""
+        return len(self.offsets) - 1
+
+    def checkpoint(self, line: int) -> Tuple[int, Optional[Fence], int]:
+        """Nearest checkpoint at or before a line: (its line, fence state, opener line)"""
+        k = line // self.interval
+        return k * self.interval, self.fences[self.checkpoint_fences[k]], self.checkpoint_openers[k]
+
+    def matches(self, stat: os.stat_result, encoding: str, interval: int) -> bool:
+        """Whether the index describes a file with this stat and settings"""
+        return (self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+                and self.encoding == encoding and self.interval == interval)
+
+    def table_at(self, line: int) -> int:
+        """Index of the table a line belongs to, or -1"""
+        k = bisect_right(self.table_starts, line) - 1
+        return k if k >= 0 and line < self.table_ends[k] else -1
+
+    @property
+    def arrays(self) -> Tuple[array, ...]:
+        """The index's arrays, in the order they are saved"""
+        return (self.offsets, self.checkpoint_fences, self.checkpoint_openers,
+                self.header_lines, self.header_levels, self.table_starts, self.table_ends)
+
+
+def index_path(path) -> str:
+    """Where the index of a file is saved"""
+    return os.fspath(path) + INDEX_SUFFIX
+
+
+def _map(f, size: int):
+    """Memory-map an open file read-only; empty files get an empty bytes object"""
+    if size == 0:
+        return b''
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def build_index(path, interval: int = CHECKPOINT_INTERVAL, encoding: str = 'utf-8') -> LineIndex:
+    """Scan a file once and build its index
+
+    Line offsets are collected a block at a time without a Python loop per
+    line; only lines that may be fences, headers or table delimiter rows
+    are decoded and classified, plus the rows of each table found.
+    """
+    if interval < 1:
+        raise ValueError(f"checkpoint interval must be positive, got {interval}")
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        index = LineIndex(stat.st_size, stat.st_mtime_ns, encoding, interval)
+        mapped = _map(f, stat.st_size)
+        try:
+            _scan(index, mapped)
+        finally:
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+    return index
+
+
+def _scan(index: LineIndex, mapped) -> None:
+    """Fill in an index from the file contents"""
+    size = index.size
+    interval = index.interval
+    encoding = index.encoding
+    offsets = index.offsets
+    checkpoint_fences = index.checkpoint_fences
+    checkpoint_openers = index.checkpoint_openers
+    fence_ids = {None: 0}
+    fence = None
+    fence_id = 0
+    opener = -1
+    # Byte offset where the last table found ends; candidates before it are its rows
+    table_stop = 0
+
+    offsets.append(0)
+    pos = 0
+    while pos < size:
+        # Cut each block after its last newline, so lines are never split
+        stop = pos + SCAN_BLOCK
+        if stop >= size:
+            end = size
+        else:
+            end = mapped.rfind(b'\n', pos, stop) + 1
+            if not end:
+                end = mapped.find(b'\n', stop) + 1 or size
+        block = mapped[pos:end]
+        first_line = len(offsets) - 1
+
+        # Each newline starts a line: offsets are running sums of line lengths plus one
+        parts = block.split(b'\n')
+        offsets.extend(map(add, accumulate(map(len, parts[:-1])), count(pos + 1)))
+        del parts
+
+        line = first_line
+        counted = 0
+        # With a newline in front, a match's start is the offset of its line in block
+        for match in _CANDIDATE.finditer(b'\n' + block):
+            start = match.start()
+            line += block.count(b'\n', counted, start)
+            counted = start
+            # Checkpoints up to here hold the state before this line
+            while len(checkpoint_fences) * interval <= line:
+                checkpoint_fences.append(fence_id)
+                checkpoint_openers.append(opener)
+
+            if pos + start < table_stop:
+                continue
+            line_end = block.find(b'\n', start)
+            text = block[start:line_end if line_end >= 0 else len(block)].decode(encoding)
+            if fence is None and line > 0 and text.lstrip()[:1] in ('|', ':', '-'):
+                header = mapped[offsets[line - 1]:offsets[line] - 1].decode(encoding)
+                if table_alignments(header, text) is not None:
+                    index.table_starts.append(line - 1)
+                    newline = pos + line_end if line_end >= 0 else size
+                    end_line, table_stop = _table_end(mapped, newline, line + 1, size, encoding)
+                    index.table_ends.append(end_line)
+                    continue
+            if fence is not None:
+                if closes_fence(text, fence):
+                    fence = None
+                    fence_id = 0
+                    opener = -1
+                continue
+            info = classify_line(text)
+            if info[0] == FENCE:
+                fence = info[2]
+                fence_id = fence_ids.get(fence)
+                if fence_id is None:
+                    fence_id = fence_ids[fence] = len(index.fences)
+                    index.fences.append(fence)
+                opener = line
+            elif info[0] == HEADER:
+                index.header_lines.append(line)
+                index.header_levels.append(info[2])
+        pos = end
+
+    line_count = len(offsets)
+    while len(checkpoint_fences) * interval < line_count:
+        checkpoint_fences.append(fence_id)
+        checkpoint_openers.append(opener)
+    offsets.append(size + 1)
+
+
+def _table_end(mapped, newline: int, line: int, size: int, encoding: str) -> Tuple[int, int]:
+    """First line after a table's rows, and its byte offset
+
+    newline is the offset of the newline before line, the first body row.
+    """
+    while newline < size:
+        line_end = mapped.find(b'\n', newline + 1)
+        if line_end < 0:
+            line_end = size
+        if not is_table_row(mapped[newline + 1:line_end].decode(encoding)):
+            return line, newline + 1
+        newline = line_end
+        line += 1
+    return line, size + 1
+
+
+def save_index(index: LineIndex, path) -> None:
+    """Write an index file: magic, header length, JSON header, then the raw arrays
+
+    The file is written under a temporary name and renamed into place, so
+    readers never see a partial index.
+    """
+    arrays = index.arrays
+    header = json.dumps({
+        'version': INDEX_VERSION,
+        'byteorder': sys.byteorder,
+        'size': index.size,
+        'mtime_ns': index.mtime_ns,
+        'encoding': index.encoding,
+        'interval': index.interval,
+        'fences': [list(fence) for fence in index.fences[1:]],
+        'arrays': [[a.typecode, a.itemsize, len(a)] for a in arrays],
+    }).encode('utf-8')
+    temp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            for a in arrays:
+                a.tofile(f)
+        os.replace(temp, path)
+    except BaseException:
+        try:
+            os.unlink(temp)
+        except OSError:
+            pass
+        raise
+
+
+def load_index(path) -> Optional[LineIndex]:
+    """Read an index file; None if it is missing, damaged or from another version"""
+    try:
+        with open(path, 'rb') as f:
+            if f.read(4) != INDEX_MAGIC:
+                return None
+            header = json.loads(f.read(int.from_bytes(f.read(4), 'little')))
+            if header['version'] != INDEX_VERSION or header['byteorder'] != sys.byteorder:
+                return None
+            index = LineIndex(header['size'], header['mtime_ns'], header['encoding'],
+                              header['interval'])
+            index.fences.extend(Fence(*fence) for fence in header['fences'])
+            index.offsets = array(header['arrays'][0][0])
+            arrays = index.arrays
+            for a, (typecode, itemsize, length) in zip(arrays, header['arrays']):
+                if a.typecode != typecode or a.itemsize != itemsize:
+                    return None
+                a.fromfile(f, length)
+    except (OSError, EOFError, ValueError, KeyError, TypeError, IndexError):
+        return None
+    if index.line_count < 1 or len(index.checkpoint_fences) * index.interval < index.line_count:
+        return None
+    if len(index.table_starts) != len(index.table_ends):
+        return None
+    return index
+
+
+def open_index(path, interval: int = CHECKPOINT_INTERVAL, encoding: str = 'utf-8',
+               persist: bool = True) -> LineIndex:
+    """The index of a file, loaded from beside it when still current, else rebuilt
+
+    With persist, a rebuilt index is saved for next time; a directory that
+    cannot be written to just means the index is rebuilt on every open.
+    """
+    stat = os.stat(path)
+    saved = index_path(path)
+    index = load_index(saved) if persist else None
+    if index is not None and index.matches(stat, encoding, interval):
+        return index
+    index = build_index(path, interval, encoding)
+    if persist:
+        try:
+            save_index(index, saved)
+        except OSError:
+            pass
+    return index
+
+
+class IndexedDocument:
+    """A markdown file opened for random-access rendering
+
+    render_range gives the same chunks, one per source line, as
+    convert_stream would for those lines (without minifying), so a pager
+    can render only what is on screen. Use as a context manager, or call
+    close, to release the memory map.
+    """
+
+    def __init__(self, path, converter: Optional[MarkdownToANSIConverter] = None,
+                 style_name='beach', max_mode=False, interval: int = CHECKPOINT_INTERVAL,
+                 encoding: str = 'utf-8', persist: bool = True):
+        self.converter = converter or MarkdownToANSIConverter(style_name, max_mode=max_mode)
+        self.index = open_index(path, interval, encoding, persist)
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size != self.index.size:
+            self._file.close()
+            raise RuntimeError(f"'{os.fspath(path)}' changed while it was being indexed")
+        self._mapped = _map(self._file, self.index.size)
+        # Table index -> (layout, header cells), measured on first view
+        self._tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map and the file"""
+        if isinstance(self._mapped, mmap.mmap):
+            self._mapped.close()
+        self._file.close()
+
+    @property
+    def line_count(self) -> int:
+        """Number of source lines"""
+        return self.index.line_count
+
+    def lines(self, start: int, stop: int) -> List[str]:
+        """Source lines [start, stop), decoded in one piece"""
+        offsets = self.index.offsets
+        start = max(0, start)
+        stop = min(stop, self.index.line_count)
+        if start >= stop:
+            return []
+        data = self._mapped[offsets[start]:offsets[stop] - 1]
+        return data.decode(self.index.encoding).split('\n')
+
+    def toc(self) -> List[Tuple[int, int, str]]:
+        """Table of contents: (line, level, title) for every header"""
+        entries = []
+        for line, level in zip(self.index.header_lines, self.index.header_levels):
+            text = self.lines(line, line + 1)[0]
+            entries.append((line, level, text[classify_line(text)[3]:].strip()))
+        return entries
+
+    def render_range(self, start: int, stop: int) -> List[str]:
+        """Render source lines [start, stop), one chunk per line
+
+        Header chunks may span several terminal lines, as in convert_stream.
+        Tables are sized as convert_stream sizes them, from their header and
+        first TABLE_SAMPLE_ROWS body rows, wherever the range starts.
+        """
+        start = max(0, start)
+        stop = min(stop, self.index.line_count)
+        if start >= stop:
+            return []
+        line, fence, opener = self.index.checkpoint(start)
+        lines = self.lines(line, stop)
+
+        # Recover the code block state at start without rendering
+        for number in range(line, start):
+            text = lines[number - line]
+            if fence is not None:
+                if closes_fence(text, fence):
+                    fence = None
+            else:
+                info = classify_line(text)
+                if info[0] == FENCE:
+                    fence = info[2]
+                    opener = number
+
+        converter = self.converter
+        render_line = converter.render_line
+        highlight = converter.highlight
+        index = self.index
+        chunks = []
+        # Rendered body of the highlighted code block in view, () if it stays plain
+        block = None
+        for number in range(start, stop):
+            text = lines[number - line]
+            if fence is None and index.table_starts:
+                table = index.table_at(number)
+                if table >= 0:
+                    chunks.append(self._table_chunk(table, number, text))
+                    continue
+            if fence is not None and highlight and not closes_fence(text, fence):
+                if block is None:
+                    block = self._highlighted_block(opener, fence) or ()
+                if block:
+                    chunks.append(block[number - opener - 1])
+                    continue
+            opened = fence is None
+            chunk, fence = render_line(text, fence)
+            chunks.append(chunk)
+            if fence is None or opened:
+                opener = number
+                block = None
+        return chunks
+
+    def _table_chunk(self, table: int, number: int, text: str) -> str:
+        """Render one line of a table, measuring the table on first use"""
+        first = self.index.table_starts[table]
+        end = self.index.table_ends[table]
+        measured = self._tables.get(table)
+        if measured is None:
+            header = self.lines(first, first + 1)[0]
+            delimiter = self.lines(first + 1, first + 2)[0]
+            rows = self.lines(first + 2, min(end, first + 2 + TABLE_SAMPLE_ROWS))
+            layout, cells = self.converter._measure_table(header, table_alignments(header, delimiter), rows)
+            measured = self._tables[table] = (layout, cells[0])
+        layout = measured[0]
+        if number == first:
+            return layout.header_chunk(measured[1])
+        if number == first + 1:
+            return layout.delimiter_chunk(end > first + 2)
+        return layout.row_chunk(self.converter._table_cells(text, len(layout.widths)), number == end - 1)
+
+    def _highlighted_block(self, opener: int, fence: Fence) -> Optional[List[str]]:
+        """Highlight a whole code block the way convert_stream does, if it would
+
+        Blocks in unknown languages, or too big to highlight, give None and
+        are rendered plainly. At most HIGHLIGHT_MAX_CHARS are read.
+        """
+        from .highlight import HIGHLIGHT_MAX_CHARS, get_lexer
+        if not get_lexer(fence.info):
+            return None
+        body = []
+        size = 0
+        number = opener + 1
+        while number < self.index.line_count:
+            text = self.lines(number, number + 1)[0]
+            if closes_fence(text, fence):
+                break
+            size += len(text) + 1
+            if size > HIGHLIGHT_MAX_CHARS:
+                return None
+            body.append(text)
+            number += 1
+        return self.converter._code_block_lines(body, fence.info)
@@ -0,0 +1,359 @@
+"""
+Watch a directory tree and re-render the markdown files that change
+
+The tree is indexed once at startup: the mtime and size of every markdown
+file and the mtime of every directory. A poll then stats every directory,
+which catches files being added, removed or replaced by a rename (how most
+editors save), plus the files that changed recently and a rotating share
+of the rest, so that every file is still checked once per sweep interval.
+An idle poll of a large tree therefore stats each directory and a tenth of
+the files (POLL_INTERVAL / SWEEP_INTERVAL) rather than every file; trees of
+up to MIN_SWEEP_FILES files are stat'd whole on every poll, so an in-place
+edit shows up within one poll interval there and within one sweep interval
+in larger trees.
+
+A file saved twice within its file system's timestamp granularity can keep
+the same mtime and size. While a file's mtime is that recent, a hash of its
+content is kept and compared on every poll, as git does for racily clean
+index entries.
+"""
+
+import os
+import time
+import zlib
+from math import ceil
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from .batch import Job, convert_file, init_worker, report_error, run_batch
+
+
+# Files watched, by suffix
+SUFFIXES = ('.md', '.markdown')
+
+# Seconds between polls while nothing is pending
+POLL_INTERVAL = 0.5
+
+# Every file is stat'd at least once this many seconds, even if its directory is unchanged
+SWEEP_INTERVAL = 5.0
+
+# Trees with up to this many files have every file stat'd on every poll
+MIN_SWEEP_FILES = 1000
+
+# A burst of changes is rebuilt once no new change was seen for DEBOUNCE
+# seconds, or MAX_DELAY seconds after its first change at the latest
+DEBOUNCE = 0.1
+MAX_DELAY = 1.0
+
+# Files changed within this many seconds are stat'd on every poll
+HOT_SECONDS = 60.0
+
+# Coarsest mtime granularity allowed for (FAT has 2 s): a file whose mtime
+# is less than this before the time it was checked may change again
+# without its mtime moving, so its content is compared too
+RACY_NS = 2_000_000_000
+
+# (mtime_ns, size) of a file
+Stat = Tuple[int, int]
+
+
+def sweep_size(files: int, poll_interval: float = POLL_INTERVAL,
+               sweep_interval: float = SWEEP_INTERVAL) -> int:
+    """Files a poll stats in rotation, so all of them are checked once per sweep interval"""
+    return max(MIN_SWEEP_FILES, ceil(files / max(1.0, sweep_interval / poll_interval)))
+
+
+def content_hash(path: str) -> Optional[int]:
+    """CRC-32 of a file's content; None if it cannot be read"""
+    try:
+        with open(path, 'rb') as f:
+            return zlib.crc32(f.read())
+    except OSError:
+        return None
+
+
+class TreeIndex:
+    """Stat index of the markdown files and directories under a root
+
+    poll compares the tree against the index, updates it and returns the
+    files added or modified and the files removed since the last poll.
+    """
+
+    __slots__ = ('root', 'suffixes', 'exclude', 'files', 'dirs', 'hot', 'racy', '_order', '_cursor')
+
+    def __init__(self, root, suffixes=SUFFIXES, exclude: Optional[str] = None):
+        self.root = os.path.abspath(root)
+        self.suffixes = tuple(suffixes)
+        # A directory left out of the index, such as an output directory inside the tree
+        self.exclude = os.path.abspath(exclude) if exclude else None
+        self.files: Dict[str, Stat] = {}
+        # Directory -> (mtime_ns, files in it, subdirectories)
+        self.dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        # File -> monotonic time of its last change
+        self.hot: Dict[str, float] = {}
+        # File -> content hash, for files whose mtime was within RACY_NS of being checked
+        self.racy: Dict[str, Optional[int]] = {}
+        # Files in the order the rotating sweep checks them
+        self._order: List[str] = []
+        self._cursor = 0
+        # Scanned with now 0: nothing counts as recently changed yet
+        self._scan_dir(self.root, set(), set(), 0.0)
+
+    def poll(self, now: float, sweep: int) -> Tuple[Set[str], Set[str]]:
+        """Check the tree: every directory, the hot files and sweep more files
+
+        Returns (changed, removed) file paths.
+        """
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        for path in list(self.dirs):
+            entry = self.dirs.get(path)
+            if entry is None:
+                # Forgotten along with a parent removed earlier in this poll
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                self._forget_dir(path, removed)
+                continue
+            if mtime != entry[0]:
+                self._scan_dir(path, changed, removed, now)
+
+        for path, since in list(self.hot.items()):
+            if now - since > HOT_SECONDS:
+                del self.hot[path]
+            elif path not in changed:
+                self._check_file(path, changed, removed, now)
+        for path in list(self.racy):
+            if path not in changed and path not in self.hot:
+                self._check_file(path, changed, removed, now)
+
+        order = self._order
+        for _ in range(min(sweep, len(self.files))):
+            if self._cursor >= len(order):
+                order = self._order = list(self.files)
+                self._cursor = 0
+            path = order[self._cursor]
+            self._cursor += 1
+            if path in self.files and path not in changed and path not in self.hot:
+                self._check_file(path, changed, removed, now)
+        return changed, removed
+
+    def _check_file(self, path: str, changed: Set[str], removed: Set[str], now: float) -> None:
+        """Stat one indexed file"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            if self.files.pop(path, None) is not None:
+                removed.add(path)
+            self.hot.pop(path, None)
+            self.racy.pop(path, None)
+            return
+        stat = (st.st_mtime_ns, st.st_size)
+        if self.files.get(path) != stat:
+            self.files[path] = stat
+            self._note_racy(path, stat)
+            self.hot[path] = now
+            changed.add(path)
+        elif path in self.racy and self._racy_changed(path, stat):
+            self.hot[path] = now
+            changed.add(path)
+
+    def _note_racy(self, path: str, stat: Stat) -> None:
+        """Start hashing a file whose mtime is too recent to rely on, or stop"""
+        if time.time_ns() - stat[0] < RACY_NS:
+            self.racy[path] = content_hash(path)
+        else:
+            self.racy.pop(path, None)
+
+    def _racy_changed(self, path: str, stat: Stat) -> bool:
+        """Whether a racy file's content changed under an unchanged stat
+
+        The file stays racy until it is checked at least RACY_NS after its
+        mtime: the content is read after that time is taken, so any later
+        write gets a newer mtime.
+        """
+        known = self.racy[path]
+        recent = time.time_ns() - stat[0] < RACY_NS
+        digest = content_hash(path)
+        if recent:
+            self.racy[path] = digest
+        else:
+            del self.racy[path]
+        return digest != known
+
+    def _scan_dir(self, path: str, changed: Set[str], removed: Set[str], now: float) -> None:
+        """List a new or changed directory, indexing what was added and dropping what is gone"""
+        try:
+            # Stat before listing, so a change made while listing shows up next poll
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as entries:
+                entries = list(entries)
+        except OSError:
+            self._forget_dir(path, removed)
+            return
+        previous = self.dirs.get(path)
+        files = []
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path != self.exclude:
+                        subdirs.append(entry.path)
+                    continue
+                if not entry.name.endswith(self.suffixes) or not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files.append(entry.path)
+            stat = (st.st_mtime_ns, st.st_size)
+            known = self.files.get(entry.path)
+            if known != stat:
+                self.files[entry.path] = stat
+                self._note_racy(entry.path, stat)
+                changed.add(entry.path)
+                if known is None:
+                    self._order.append(entry.path)
+                if now:
+                    # New files are often still being written
+                    self.hot[entry.path] = now
+        self.dirs[path] = (mtime, files, subdirs)
+
+        if previous is not None:
+            for gone in set(previous[1]).difference(files):
+                if self.files.pop(gone, None) is not None:
+                    removed.add(gone)
+                self.hot.pop(gone, None)
+                self.racy.pop(gone, None)
+            for gone in set(previous[2]).difference(subdirs):
+                self._forget_dir(gone, removed)
+        for subdir in subdirs:
+            if subdir not in self.dirs:
+                self._scan_dir(subdir, changed, removed, now)
+
+    def _forget_dir(self, path: str, removed: Set[str]) -> None:
+        """Drop a directory that went away, and everything indexed under it"""
+        entry = self.dirs.pop(path, None)
+        if entry is None:
+            return
+        for gone in entry[1]:
+            if self.files.pop(gone, None) is not None:
+                removed.add(gone)
+            self.hot.pop(gone, None)
+            self.racy.pop(gone, None)
+        for subdir in entry[2]:
+            self._forget_dir(subdir, removed)
+
+
+class TreeWatcher:
+    """Keep an output directory of .ans files in step with a tree of markdown files
+
+    Outputs mirror the source tree under out_dir, as with --batch. Changes
+    are debounced and rebuilt in this process with the converters kept warm
+    by md_ansi.batch, and each rebuild is reported through report.
+    """
+
+    def __init__(self, root, out_dir, style_name='beach', max_mode=False, options: Tuple = (),
+                 poll_interval: float = POLL_INTERVAL, sweep_interval: float = SWEEP_INTERVAL,
+                 debounce: float = DEBOUNCE, max_delay: float = MAX_DELAY,
+                 report: Optional[Callable[[str], None]] = None):
+        self.root = os.path.abspath(root)
+        self.out_dir = os.path.abspath(out_dir)
+        self.style_name = style_name
+        self.max_mode = max_mode
+        self.options = options
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.report = report or (lambda message: print(message, flush=True))
+        self.index: Optional[TreeIndex] = None
+        self.rebuilds = 0
+
+    def job(self, source: str) -> Job:
+        """The batch job converting one source file"""
+        relative = Path(source).relative_to(self.root)
+        destination = str((Path(self.out_dir) / relative).with_suffix('.ans'))
+        return source, destination, self.style_name, self.max_mode, self.options
+
+    def start(self, workers: Optional[int] = None, cache_dir=None,
+              cache_max_bytes: Optional[int] = None, sauce: bool = False) -> Tuple[int, int]:
+        """Index the tree and convert every file in it; returns (converted, failed)
+
+        The first build runs across a process pool (unchanged files come
+        from the conversion cache unless cache_max_bytes is None); later
+        rebuilds run in this process. With sauce, outputs end with a SAUCE
+        record.
+        """
+        start = time.perf_counter()
+        self.index = TreeIndex(self.root, exclude=self.out_dir)
+        self.report(f"Indexed {len(self.index.files)} files in {len(self.index.dirs)} directories "
+                    f"in {(time.perf_counter() - start) * 1e3:.1f} ms")
+        start = time.perf_counter()
+        jobs = [self.job(source) for source in sorted(self.index.files)]
+        result = run_batch(jobs, workers=workers, on_error=report_error,
+                           cache_dir=cache_dir, cache_max_bytes=cache_max_bytes, sauce=sauce)
+        self.report(f"Converted {result[0]} of {len(jobs)} files into {self.out_dir} "
+                    f"in {(time.perf_counter() - start) * 1e3:.0f} ms")
+        init_worker(cache_dir, cache_max_bytes, sauce)
+        return result
+
+    def run(self, stop=None) -> None:
+        """Poll until stop (an object with is_set(), like threading.Event) is set, or forever"""
+        if self.index is None:
+            self.start()
+        changed: Set[str] = set()
+        removed: Set[str] = set()
+        first = last = 0.0
+        while stop is None or not stop.is_set():
+            now = time.monotonic()
+            sweep = sweep_size(len(self.index.files), self.poll_interval, self.sweep_interval)
+            new, gone = self.index.poll(now, sweep)
+            if new or gone:
+                changed = (changed - gone) | new
+                removed = (removed - new) | gone
+                if not first:
+                    first = now
+                last = now
+            if first and (now - last >= self.debounce or now - first >= self.max_delay):
+                self.rebuild(changed, removed, first)
+                changed, removed = set(), set()
+                first = 0.0
+            # Poll faster while a burst is pending, to see it end
+            time.sleep(min(self.poll_interval, self.debounce) if first else self.poll_interval)
+
+    def rebuild(self, changed: Set[str], removed: Set[str], detected: float) -> Tuple[int, int]:
+        """Convert changed files and delete the outputs of removed ones; returns (converted, failed)
+
+        detected is the monotonic time the first change was seen.
+        """
+        start = time.monotonic()
+        converted = failed = 0
+        newest = 0
+        for source in sorted(changed):
+            error = convert_file(self.job(source))[2]
+            if error is None:
+                converted += 1
+                newest = max(newest, self.index.files.get(source, (0, 0))[0])
+            else:
+                failed += 1
+                report_error(source, error)
+        for source in sorted(removed):
+            try:
+                os.unlink(self.job(source)[1])
+            except OSError:
+                pass
+        done = time.monotonic()
+        self.rebuilds += 1
+
+        parts = [f"converted {converted}"]
+        if failed:
+            parts.append(f"{failed} failed")
+        if removed:
+            parts.append(f"removed {len(removed)}")
+        latency = (f"{(done - start) * 1e3:.1f} ms rendering, "
+                   f"{(done - detected) * 1e3:.0f} ms after the first change")
+        if newest:
+            latency += f", {(time.time_ns() - newest) / 1e6:.0f} ms after the last save"
+        self.report(f"Rebuild {self.rebuilds}: {', '.join(parts)} ({latency})")
+        return converted, failed
@@ -0,0 +1,214 @@
+"""
+Terminal display widths and ANSI-aware wrapping
+"""
+
+import re
+import unicodedata
+from typing import List, Optional, Tuple
+from .styles import ANSIColors
+
+
+# SGR escape sequences, the only ones the converter emits
+ANSI_RE = re.compile(r'\x1b\[[0-9;]*m')
+
+# Columns between terminal tab stops
+TAB_SIZE = 8
+
+# Wrap tokens: an escape sequence, a run of spaces, or a word
+_WRAP_RE = re.compile(r'(\x1b\[[0-9;]*m)|( +)|([^ \x1b]+|\x1b)')
+
+# Display widths by code point, built from unicodedata one 256-entry page
+# at a time on first use
+_PAGES: List[Optional[bytes]] = [None] * (0x110000 >> 8)
+
+
+def _build_page(index: int) -> bytes:
+    """Compute the widths of the 256 code points in a page"""
+    east_asian_width = unicodedata.east_asian_width
+    combining = unicodedata.combining
+    category = unicodedata.category
+    widths = bytearray(256)
+    for offset in range(256):
+        char = chr((index << 8) | offset)
+        if east_asian_width(char) in ('W', 'F'):
+            widths[offset] = 2
+        elif combining(char) or category(char) in ('Mn', 'Me', 'Cf', 'Cc'):
+            widths[offset] = 0
+        else:
+            # Ambiguous-width characters (box drawing, blocks) take one column
+            widths[offset] = 1
+    page = _PAGES[index] = bytes(widths)
+    return page
+
+
+def char_width(char: str) -> int:
+    """Columns a single character takes in a terminal (0, 1 or 2)
+
+    A tab's width depends on where it is; see expand_tabs.
+    """
+    code = ord(char)
+    page = _PAGES[code >> 8] or _build_page(code >> 8)
+    return page[code & 0xFF]
+
+
+def display_width(text: str) -> int:
+    """Columns text takes in a terminal; text must not contain escape sequences
+
+    Tabs are counted up to the next tab stop, as if text started at the
+    first column.
+    """
+    if '\t' in text:
+        text = expand_tabs(text)
+    if text.isascii():
+        return len(text)
+    pages = _PAGES
+    width = 0
+    for char in text:
+        code = ord(char)
+        page = pages[code >> 8] or _build_page(code >> 8)
+        width += page[code & 0xFF]
+    return width
+
+
+def expand_tabs(text: str) -> str:
+    """Replace tabs with spaces up to the next tab stop, as a terminal shows them
+
+    Escape sequences take no columns, and wide characters two.
+    """
+    if '\t' not in text:
+        return text
+    if '\x1b' not in text and text.isascii():
+        return text.expandtabs(TAB_SIZE)
+    out = []
+    column = 0
+    for escape, gap, word in _WRAP_RE.findall(text):
+        if escape or gap:
+            out.append(escape or gap)
+            column += len(gap)
+            continue
+        for index, part in enumerate(word.split('\t')):
+            if index:
+                pad = TAB_SIZE - column % TAB_SIZE
+                out.append(' ' * pad)
+                column += pad
+            out.append(part)
+            column += display_width(part)
+    return ''.join(out)
+
+
+def strip_ansi(text: str) -> str:
+    """Remove SGR escape sequences"""
+    return ANSI_RE.sub('', text) if '\x1b' in text else text
+
+
+def visible_width(text: str) -> int:
+    """Columns text takes in a terminal, ignoring SGR escape sequences"""
+    return display_width(strip_ansi(text))
+
+
+def terminal_width(default: int = 80) -> int:
+    """Width of the terminal (or $COLUMNS), falling back to default"""
+    import shutil
+    return shutil.get_terminal_size((default, 24)).columns
+
+
+def _split_word(word: str, room: int) -> Tuple[str, str]:
+    """Split word so the head fits in room columns (always at least one character)"""
+    used = 0
+    for index, char in enumerate(word):
+        used += char_width(char)
+        if used > room and index:
+            return word[:index], word[index:]
+    return word, ''
+
+
+def wrap_ansi(text: str, width: int, continuation: str = '') -> str:
+    """Wrap a rendered line to width columns, keeping its colors on every line
+
+    Breaks at spaces; words wider than a line are split. Each wrapped line
+    ends with a reset, and the next starts with continuation (e.g. a quote
+    bar or hanging indent) followed by the escape sequences still in effect,
+    so styling carries over. Tabs are expanded to spaces first, since where
+    a line breaks moves the tab stops. Runs in one pass over the text.
+    """
+    if visible_width(text) <= width:
+        return text
+    text = expand_tabs(text)
+
+    reset = ANSIColors.RESET
+    lead = visible_width(continuation)
+    lines = []
+    line: List[str] = []
+    column = 0
+    # Escapes in effect since the last reset, oldest first, each kept once
+    # (re-applying an SGR sequence later gives the same state)
+    active: List[str] = []
+    space = ''
+    placed = False
+
+    for escape, gap, word in _WRAP_RE.findall(text):
+        if escape:
+            if escape == reset:
+                active.clear()
+            else:
+                if escape in active:
+                    active.remove(escape)
+                active.append(escape)
+            line.append(escape)
+            continue
+        if gap:
+            if placed:
+                space += gap
+            else:
+                # Leading indentation stays as is
+                line.append(gap)
+                column += len(gap)
+            continue
+
+        word_width = display_width(word)
+        if placed and column + len(space) + word_width > width:
+            lines.append(''.join(line))
+            line = [continuation, *active]
+            column = lead
+            space = ''
+            placed = False
+        while column + len(space) + word_width > width and word_width > 1:
+            head, word = _split_word(word, width - column - len(space))
+            line.append(space)
+            line.append(head)
+            lines.append(''.join(line))
+            line = [continuation, *active]
+            column = lead
+            space = ''
+            word_width = display_width(word)
+        line.append(space)
+        line.append(word)
+        column += len(space) + word_width
+        space = ''
+        placed = True
+
+    if space and column + len(space) <= width:
+        line.append(space)
+    lines.append(''.join(line))
+    return f"{reset}\n".join(lines)
+
+
+def truncate_ansi(text: str, width: int) -> str:
+    """Cut a rendered line to width columns, keeping its escape sequences"""
+    if visible_width(text) <= width:
+        return text
+    text = expand_tabs(text)
+    out = []
+    column = 0
+    for escape, gap, word in _WRAP_RE.findall(text):
+        if escape:
+            out.append(escape)
+            continue
+        for char in gap or word:
+            column += char_width(char)
+            if column > width:
+                break
+            out.append(char)
+    if not out or out[-1] != ANSIColors.RESET:
+        out.append(ANSIColors.RESET)
+    return ''.join(out)
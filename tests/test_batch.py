@@ -0,0 +1,30 @@
+"""
+Batch conversion of file trees
+"""
+
+from md_ansi.batch import find_jobs, run_batch
+from md_ansi.converter import MarkdownToANSIConverter
+
+TEXT = '# Title\n\nSome *text* here\n- item\n```\ncode\n```\n| a | b |\n|---|---|\n| 1 | 2 |\n'
+
+
+def test_outputs_mirror_the_tree_and_match_convert(tmp_path):
+    source = tmp_path / 'src'
+    (source / 'sub').mkdir(parents=True)
+    (source / 'a.md').write_text(TEXT, encoding='utf-8')
+    (source / 'sub' / 'b.md').write_text('# B\n', encoding='utf-8')
+    jobs = find_jobs(str(source / '**' / '*.md'), str(tmp_path / 'out'), 'beach', False)
+    assert run_batch(jobs, workers=2) == (2, 0)
+    converter = MarkdownToANSIConverter()
+    assert (tmp_path / 'out' / 'a.ans').read_bytes() == converter.convert(TEXT).encode('utf-8')
+    assert (tmp_path / 'out' / 'sub' / 'b.ans').read_bytes() == converter.convert('# B\n').encode('utf-8')
+
+
+def test_crlf_sources_render_like_lf(tmp_path):
+    (tmp_path / 'lf.md').write_bytes(TEXT.encode('utf-8'))
+    (tmp_path / 'crlf.md').write_bytes(TEXT.replace('\n', '\r\n').encode('utf-8'))
+    jobs = find_jobs(str(tmp_path / '*.md'), str(tmp_path / 'out'), 'beach', True)
+    assert run_batch(jobs, workers=1) == (2, 0)
+    output = (tmp_path / 'out' / 'crlf.ans').read_bytes()
+    assert b'\r' not in output
+    assert output == (tmp_path / 'out' / 'lf.ans').read_bytes()
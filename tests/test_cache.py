@@ -0,0 +1,81 @@
+"""
+ConversionCache storage, size cap, eviction and keying
+"""
+
+from md_ansi import cache as cache_module
+from md_ansi.cache import EVICT_TO, MAX_ENTRY_FRACTION, ConversionCache, cache_key
+
+
+def entry_count(cache):
+    return cache._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+def test_oversized_entry_is_rejected_without_evicting(tmp_path):
+    cache = ConversionCache(tmp_path, max_bytes=10000)
+    assert cache.max_entry_bytes == int(10000 * MAX_ENTRY_FRACTION)
+    for i in range(10):
+        cache.put(f"small{i}", b'x' * 400)
+    cache.put('huge', b'y' * (cache.max_entry_bytes + 1))
+    assert cache.get('huge') is None
+    assert entry_count(cache) == 10
+    cache.put('largest', b'z' * cache.max_entry_bytes)
+    assert cache.get('largest') == b'z' * cache.max_entry_bytes
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(cache_module.time, 'time', lambda: next(clock))
+    cache = ConversionCache(tmp_path, max_bytes=10000)
+    for i in range(20):
+        cache.put(f"k{i}", b'x' * 500)
+    assert cache.get('k0') is not None
+    # Over the cap: evicted down to EVICT_TO of it, oldest use first
+    cache.put('new', b'y' * 500)
+    kept = {key for (key,) in cache._db.execute('SELECT key FROM entries')}
+    assert kept == {'k0', 'new'} | {f"k{i}" for i in range(4, 20)}
+    total = cache._db.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0]
+    assert total == 500 * len(kept) <= 10000 * EVICT_TO
+    cache.close()
+
+
+def test_replacing_an_entry_keeps_the_total_size(tmp_path):
+    cache = ConversionCache(tmp_path, max_bytes=10000)
+    cache.put('a', b'x' * 300)
+    cache.put('a', b'y' * 100)
+    assert cache.get('a') == b'y' * 100
+    assert cache._db.execute("SELECT value FROM meta WHERE name = 'total_size'").fetchone()[0] == 100
+    cache.clear()
+    assert entry_count(cache) == 0 and cache.get('a') is None
+    cache.close()
+
+
+def test_chunks_and_reopen(tmp_path):
+    cache = ConversionCache(tmp_path, max_bytes=100000)
+    cache.put('a', bytes(range(256)) * 10)
+    assert list(cache.get_chunks('a', chunk_size=1000)) == [
+        (bytes(range(256)) * 10)[i:i + 1000] for i in range(0, 2560, 1000)]
+    assert cache.get_chunks('missing') is None
+    cache.close()
+    reopened = ConversionCache(tmp_path, max_bytes=100000)
+    assert reopened.get('a') == bytes(range(256)) * 10
+    reopened.close()
+
+
+def test_key_covers_input_and_every_option():
+    base = cache_key(b'# Hi', 'beach', False, (('width', 40),))
+    assert base == cache_key(b'# Hi', 'beach', 0, (('width', 40),))
+    variants = [
+        cache_key(b'# Hi!', 'beach', False, (('width', 40),)),
+        cache_key(b'# Hi', 'codc', False, (('width', 40),)),
+        cache_key(b'# Hi', 'beach', True, (('width', 40),)),
+        cache_key(b'# Hi', 'beach', False, (('width', 41),)),
+        cache_key(b'# Hi', 'beach', False, ()),
+    ]
+    assert len({base, *variants}) == len(variants) + 1
+
+
+def test_key_changes_with_render_revision(monkeypatch):
+    before = cache_key(b'# Hi', 'beach', False)
+    monkeypatch.setattr(cache_module, 'RENDER_REVISION', cache_module.RENDER_REVISION + 1)
+    assert cache_key(b'# Hi', 'beach', False) != before
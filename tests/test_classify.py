@@ -0,0 +1,59 @@
+"""
+Line classifier: kinds, markers and content starts
+"""
+
+import pytest
+
+from md_ansi.classify import (BLANK, FENCE, HEADER, LIST, PARAGRAPH, QUOTE, RULE, Fence,
+                              classify_line, closes_fence)
+
+
+@pytest.mark.parametrize('line, expected', [
+    ('', (BLANK, 0, '', 0)),
+    ('   ', (BLANK, 3, '', 3)),
+    ('# Title', (HEADER, 0, 1, 1)),
+    ('  ### Deep', (HEADER, 2, 3, 5)),
+    ('> quoted', (QUOTE, 0, '>', 1)),
+    ('- item', (LIST, 0, '-', 2)),
+    ('    * nested', (LIST, 4, '*', 6)),
+    ('+ plus', (LIST, 0, '+', 2)),
+    ('12. twelfth', (LIST, 0, '12.', 4)),
+    ('1.\tfirst', (LIST, 0, '1.', 3)),
+    ('---', (RULE, 0, '-', 3)),
+    ('***  ', (RULE, 0, '*', 5)),
+    ('```python', (FENCE, 0, Fence('`', 3, 'python'), 3)),
+    ('  ~~~~ text ', (FENCE, 2, Fence('~', 4, 'text'), 6)),
+    ('plain words', (PARAGRAPH, 0, '', 0)),
+])
+def test_kinds(line, expected):
+    assert classify_line(line) == expected
+
+
+@pytest.mark.parametrize('line', [
+    # No space after the marker
+    '-item', '*emphasis*', '12.5 percent', '3)', '1.',
+    # '+' runs are not rules, and mixed runs are not either
+    '+++', '-*-',
+    # Too short, too indented, or a backtick in a backtick fence's info string
+    '``', '    ```', '``` a`b',
+])
+def test_near_misses_are_paragraphs(line):
+    assert classify_line(line)[0] == PARAGRAPH
+
+
+def test_tab_indent_is_not_a_fence():
+    assert classify_line('\t```')[0] == PARAGRAPH
+    assert classify_line('\t- item') == (LIST, 1, '-', 3)
+
+
+@pytest.mark.parametrize('line, closes', [
+    ('```', True),
+    ('`````  ', True),
+    ('   ```', True),
+    ('    ```', False),
+    ('``', False),
+    ('~~~', False),
+    ('``` python', False),
+])
+def test_closes_fence(line, closes):
+    assert closes_fence(line, Fence('`', 3, 'python')) == closes
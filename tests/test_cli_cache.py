@@ -0,0 +1,116 @@
+"""
+Single-file CLI runs through the conversion cache: output is streamed, not kept
+"""
+
+import hashlib
+import tracemalloc
+
+from md_ansi import cli
+from md_ansi.cache import ConversionCache
+from md_ansi.converter import MarkdownToANSIConverter
+
+
+class MemorySink:
+    """Binary output that hashes what is written and records traced memory at every write"""
+
+    def __init__(self):
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.memory = []
+
+    def write(self, data):
+        self.memory.append(tracemalloc.get_traced_memory()[0])
+        self.digest.update(data)
+        self.size += len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def large_document():
+    return ''.join(f"Some **bold** and `code` text {i}.\n- item *{i}*\n> quote\n"
+                   for i in range(30000))
+
+
+def run_cli(monkeypatch, argv):
+    """Run the CLI into a MemorySink and return the sink"""
+    sink = MemorySink()
+    monkeypatch.setattr(cli, 'open_output', lambda args: sink)
+    tracemalloc.start()
+    try:
+        cli.main(argv)
+    finally:
+        tracemalloc.stop()
+    return sink
+
+
+def test_cache_tee_drops_copy_over_limit():
+    written = []
+    copy, tee = cli.cache_tee(written.append, 10)
+    tee(b'12345')
+    assert copy['chunks'] == [b'12345']
+    tee(b'678901')
+    assert copy['chunks'] is None
+    tee(b'2')
+    assert copy['chunks'] is None
+    assert written == [b'12345', b'678901', b'2']
+
+
+def test_large_conversion_is_not_kept_in_memory(tmp_path, monkeypatch):
+    source = tmp_path / 'large.md'
+    text = large_document()
+    source.write_text(text, encoding='utf-8')
+    monkeypatch.setattr(cli, 'CACHE_COPY_LIMIT', 64 * 1024)
+
+    baseline = run_cli(monkeypatch, [str(source), '--no-cache'])
+    output = run_cli(monkeypatch, [str(source), '--cache', '--cache-dir', str(tmp_path / 'cache')])
+    expected = (MarkdownToANSIConverter().convert(text) + '\n').encode('utf-8')
+    assert output.digest.digest() == hashlib.sha256(expected).digest()
+    assert output.size > 3 * 1024 * 1024
+    # By the last write, no more is held than without the cache
+    assert output.memory[-1] - baseline.memory[-1] < output.size // 8
+
+    # Too big to have been copied, so it was not cached either
+    cache = ConversionCache(tmp_path / 'cache')
+    assert cache._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0] == 0
+    cache.close()
+
+
+def test_cache_hit_is_served_in_chunks(tmp_path, monkeypatch):
+    source = tmp_path / 'large.md'
+    source.write_text(large_document(), encoding='utf-8')
+    monkeypatch.setattr(cli, 'CACHE_COPY_LIMIT', 64 * 1024 * 1024)
+    argv = [str(source), '--cache', '--cache-dir', str(tmp_path / 'cache')]
+
+    first = run_cli(monkeypatch, argv)
+    cache = ConversionCache(tmp_path / 'cache')
+    assert cache._db.execute('SELECT COUNT(*) FROM entries').fetchone()[0] == 1
+    cache.close()
+
+    second = run_cli(monkeypatch, argv)
+    assert second.digest.digest() == first.digest.digest()
+    assert len(second.memory) > 2
+    assert max(second.memory) < second.size // 2
+
+
+def test_single_file_runs_skip_the_cache_without_flag(tmp_path, monkeypatch):
+    source = tmp_path / 'small.md'
+    source.write_text('# Title\n\nText\n', encoding='utf-8')
+    run_cli(monkeypatch, [str(source), '--cache-dir', str(tmp_path / 'cache')])
+    assert not (tmp_path / 'cache').exists()
+
+
+def test_crlf_input_renders_like_lf(tmp_path, monkeypatch):
+    text = '# Title\n\nSome *text* here\n- item\n```\ncode\n```\n| a | b |\n|---|---|\n| 1 | 2 |\n'
+    lf = tmp_path / 'lf.md'
+    crlf = tmp_path / 'crlf.md'
+    lf.write_bytes(text.encode('utf-8'))
+    crlf.write_bytes(text.replace('\n', '\r\n').encode('utf-8'))
+    expected = run_cli(monkeypatch, [str(lf)]).digest.digest()
+    cache_dir = str(tmp_path / 'cache')
+    for argv in ([str(crlf)], [str(crlf), '--stream'], [str(crlf), '--cache', '--cache-dir', cache_dir],
+                 [str(crlf), '--cache', '--cache-dir', cache_dir]):
+        assert run_cli(monkeypatch, argv).digest.digest() == expected
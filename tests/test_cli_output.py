@@ -0,0 +1,46 @@
+"""
+CLI output files: contents, trailing newline and failed conversions
+"""
+
+import pytest
+
+from md_ansi import cli
+from md_ansi.batch import find_jobs, run_batch
+from md_ansi.converter import MarkdownToANSIConverter
+
+TEXT = '# Title\n\nSome *text*\n```\ncode\n```\n'
+
+
+@pytest.mark.parametrize('mode', [[], ['--stream'], ['--mmap'], ['--cache']])
+def test_output_file_holds_the_conversion_without_a_newline(tmp_path, mode, capsys):
+    source = tmp_path / 'doc.md'
+    source.write_text(TEXT, encoding='utf-8')
+    target = tmp_path / 'doc.ans'
+    cli.main([str(source), '-o', str(target), '--cache-dir', str(tmp_path / 'cache')] + mode)
+    expected = MarkdownToANSIConverter().convert(TEXT).encode('utf-8')
+    assert target.read_bytes() == expected
+    assert list(tmp_path.glob('*.tmp')) == []
+    # --batch writes the same bytes
+    jobs = find_jobs(str(source), str(tmp_path / 'out'), 'beach', False)
+    run_batch(jobs, workers=1)
+    assert (tmp_path / 'out' / 'doc.ans').read_bytes() == expected
+
+
+def test_stdout_gets_a_final_newline(tmp_path, capfdbinary):
+    source = tmp_path / 'doc.md'
+    source.write_text(TEXT, encoding='utf-8')
+    cli.main([str(source)])
+    expected = MarkdownToANSIConverter().convert(TEXT) + '\n'
+    assert capfdbinary.readouterr().out == expected.encode('utf-8')
+
+
+def test_failed_conversion_keeps_the_existing_output(tmp_path, capsys):
+    source = tmp_path / 'doc.md'
+    source.write_bytes(b'# Not UTF-8 \xff\n')
+    target = tmp_path / 'doc.ans'
+    target.write_bytes(b'previous output')
+    with pytest.raises(SystemExit):
+        cli.main([str(source), '-o', str(target)])
+    assert 'Error converting content' in capsys.readouterr().err
+    assert target.read_bytes() == b'previous output'
+    assert list(tmp_path.glob('*.tmp')) == []
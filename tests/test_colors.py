@@ -0,0 +1,86 @@
+"""
+Color reduction to 256 and 16 colors, and picking a depth from the environment
+"""
+
+import pytest
+
+from md_ansi import cli
+from md_ansi.colors import color_params, detect_color_depth, palette_rgb, to_16, to_256
+from md_ansi.converter import MarkdownToANSIConverter
+
+
+@pytest.mark.parametrize('rgb, index_256, index_16', [
+    ((0, 0, 0), 16, 0),
+    ((255, 255, 255), 231, 15),
+    ((255, 0, 0), 196, 9),
+    ((205, 0, 0), 160, 1),
+    ((0, 95, 255), 27, 12),
+    ((255, 135, 0), 208, 3),
+    # Grays go to the gray ramp, not the cube
+    ((128, 128, 128), 244, 8),
+    ((30, 30, 30), 234, 0),
+])
+def test_known_colors(rgb, index_256, index_16):
+    assert to_256(rgb) == index_256
+    assert to_16(rgb) == index_16
+
+
+def test_palette_colors_map_to_themselves():
+    for index in range(16, 256):
+        assert to_256(palette_rgb(index)) == index
+    for index in range(16):
+        assert to_16(palette_rgb(index)) == index
+
+
+def test_color_params():
+    orange = (255, 135, 0)
+    assert color_params(orange, 'truecolor') == '38;2;255;135;0'
+    assert color_params(orange, '256', background=True) == '48;5;208'
+    assert color_params(orange, '16') == '33'
+    assert color_params((255, 0, 0), '16', background=True) == '101'
+
+
+@pytest.mark.parametrize('environ, depth', [
+    ({}, '16'),
+    ({'TERM': 'xterm'}, '16'),
+    ({'TERM': 'xterm-256color'}, '256'),
+    ({'COLORTERM': 'truecolor', 'TERM': 'xterm'}, 'truecolor'),
+    ({'COLORTERM': '24BIT', 'TERM': 'xterm-256color'}, 'truecolor'),
+    ({'COLORTERM': 'yes', 'TERM': 'screen-256color'}, '256'),
+])
+def test_detect_color_depth(environ, depth):
+    assert detect_color_depth(environ) == depth
+
+
+class Sink:
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('environ, depth', [
+    ({'COLORTERM': 'truecolor'}, 'truecolor'),
+    ({'TERM': 'xterm-256color'}, '256'),
+    ({'TERM': 'dumb'}, '16'),
+])
+def test_color_depth_auto_option(tmp_path, monkeypatch, environ, depth):
+    monkeypatch.delenv('COLORTERM', raising=False)
+    monkeypatch.delenv('TERM', raising=False)
+    for name, value in environ.items():
+        monkeypatch.setenv(name, value)
+    path = tmp_path / 'doc.md'
+    text = '# Title\n\n**bold** and `code`\n> quote'
+    path.write_text(text, encoding='utf-8')
+    sink = Sink()
+    monkeypatch.setattr(cli, 'open_output', lambda args: sink)
+    cli.main([str(path), '--color-depth', 'auto'])
+    expected = MarkdownToANSIConverter(color_depth=depth).convert(text) + '\n'
+    assert sink.data.decode('utf-8') == expected
@@ -0,0 +1,65 @@
+"""
+CP437 encoding and the SAUCE record layout
+"""
+
+import datetime
+import struct
+
+from md_ansi.cp437 import SAUCE_SIZE, SauceCounter, encode_cp437, sauce_record
+
+DATE = datetime.date(2024, 2, 29)
+
+
+def field(record, offset, length):
+    """Bytes of a SAUCE field, offsets counted from the start of the record"""
+    return record[1 + offset:1 + offset + length]
+
+
+def test_record_layout():
+    record = sauce_record(123456, 80, 25, title='Título', author='me', group='grp', date=DATE)
+    assert len(record) == 1 + SAUCE_SIZE
+    assert record[0] == 0x1a
+    assert field(record, 0, 5) == b'SAUCE'
+    assert field(record, 5, 2) == b'00'
+    assert field(record, 7, 35) == encode_cp437('Título').ljust(35, b' ')
+    assert field(record, 42, 20) == b'me'.ljust(20, b' ')
+    assert field(record, 62, 20) == b'grp'.ljust(20, b' ')
+    assert field(record, 82, 8) == b'20240229'
+    assert struct.unpack('<I', field(record, 90, 4)) == (123456,)
+    # DataType 1 (character), FileType 1 (ANSi)
+    assert field(record, 94, 2) == b'\x01\x01'
+    assert struct.unpack('<4H', field(record, 96, 8)) == (80, 25, 0, 0)
+    assert field(record, 104, 2) == b'\x00\x00'
+    assert field(record, 106, 22) == b'IBM VGA'.ljust(22, b'\x00')
+
+
+def test_record_fields_are_cut_and_numbers_capped():
+    record = sauce_record(2 ** 40, 70000, 70000, title='x' * 50, date=DATE)
+    assert field(record, 7, 35) == b'x' * 35
+    assert struct.unpack('<I', field(record, 90, 4)) == (0xFFFFFFFF,)
+    assert struct.unpack('<2H', field(record, 96, 4)) == (0xFFFF, 0xFFFF)
+
+
+def test_counter_ignores_escapes_and_chunk_boundaries():
+    data = encode_cp437('\x1b[1;93m# Title\x1b[0m\nshort\n\x1b[36m' + 'w' * 90 + '\x1b[0m\ntail')
+    whole = SauceCounter()
+    whole.write(data)
+    assert (whole.size, whole.lines, whole.width) == (len(data), 3, 90)
+    expected = whole.record(date=DATE)
+    assert expected == sauce_record(len(data), 90, 4, date=DATE)
+    for step in (1, 2, 3, 7):
+        written = []
+        counter = SauceCounter(written.append)
+        for start in range(0, len(data), step):
+            counter.write(data[start:start + step])
+        assert b''.join(written) == data
+        assert counter.record(date=DATE) == expected
+
+
+def test_substitutes_keep_columns():
+    assert encode_cp437('• a → b ╔═╗') == b'\xf9 a ? b \xc9\xcd\xbb'
+    assert encode_cp437('“ā”—') == b'"a"-'
+    # 'ﬀ' decomposes to 'ff', which would take one column more
+    assert encode_cp437('ﬀ') == b'?'
+    # A wide character with no CP437 form takes its two columns as '??'
+    assert encode_cp437('漢') == b'??'
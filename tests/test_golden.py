@@ -0,0 +1,18 @@
+"""
+Byte-exact golden outputs (benchmarks/golden), as benchmarks/check_golden.py checks them
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parent.parent / 'benchmarks' / 'check_golden.py'
+spec = importlib.util.spec_from_file_location('check_golden', SCRIPT)
+check_golden = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(check_golden)
+
+
+@pytest.mark.parametrize('case', check_golden.cases(), ids=lambda case: case[0])
+def test_output_matches_golden_file(case):
+    assert check_golden.check(case) == []
@@ -0,0 +1,108 @@
+"""
+IncrementalConverter edits against whole-document conversion
+"""
+
+import random
+
+import pytest
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.incremental import IncrementalConverter
+
+# Lines that open and close code blocks, start and continue tables and
+# change highlighting state (a triple-quoted string spans lines)
+LINES = [
+    '# Title', 'Some *text* with `code`', '', '```python', '```', '~~~', '"""',
+    'x = 1  # note', 'def f():', '| a | b |', '|---|:-:|', '| 1 | 2 |', '- item',
+    '> quote', '---', 'plain words that go on long enough to wrap at forty columns',
+]
+
+OPTIONS = [
+    {},
+    {'max_mode': True},
+    {'highlight': True},
+    {'highlight': True, 'max_mode': True, 'width': 40},
+    {'width': 40, 'color_depth': '256'},
+    {'minify': True},
+    {'minify': True, 'highlight': True, 'max_mode': True},
+]
+
+
+def random_lines(rng, count):
+    return [rng.choice(LINES) for _ in range(count)]
+
+
+@pytest.mark.parametrize('options', OPTIONS, ids=lambda options: '-'.join(options) or 'default')
+def test_edits_match_convert(options):
+    converter = MarkdownToANSIConverter(**options)
+    incremental = IncrementalConverter(converter=converter)
+    rng = random.Random(0)
+    incremental.set_text('\n'.join(random_lines(rng, 30)))
+    for _ in range(300):
+        count = len(incremental.lines)
+        start = rng.randint(0, count)
+        stop = rng.randint(start, min(count, start + 3))
+        before = list(incremental.rendered)
+        first, last = incremental.apply_edit(start, stop, random_lines(rng, rng.randint(0, 3)))
+        expected = converter.convert('\n'.join(incremental.lines))
+        assert incremental.output == expected
+        # Chunks outside the returned range are the ones rendered before
+        shift = len(incremental.rendered) - len(before)
+        assert incremental.rendered[:first] == before[:first]
+        assert incremental.rendered[last:] == before[last - shift:]
+
+
+def test_edit_inside_code_block_rehighlights_the_rest():
+    converter = MarkdownToANSIConverter(highlight=True)
+    incremental = IncrementalConverter(converter=converter)
+    incremental.set_text('```python\nx = 1\ny = 2\nz = 3\n```')
+    first, last = incremental.apply_edit(1, 2, ['x = """'])
+    # The opened string runs on through the lines after the edit
+    assert (first, last) == (1, 4)
+    assert incremental.output == converter.convert('\n'.join(incremental.lines))
+
+
+def test_minify_applies_to_output_only():
+    converter = MarkdownToANSIConverter(minify=True)
+    plain = IncrementalConverter(converter=MarkdownToANSIConverter())
+    incremental = IncrementalConverter(converter=converter)
+    text = '# Title\n\n**bold** and *italic*\n- item\n- item'
+    plain.set_text(text)
+    incremental.set_text(text)
+    assert incremental.rendered == plain.rendered
+    assert incremental.output == converter.convert(text)
+    assert len(incremental.output) < len(plain.output)
+
+
+def test_edit_ranges():
+    incremental = IncrementalConverter()
+    assert incremental.set_text('# a\n- b\n- c\n> d') == (0, 4)
+    assert incremental.apply_edit(1, 2, ['- B']) == (1, 2)
+    assert incremental.insert_lines(4, ['- e', '- f']) == (4, 6)
+    assert incremental.delete_lines(0, 2)[0] == 0
+    assert incremental.lines == ['- c', '> d', '- e', '- f']
+    assert len(incremental.rendered) == 4
+    with pytest.raises(IndexError):
+        incremental.apply_edit(3, 5, [])
+
+
+def test_fence_edits_re_render_until_the_state_matches():
+    incremental = IncrementalConverter()
+    incremental.set_text('# a\n```\nx\ny\n```\n# d\n# e')
+    # Inside a block only the edited line changes
+    assert incremental.apply_edit(2, 3, ['z']) == (2, 3)
+    # Without its closing fence the block runs to the end, and back
+    assert incremental.delete_lines(4, 5) == (4, 6)
+    assert incremental.insert_lines(4, ['```']) == (4, 7)
+    converter = incremental.converter
+    assert incremental.output == converter.convert('\n'.join(incremental.lines))
+
+
+def test_table_edit_re_renders_the_whole_table():
+    incremental = IncrementalConverter()
+    incremental.set_text('# intro\n| a | b |\n|---|---|\n| 1 | 2 |\n| 3 | 4 |\n\nafter')
+    # A wider cell in the last row changes every row's column width; the
+    # blank line ending the run is rendered again to find the table's end
+    assert incremental.apply_edit(4, 5, ['| 3 | a much wider cell |']) == (1, 6)
+    converter = incremental.converter
+    assert incremental.output == converter.convert('\n'.join(incremental.lines))
@@ -0,0 +1,55 @@
+"""
+Single-pass inline engine against the legacy chained re.sub passes
+"""
+
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.inline import format_inline, has_markup
+
+ROOT = Path(__file__).resolve().parent.parent
+spec = importlib.util.spec_from_file_location('bench_inline', ROOT / 'benchmarks' / 'bench_inline.py')
+bench_inline = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bench_inline)
+
+PALETTE = ('<S>', '<E>', '<C>', '<L>', '</>')
+
+
+@pytest.mark.parametrize('text', [
+    'plain text',
+    '**bold** and __bold__',
+    '*italic* and _italic_',
+    'a `code` span',
+    'a [link](https://example.com) here',
+    '**bold** then *italic* then `code` then [link](url)',
+    'snake_case_name stays',
+    'unclosed **star and `tick',
+])
+def test_matches_legacy_output(text):
+    assert format_inline(text, PALETTE) == bench_inline.legacy_format_inline(text, PALETTE)
+
+
+def test_markup_inside_code_is_left_alone():
+    assert format_inline('`a **b** _c_` and **d**', PALETTE) == '<C>a **b** _c_</> and <S>d</>'
+
+
+def test_link_target_does_not_pair_with_link_text():
+    # The legacy passes paired an underscore in the text with one in the target
+    text = '[link with_underscores](https://example.com/a_b_c)'
+    assert format_inline(text, PALETTE) == '<L>link with_underscores</>'
+
+
+def test_nested_emphasis_and_strong():
+    assert format_inline('***both***', PALETTE) == '<E><S>both</></>'
+
+
+def test_every_example_line_matches_legacy_where_no_code_span_holds_markup():
+    converter = MarkdownToANSIConverter()
+    palette = converter.inline_palette
+    for line in bench_inline.build_lines(0):
+        if not has_markup(line) or '`' in line or '](' in line:
+            continue
+        assert format_inline(line, palette) == bench_inline.legacy_format_inline(line, palette)
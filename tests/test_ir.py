@@ -0,0 +1,69 @@
+"""
+Parse once, paint many: convert_multi and the plain renderers against convert
+"""
+
+import pytest
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.ir import convert_multi, paint_plain, paint_stripped, parse
+from md_ansi.styles import THEMES
+from md_ansi.width import display_width, strip_ansi
+
+TEXT = """# Title with `code`
+
+Some **bold**, *italic*, `code` and a [link](https://example.com) in a paragraph
+that runs on long enough to need wrapping at forty columns.
+
+## Second
+
+> A quote with **bold**
+- item with _emphasis_
+  12. nested
+
+---
+
+```python
+def f(x):
+    return "text"
+```
+
+| left | center | right |
+|:-----|:------:|------:|
+| 1 | **two** | 3 |
+
+~~~
+unclosed
+"""
+
+
+@pytest.mark.parametrize('options', [{}, {'highlight': True, 'width': 40},
+                                     {'minify': True, 'color_depth': '256'}],
+                         ids=['default', 'highlight-width', 'minify-256'])
+def test_convert_multi_matches_convert(options):
+    outputs = convert_multi(TEXT, styles=list(THEMES), max_modes=(False, True), **options)
+    assert len(outputs) == 2 * len(THEMES)
+    for (style, max_mode), output in outputs.items():
+        assert output == MarkdownToANSIConverter(style, max_mode=max_mode, **options).convert(TEXT)
+
+
+@pytest.mark.parametrize('width', [None, 40])
+def test_paint_plain_has_no_escapes(width):
+    plain = paint_plain(parse(TEXT), width)
+    assert '\x1b' not in plain
+    assert '**' not in plain and '`code`' not in plain and '](https' not in plain
+    assert plain.startswith('Title with code\n===============\n')
+    assert '| left | center | right |' in plain
+    assert '| 1    |  two   |     3 |' in plain
+    assert '    def f(x):' in plain
+    if width:
+        assert all(display_width(line) <= width for line in plain.split('\n')
+                   if not line.startswith(('|', '    ')))
+
+
+def test_paint_stripped_has_no_escapes():
+    for max_mode in (False, True):
+        converter = MarkdownToANSIConverter(max_mode=max_mode)
+        stripped = paint_stripped(parse(TEXT), converter)
+        assert '\x1b' not in stripped
+        assert stripped.split('\n') == [strip_ansi(line)
+                                        for line in converter.convert(TEXT).split('\n')]
@@ -0,0 +1,23 @@
+"""
+Memory-mapped line input (--mmap)
+"""
+
+import pytest
+
+from md_ansi.converter import decode_markdown
+from md_ansi.largefile import iter_mmap_lines
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'a',
+    b'a\n',
+    b'# Title\n\ntext\n```\ncode\n',
+    b'# Title\r\n\r\ntext\r\n```\r\ncode\r\n',
+    b'mixed\r\nends\rand\n\r\r\nlone\r',
+    'café │ 漢\r\n'.encode('utf-8'),
+])
+def test_lines_match_text_read_with_universal_newlines(tmp_path, data):
+    path = tmp_path / 'doc.md'
+    path.write_bytes(data)
+    assert list(iter_mmap_lines(path)) == decode_markdown(data).split('\n')
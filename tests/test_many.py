@@ -0,0 +1,41 @@
+"""
+convert_many against one convert call per document, in process and on pools
+"""
+
+import pytest
+
+from md_ansi import many
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.many import convert_many
+
+SNIPPETS = [
+    '', 'plain', '# Title', '## Title\n\nwords', '> **quote**', '- item\n- item\n  - nested',
+    '1. first\n2. second', '---', '***', 'a `code` and [link](url) and _em_',
+    '```python\nx = 1\n```', '```\nunclosed', '~~~\n# not a header\n~~~\nafter',
+    '| a | b |\n|---|--:|\n| 1 | 2 |', 'text with a | pipe', 'trailing\n',
+]
+
+
+def expected(texts, style_name='beach', max_mode=False):
+    converter = MarkdownToANSIConverter(style_name, max_mode=max_mode)
+    return [converter.convert(text) for text in texts]
+
+
+@pytest.mark.parametrize('style_name', ['beach', 'vaporwave'])
+@pytest.mark.parametrize('max_mode', [False, True])
+def test_matches_convert(style_name, max_mode):
+    # Repeated lines are rendered once and shared between documents
+    texts = SNIPPETS * 3
+    assert convert_many(texts, style_name, max_mode) == expected(texts, style_name, max_mode)
+
+
+@pytest.mark.parametrize('backend', ['thread', 'process'])
+def test_pools_keep_input_order(monkeypatch, backend):
+    monkeypatch.setattr(many, 'DOCS_PER_TASK', 4)
+    texts = [f"# Doc {i}\n{snippet}" for i, snippet in enumerate(SNIPPETS * 2)]
+    assert convert_many(texts, workers=3, backend=backend) == expected(texts)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        convert_many(SNIPPETS, backend='fiber')
@@ -0,0 +1,141 @@
+"""
+SGRMinifier output draws the same screen as its input
+"""
+
+import re
+
+import pytest
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.minify import SGRMinifier, minify
+
+ESCAPE = re.compile(r'\x1b\[([0-9;]*)m')
+
+OFF = {'21': '4', '22': '12', '23': '3', '24': '4', '25': '56', '27': '7', '28': '8', '29': '9'}
+
+DOCUMENT = """# Title
+
+Some **bold**, *italic*, `code` and a [link](https://example.com).
+
+> A quote with **bold**
+- item
+  1. nested
+
+---
+
+```python
+def f(x):
+    return "text"  # note
+```
+
+| a | b |
+|:--|--:|
+| 1 | 2 |
+"""
+
+
+def draw(text):
+    """What a terminal shows: each character with the colors and attributes it
+    is drawn in, and the background each line break may paint, if any"""
+    foreground = background = None
+    attributes = set()
+    cells = []
+    position = 0
+    for match in list(ESCAPE.finditer(text)) + [None]:
+        end = match.start() if match else len(text)
+        for char in text[position:end]:
+            if char == '\n':
+                paints = background is not None or '7' in attributes
+                cells.append(('\n', (background, '7' in attributes) if paints else None))
+            else:
+                cells.append((char, (foreground, background, frozenset(attributes))))
+        if match is None:
+            break
+        position = match.end()
+        params = (match.group(1) or '0').split(';')
+        index = 0
+        while index < len(params):
+            param = str(int(params[index] or '0'))
+            index += 1
+            if param == '0':
+                foreground = background = None
+                attributes = set()
+            elif param in ('38', '48'):
+                count = 2 if params[index] == '5' else 4
+                color = ';'.join([param] + params[index:index + count])
+                index += count
+                if param == '38':
+                    foreground = color
+                else:
+                    background = color
+            elif param == '39':
+                foreground = None
+            elif param == '49':
+                background = None
+            elif 30 <= int(param) <= 37 or 90 <= int(param) <= 97:
+                foreground = param
+            elif 40 <= int(param) <= 47 or 100 <= int(param) <= 107:
+                background = param
+            elif param in OFF:
+                attributes -= set(OFF[param])
+            else:
+                attributes.add(param)
+    return cells, (foreground, background, frozenset(attributes))
+
+
+def rendered():
+    for style_name in ('beach', 'vaporwave', 'edgelord', 'rainbow', 'helvetica', 'codc'):
+        for max_mode in (False, True):
+            for color_depth in ('truecolor', '16'):
+                converter = MarkdownToANSIConverter(style_name, max_mode=max_mode, highlight=True,
+                                                    color_depth=color_depth)
+                yield converter.convert(DOCUMENT)
+
+
+CRAFTED = [
+    # A background color runs across line breaks, so it must be set before them
+    '\x1b[44mblue\nstill blue\x1b[0m\nplain',
+    '\x1b[7mreverse\n\nreverse\x1b[27m\nplain',
+    '\x1b[1;31mred\x1b[0m\n\x1b[1;31mred again\x1b[0m',
+    '\x1b[31m\x1b[32m\x1b[33myellow\x1b[39m default\x1b[0m',
+    '\x1b[1mbold\x1b[22m\x1b[3mitalic\x1b[23m plain',
+    '\x1b[38;5;208morange\x1b[48;2;1;2;3mon dark\x1b[m plain\n',
+    'plain\x1b[0m\x1b[0mtext',
+]
+
+
+@pytest.mark.parametrize('text', CRAFTED + list(rendered()))
+def test_minified_output_draws_the_same(text):
+    assert draw(minify(text)) == draw(text)
+
+
+def test_rendered_output_shrinks():
+    for text in rendered():
+        assert len(minify(text)) < len(text)
+
+
+@pytest.mark.parametrize('step', [1, 2, 5, 13])
+def test_chunked_feed_matches_whole(step):
+    text = '\n'.join(CRAFTED) + next(rendered())
+    minifier = SGRMinifier()
+    result = ''.join(minifier.feed(text[i:i + step]) for i in range(0, len(text), step))
+    result += minifier.finish()
+    assert result == minify(text)
+    assert minifier.saved == len(text) - len(result)
+
+
+def test_background_is_set_before_the_line_break():
+    # Scrolling may paint the new line blue, so the break must come after it
+    assert minify('\x1b[44m\nx\x1b[0m') == '\x1b[44m\nx\x1b[0m'
+    assert minify('\x1b[44mx\x1b[0m\ny') == '\x1b[44mx\x1b[0m\ny'
+    # Bold does not show on an empty line, so it waits for the next character
+    assert minify('\x1b[1m\nx\x1b[0m') == '\n\x1b[1mx\x1b[0m'
+
+
+def test_line_break_sets_a_background_first():
+    minifier = SGRMinifier()
+    assert minifier.feed('x\x1b[44m', whole=True) == 'x'
+    assert minifier.line_break() == '\x1b[44m'
+    minifier = SGRMinifier()
+    assert minifier.feed('x\x1b[1m', whole=True) == 'x'
+    assert minifier.line_break() == ''
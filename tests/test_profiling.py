@@ -0,0 +1,45 @@
+"""
+ConversionStats: every stage of convert is timed, and the residual row is what is left
+"""
+
+import re
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.profiling import ConversionStats
+
+
+CODE_DOCUMENT = ("# Title\n\nSome *text*\n\n```python\n"
+                 + '\n'.join(f"x{i} = {i}  # comment" for i in range(2000))
+                 + "\n```\n\n| a | b |\n|---|---|\n| 1 | 2 |\n")
+
+
+def profile(**options):
+    stats = ConversionStats()
+    output = MarkdownToANSIConverter('beach', stats=stats, **options).convert(CODE_DOCUMENT)
+    assert output == MarkdownToANSIConverter('beach', **options).convert(CODE_DOCUMENT)
+    return stats
+
+
+def test_code_block_path_is_instrumented():
+    stats = profile(highlight=True, minify=True)
+    for name in ('_format_code_block', '_highlight_code', '_minify_batch', '_measure_table'):
+        assert stats.calls[name] == 1, name
+    assert stats.calls['render_line'] > 0
+
+
+def test_outer_time_counts_nested_stages_once():
+    stats = profile()
+    outer = stats.outer_nanoseconds
+    # Top-level stages only: nested formatters are inside render_line's time
+    assert outer >= stats.nanoseconds['render_line'] + stats.nanoseconds['_format_code_block']
+    assert outer <= stats.nanoseconds['convert']
+
+
+def test_residual_row_is_convert_minus_outer_time():
+    stats = profile()
+    table = stats.format_table()
+    match = re.search(r'\(split/join/write\)\s+([\d.]+)', table)
+    assert match is not None
+    expected = (stats.nanoseconds['convert'] - stats.outer_nanoseconds) / 1e6
+    assert abs(float(match.group(1)) - expected) < 0.01
+    assert '_format_code_block' in table
@@ -0,0 +1,123 @@
+"""
+md-ansi serve: request validation and error replies
+"""
+
+import asyncio
+import json
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.server import RenderServer
+
+
+def exchange(lines, max_request_bytes=1024 * 1024, patch=None):
+    """Send request lines over one connection; returns (replies, server metrics)
+
+    Reading stops early if the server closes the connection.
+    """
+    async def run():
+        server = RenderServer(max_request_bytes=max_request_bytes, threads=2)
+        if patch is not None:
+            patch(server)
+        listener = await server.start('127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=1 << 24)
+        replies = []
+        try:
+            for line in lines:
+                writer.write(line + b'\n')
+                await writer.drain()
+                reply = await reader.readline()
+                if not reply:
+                    break
+                replies.append(json.loads(reply))
+        finally:
+            writer.close()
+            listener.close()
+            await listener.wait_closed()
+            server.close()
+        return replies, server.metrics
+
+    return asyncio.run(run())
+
+
+def request(**fields):
+    return json.dumps(fields).encode('utf-8')
+
+
+def test_render_and_ping():
+    replies, metrics = exchange([request(id=1, text='# Hi', style='codc', max=True),
+                                 request(op='ping')])
+    assert replies[0] == {'id': 1, 'output': MarkdownToANSIConverter('codc', max_mode=True).convert('# Hi')}
+    assert replies[1] == {'ok': True}
+    assert metrics.errors == 0
+
+
+def test_malformed_fields_get_error_replies_and_keep_the_connection():
+    bad = [
+        request(id=1, text='x', style=['beach']),
+        request(id=2, text='x', style={'name': 'beach'}),
+        request(id=3, text='x', max='no'),
+        request(id=4, text='x', max=1),
+        request(id=5, op=['render']),
+        request(id=6, text=['x']),
+        request(id=7, text='x', style='nope'),
+    ]
+    replies, metrics = exchange(bad + [request(id=8, op='ping')])
+    assert [reply['id'] for reply in replies] == [1, 2, 3, 4, 5, 6, 7, 8]
+    for reply in replies[:-1]:
+        assert 'error' in reply and 'output' not in reply
+    assert '"style"' in replies[0]['error'] and '"style"' in replies[1]['error']
+    assert '"max"' in replies[2]['error'] and '"max"' in replies[3]['error']
+    assert replies[-1] == {'id': 8, 'ok': True}
+    assert metrics.errors == len(bad)
+
+
+def test_invalid_json_and_non_objects():
+    lines = [b'{not json', b'[1, 2]', b'"text"', b'[' * 100000 + b']' * 100000, request(op='ping')]
+    replies, metrics = exchange(lines)
+    assert len(replies) == len(lines)
+    for reply in replies[:-1]:
+        assert reply['error'].startswith('invalid request')
+    assert replies[-1] == {'ok': True}
+    assert metrics.errors == 4
+
+
+def test_unexpected_exception_is_replied_and_counted():
+    def patch(server):
+        async def broken(line):
+            raise RuntimeError('boom')
+        server._respond = broken
+
+    replies, metrics = exchange([request(text='x'), request(text='y')], patch=patch)
+    assert replies == [{'error': 'internal error: RuntimeError: boom'}] * 2
+    assert metrics.errors == 2
+
+
+def test_oversized_request_closes_the_connection():
+    replies, metrics = exchange([request(text='x' * 2000), request(op='ping')], max_request_bytes=1000)
+    assert len(replies) == 1 and 'exceeds' in replies[0]['error']
+    assert metrics.rejected == 1
+
+
+def test_unknown_op_and_missing_text():
+    replies, metrics = exchange([request(id=1, op='shutdown'), request(id=2, style='beach'),
+                                 request(id=3, text=None), request(id=4, op='metrics')])
+    assert replies[0] == {'id': 1, 'error': 'unknown op: shutdown'}
+    assert replies[1]['id'] == 2 and '"text"' in replies[1]['error']
+    assert replies[2]['id'] == 3 and '"text"' in replies[2]['error']
+    assert replies[3]['id'] == 4
+    assert replies[3]['metrics']['errors'] == 3 and replies[3]['metrics']['requests'] == 0
+    assert metrics.errors == 3
+
+
+def test_conversion_error_is_replied_and_counted():
+    def patch(server):
+        def broken(text):
+            raise ValueError('bad text')
+        server.converters[('beach', False)].convert = broken
+
+    replies, metrics = exchange([request(id=1, text='x'), request(id=2, text='x', max=True)],
+                                patch=patch)
+    assert replies[0] == {'id': 1, 'error': 'error converting content: bad text'}
+    assert 'output' in replies[1]
+    assert metrics.errors == 1 and metrics.requests == 2 and metrics.in_flight == 0
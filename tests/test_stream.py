@@ -0,0 +1,78 @@
+"""
+Streamed conversion (convert_stream and --stream) against whole-document conversion
+"""
+
+import io
+
+import pytest
+
+from md_ansi import cli
+from md_ansi.converter import MarkdownToANSIConverter
+
+TEXTS = [
+    '',
+    'a',
+    'a\n',
+    'a\n\n',
+    '# Title\n```python\nx = 1\n```\n',
+    # Ends inside an unclosed fence, with and without a final newline
+    'a\n```python\nx = """\n',
+    'a\n```python\nx = 1',
+    'a\n```\n',
+    '| a | b |\n|---|---|\n| 1 | 2 |\n',
+]
+
+
+class Sink:
+    def __init__(self):
+        self.data = b''
+
+    def write(self, data):
+        self.data += data
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def run_cli(monkeypatch, argv):
+    sink = Sink()
+    monkeypatch.setattr(cli, 'open_output', lambda args: sink)
+    cli.main(argv)
+    return sink.data
+
+
+@pytest.mark.parametrize('highlight', [False, True])
+@pytest.mark.parametrize('text', TEXTS)
+def test_stream_matches_convert(text, highlight):
+    converter = MarkdownToANSIConverter(highlight=highlight)
+    streamed = '\n'.join(converter.convert_stream(io.StringIO(text))) + converter.reset
+    assert streamed == converter.convert(text)
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_stream_option_matches_plain_run(tmp_path, monkeypatch, text):
+    path = tmp_path / 'doc.md'
+    path.write_text(text, encoding='utf-8')
+    plain = run_cli(monkeypatch, [str(path), '--highlight'])
+    assert run_cli(monkeypatch, [str(path), '--highlight', '--stream']) == plain
+
+
+def test_each_chunk_is_yielded_before_the_next_line_is_read():
+    lines = ['# Title | with pipe', '- item | pipe', '> quote | pipe', 'plain', '```',
+             'a | b', '```', '', 'prose | with a pipe', 'next', 'done']
+    read = []
+
+    def source():
+        for line in lines:
+            read.append(line)
+            yield line
+
+    converter = MarkdownToANSIConverter()
+    for number, chunk in enumerate(converter.convert_stream(source())):
+        # A paragraph line with a pipe may head a table, so it alone waits for the next line
+        ahead = 1 if lines[number] == 'prose | with a pipe' else 0
+        assert len(read) == number + 1 + ahead
+    assert len(read) == len(lines)
@@ -0,0 +1,54 @@
+"""
+Replacing a registered theme takes effect everywhere its name is used
+"""
+
+import pytest
+
+from md_ansi import batch, many
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.styles import THEMES, ANSIColors, BeachTheme
+
+TEXT = '# Title\n\n**bold**\n\n```python\nif x:\n    pass\n```'
+
+
+def theme_factory(strong_color, rgb, name='custom'):
+    def factory():
+        theme = BeachTheme()
+        theme.name = name
+        theme.strong_color = strong_color
+        theme.rgb = dict(theme.rgb, strong_color=rgb)
+        return theme
+    return factory
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Leave THEMES as it was after the test"""
+    monkeypatch.setattr(THEMES, '_factories', dict(THEMES._factories))
+    monkeypatch.setattr(THEMES, '_themes', dict(THEMES._themes))
+    return THEMES
+
+
+@pytest.mark.parametrize('options', [{'highlight': True}, {'highlight': True, 'max_mode': True},
+                                     {'highlight': True, 'color_depth': '256'}])
+def test_reregistered_theme_is_used(registry, options):
+    # A theme registered under a fresh name has nothing cached yet
+    registry.register('fresh', theme_factory(ANSIColors.GREEN, '#00ff00', 'fresh'))
+    expected = MarkdownToANSIConverter('fresh', **options).convert(TEXT)
+    registry.register('custom', theme_factory(ANSIColors.RED, '#ff0000'))
+    first = MarkdownToANSIConverter('custom', **options).convert(TEXT)
+    assert first != expected
+    registry.register('custom', theme_factory(ANSIColors.GREEN, '#00ff00'))
+    assert MarkdownToANSIConverter('custom', **options).convert(TEXT) == expected
+
+
+def test_pooled_converters_follow_the_registry(registry):
+    registry.register('custom', theme_factory(ANSIColors.RED, '#ff0000'))
+    assert many.convert_many([TEXT], 'custom') == [MarkdownToANSIConverter('custom').convert(TEXT)]
+    red = batch.get_converter('custom', False)
+    registry.register('custom', theme_factory(ANSIColors.GREEN, '#00ff00'))
+    assert many.convert_many([TEXT], 'custom') == [MarkdownToANSIConverter('custom').convert(TEXT)]
+    green = batch.get_converter('custom', False)
+    assert green is not red
+    assert green.convert(TEXT) == MarkdownToANSIConverter('custom').convert(TEXT)
+    assert batch.get_converter('custom', False) is green
@@ -0,0 +1,73 @@
+"""
+Table layout: alignment, escaped pipes, width capping and streamed tables
+"""
+
+import io
+
+import pytest
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.tables import (CENTER, LEFT, RIGHT, TABLE_SAMPLE_ROWS, fit_widths, split_row,
+                            table_alignments)
+from md_ansi.width import display_width, strip_ansi
+
+
+def rendered(text, **options):
+    return strip_ansi(MarkdownToANSIConverter(**options).convert(text)).split('\n')
+
+
+def test_alignments():
+    assert table_alignments('| a | b | c | d |', '|---|:--|:-:|--:|') == [LEFT, LEFT, CENTER, RIGHT]
+    # Cell counts differ, or the second line is no delimiter row
+    assert table_alignments('| a | b |', '|---|') is None
+    assert table_alignments('| a | b |', '| x | y |') is None
+    assert table_alignments('- a | b', '|---|---|') is None
+
+
+def test_cells_are_aligned():
+    lines = rendered('| left | center | right |\n|:--|:-:|--:|\n| 1 | 2 | 3 |\n| wide cell | xx | 45 |')
+    assert lines == [
+        '┌───────────┬────────┬───────┐',
+        '│ left      │ center │ right │',
+        '├───────────┼────────┼───────┤',
+        '│ 1         │   2    │     3 │',
+        '│ wide cell │   xx   │    45 │',
+        '└───────────┴────────┴───────┘',
+    ]
+
+
+def test_escaped_pipes_stay_in_their_cell():
+    assert split_row('| a \\| b | c |') == ['a | b', 'c']
+    assert split_row('a | b \\|') == ['a', 'b |']
+    lines = rendered('| a | b |\n|---|---|\n| x \\| y | z |')
+    assert lines[3] == '│ x | y │ z │'
+
+
+@pytest.mark.parametrize('width', [20, 33, 50])
+def test_width_caps_the_widest_columns(width):
+    text = ('| id | description | note |\n|---|---|---|\n'
+            '| 1 | a rather long description of the row | short |\n| 22 | - | a longer note |')
+    lines = rendered(text, width=width)
+    assert all(display_width(line) <= width for line in lines)
+    # The narrow first column keeps its width
+    assert lines[3].startswith('│ 1  │')
+
+
+def test_fit_widths():
+    assert fit_widths([2, 10, 5], 20) == [2, 10, 5]
+    assert fit_widths([2, 10, 5], 12) == [2, 5, 5]
+    assert fit_widths([2, 10, 5], 3) == [1, 1, 1]
+
+
+def test_streamed_table_is_sized_from_the_sample_rows():
+    rows = ['| a | b |', '|---|--:|'] + [f"| {i % 10} | x |" for i in range(TABLE_SAMPLE_ROWS)]
+    # Rows after the sample are cut to the sampled column widths
+    rows += ['| a much wider cell | y |', '| 5 | a wide right cell |']
+    converter = MarkdownToANSIConverter()
+    chunks = list(converter.convert_stream(io.StringIO('\n'.join(rows))))
+    assert '\n'.join(chunks) + converter.reset == converter.convert('\n'.join(rows))
+    lines = [strip_ansi(chunk) for chunk in '\n'.join(chunks).split('\n')]
+    assert len(lines) == len(rows) + 2
+    assert len({display_width(line) for line in lines}) == 1
+    assert lines[-3] == '│ a │ y │'
+    assert lines[-2] == '│ 5 │ a │'
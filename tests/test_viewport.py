@@ -0,0 +1,115 @@
+"""
+Saved .mdidx line indexes: reuse while current, rebuild when stale or damaged
+"""
+
+import os
+
+import pytest
+
+from md_ansi import viewport
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.viewport import IndexedDocument, index_path, load_index, open_index
+
+TEXT = '# Title\n\n```python\nx = 1\n```\n| a | b |\n|---|---|\n| 1 | 2 |\n' + 'words\n' * 50
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """Count calls to build_index"""
+    calls = []
+    build_index = viewport.build_index
+
+    def counted(*args, **kwargs):
+        calls.append(args)
+        return build_index(*args, **kwargs)
+
+    monkeypatch.setattr(viewport, 'build_index', counted)
+    return calls
+
+
+def write(path, text, mtime_ns=None):
+    path.write_text(text, encoding='utf-8')
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_saved_index_is_reused_while_file_is_unchanged(tmp_path, builds):
+    path = tmp_path / 'doc.md'
+    write(path, TEXT)
+    first = open_index(path, interval=16)
+    assert os.path.exists(index_path(path))
+    second = open_index(path, interval=16)
+    assert len(builds) == 1
+    assert list(second.offsets) == list(first.offsets)
+    assert list(second.table_starts) == list(first.table_starts)
+    assert second.fences == first.fences
+
+
+def test_index_is_rebuilt_when_size_or_mtime_change(tmp_path, builds):
+    path = tmp_path / 'doc.md'
+    write(path, TEXT, 1_000_000_000_000_000_000)
+    open_index(path)
+    # Same size, new mtime
+    write(path, TEXT.replace('x = 1', 'y = 2'), 1_000_000_001_000_000_000)
+    assert open_index(path).mtime_ns == 1_000_000_001_000_000_000
+    # Same mtime, new size
+    write(path, TEXT + '# More\n', 1_000_000_001_000_000_000)
+    index = open_index(path)
+    assert len(builds) == 3
+    assert index.line_count == len((TEXT + '# More\n').split('\n'))
+
+
+def test_index_is_rebuilt_for_other_settings(tmp_path, builds):
+    path = tmp_path / 'doc.md'
+    write(path, TEXT)
+    open_index(path, interval=16)
+    open_index(path, interval=32)
+    open_index(path, interval=32, encoding='latin-1')
+    assert len(builds) == 3
+
+
+@pytest.mark.parametrize('damage', [
+    lambda data: data[:len(data) // 2],
+    lambda data: b'XXXX' + data[4:],
+    lambda data: data.replace(b'"version": 2', b'"version": 1'),
+    lambda data: b'',
+])
+def test_damaged_or_old_index_is_rebuilt(tmp_path, builds, damage):
+    path = tmp_path / 'doc.md'
+    write(path, TEXT)
+    open_index(path)
+    saved = index_path(path)
+    with open(saved, 'rb') as f:
+        data = f.read()
+    with open(saved, 'wb') as f:
+        f.write(damage(data))
+    assert load_index(saved) is None
+    assert open_index(path).line_count == len(TEXT.split('\n'))
+    assert len(builds) == 2
+    assert load_index(saved) is not None
+
+
+def test_unwritable_index_is_rebuilt_without_error(tmp_path, builds, monkeypatch):
+    path = tmp_path / 'doc.md'
+    write(path, TEXT)
+
+    def refuse(index, saved):
+        raise PermissionError(saved)
+
+    monkeypatch.setattr(viewport, 'save_index', refuse)
+    open_index(path)
+    open_index(path)
+    assert len(builds) == 2
+
+
+def test_document_renders_current_content_after_an_edit(tmp_path):
+    path = tmp_path / 'doc.md'
+    converter = MarkdownToANSIConverter()
+    write(path, TEXT, 1_000_000_000_000_000_000)
+    with IndexedDocument(path, converter, interval=4) as document:
+        document.render_range(0, document.line_count)
+    edited = TEXT.replace('```python', '~~~').replace('```', '~~~')
+    write(path, edited, 1_000_000_000_000_000_000)
+    with IndexedDocument(path, converter, interval=4) as document:
+        rendered = document.render_range(0, document.line_count)
+    assert '\n'.join(rendered) + converter.reset == converter.convert(edited)
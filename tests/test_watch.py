@@ -0,0 +1,78 @@
+"""
+TreeIndex change detection: sweeps and same-mtime edits
+"""
+
+import os
+import time
+
+from md_ansi import watch
+from md_ansi.watch import MIN_SWEEP_FILES, RACY_NS, TreeIndex, sweep_size
+
+# An mtime long settled, well outside RACY_NS
+OLD_NS = 1_000_000_000_000_000_000
+
+
+def write(path, text, mtime_ns):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_small_trees_are_swept_whole_on_every_poll():
+    assert sweep_size(10) == MIN_SWEEP_FILES
+    assert sweep_size(50000) == 5000
+    assert sweep_size(50000, poll_interval=1.0, sweep_interval=2.0) == 25000
+
+
+def test_in_place_edit_in_unchanged_directory_is_seen_next_poll(tmp_path):
+    paths = [str(tmp_path / f"page{i}.md") for i in range(50)]
+    for path in paths:
+        write(path, '# Page\n', OLD_NS)
+    index = TreeIndex(tmp_path)
+    assert not index.racy
+    directory = os.stat(tmp_path).st_mtime_ns
+    write(paths[30], '# Edit\n', OLD_NS + 1_000_000_000)
+    assert os.stat(tmp_path).st_mtime_ns == directory
+    assert index.poll(1.0, sweep_size(len(index.files))) == ({paths[30]}, set())
+
+
+def test_same_size_edit_within_mtime_granularity_is_seen(tmp_path):
+    path = str(tmp_path / 'doc.md')
+    mtime = time.time_ns()
+    write(path, '# One\n', mtime)
+    index = TreeIndex(tmp_path)
+    assert path in index.racy
+    # Saved again with the same size, and a file system too coarse to move the mtime
+    write(path, '# Two\n', mtime)
+    assert index.poll(1.0, 0) == ({path}, set())
+    assert index.poll(2.0, 0) == (set(), set())
+
+
+def test_racy_file_is_hashed_until_its_mtime_is_old_enough(tmp_path, monkeypatch):
+    path = str(tmp_path / 'doc.md')
+    mtime = time.time_ns()
+    write(path, '# One\n', mtime)
+    index = TreeIndex(tmp_path)
+    hashed = []
+    content_hash = watch.content_hash
+
+    def counted(path):
+        hashed.append(path)
+        return content_hash(path)
+
+    monkeypatch.setattr(watch, 'content_hash', counted)
+    monkeypatch.setattr(watch.time, 'time_ns', lambda: mtime + RACY_NS)
+    # Checked once more, late enough that any later write moves the mtime
+    assert index.poll(1.0, 0) == (set(), set())
+    assert hashed == [path] and not index.racy
+    index.poll(2.0, 0)
+    assert hashed == [path]
+
+
+def test_removed_racy_file_is_forgotten(tmp_path):
+    path = str(tmp_path / 'doc.md')
+    write(path, '# One\n', time.time_ns())
+    index = TreeIndex(tmp_path)
+    os.unlink(path)
+    assert index.poll(1.0, 0) == (set(), {path})
+    assert not index.racy and not index.files
@@ -0,0 +1,42 @@
+"""
+Display widths and wrapping of lines with tabs
+"""
+
+import pytest
+
+from md_ansi.converter import MarkdownToANSIConverter
+from md_ansi.width import display_width, expand_tabs, strip_ansi, truncate_ansi, wrap_ansi
+
+
+def test_tabs_reach_the_next_tab_stop():
+    assert display_width('\t') == 8
+    assert display_width('abc\tx') == 9
+    assert display_width('12345678\tx') == 17
+    assert display_width('漢\tx') == 9
+    assert expand_tabs('\x1b[1m漢\x1b[0m\tx') == '\x1b[1m漢\x1b[0m      x'
+    assert expand_tabs('a b\tc') == 'a b     c'
+
+
+@pytest.mark.parametrize('width', [10, 17, 30])
+def test_wrapped_lines_with_tabs_fit(width):
+    text = '\x1b[36mcol\tvalue\tanother value\t\tend of the line\x1b[0m'
+    wrapped = wrap_ansi(text, width, '  ')
+    assert '\t' not in wrapped
+    assert all(display_width(strip_ansi(line)) <= width for line in wrapped.split('\n'))
+    assert display_width(strip_ansi(truncate_ansi(text, width))) <= width
+
+
+@pytest.mark.parametrize('highlight', [False, True])
+def test_rendered_lines_with_tabs_fit(highlight):
+    text = ('para\twith\ttabs that runs on for a while\n- item\twith a tab\n'
+            '> quote\twith a tab that runs on\n| a\tb | c |\n|---|---|\n| 1\t2 | 3 |')
+    converter = MarkdownToANSIConverter(width=24, highlight=highlight)
+    for line in converter.convert(text).split('\n'):
+        assert display_width(expand_tabs(strip_ansi(line))) <= 24
+
+
+def test_tabs_in_table_cells_keep_columns_aligned():
+    text = '| a\tb | c |\n|---|---|\n| 1\t2 | 3 |\n| wide\tcell | 4 |'
+    lines = [expand_tabs(strip_ansi(line)) for line in MarkdownToANSIConverter().convert(text).split('\n')]
+    assert len({display_width(line) for line in lines}) == 1
+    assert lines[1] == '│ a       b    │ c │'